@@ -0,0 +1 @@
+"""Micro-benchmarks of the launcher data paths, see :mod:`benchmarks.run`."""
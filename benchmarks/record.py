@@ -0,0 +1,100 @@
+"""Record fixtures of the benchmarks from the simulated cluster.
+
+Fixtures are stored compressed in ``benchmarks/fixtures`` and committed, so that every run measures the same data::
+
+    python -m benchmarks.record
+
+Recording again changes the data, update the baseline afterwards (``python -m benchmarks.run --update``).
+"""
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+
+from core.submit import SQUEUE
+from simulator.cluster import create_cluster
+from simulator.commands import squeue
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SQUEUE_FIXTURE = os.path.join(FIXTURES_DIR, "squeue.txt.gz")
+LOG_FIXTURE = os.path.join(FIXTURES_DIR, "user_log.json.gz")
+ERROR_FIXTURE = os.path.join(FIXTURES_DIR, "error_output.txt.gz")
+
+# partitions of the recorded cluster, VNC and DCV partitions produce jobs that are excluded from the job list
+PARTITIONS = {
+    "ottc01": {"cores": 28, "ram": 976},
+    "ottc02": {"cores": 32, "ram": 976},
+    "ottc02lm": {"cores": 32, "ram": 1612},
+    "ottvnc": {"cores": 16, "ram": 384},
+    "dcv": {"cores": 16, "ram": 384},
+}
+
+
+def read_fixture(path):
+    """Read text of the fixture."""
+    with gzip.open(path, "rt") as file:
+        return file.read()
+
+
+def write_fixture(path, text):
+    """Write text of the fixture, modification time is not stored to keep the file stable."""
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as file:
+        file.write(text.encode())
+
+
+def record_squeue(jobs=5000, seed=0):
+    """Get ``squeue`` output of all users of a busy cluster."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state = create_cluster(
+            os.path.join(tmp_dir, "cluster.json"), jobs=jobs, nodes=200, partitions=PARTITIONS, seed=seed
+        )
+    # --me is dropped to get all jobs, the launcher parses the same format
+    argv = [arg for arg in SQUEUE[1:] if arg != "--me"]
+    return "\n".join(squeue(argv, state, time.time())) + "\n"
+
+
+def record_error(lines=400, seed=0):
+    """Get long error output of ``sbatch`` with a long environment line, as shown in the message panel."""
+    rng = random.Random(seed)
+    env = ",".join(f"VAR_{num}={'x' * rng.randint(5, 40)}" for num in range(200))
+    output = [f"sbatch: error: Batch job submission failed, environment: {env}"]
+    for num in range(lines):
+        words = " ".join(
+            rng.choice(["node", "license", "memory", "allocation", "denied", "timeout"]) for _ in range(20)
+        )
+        output.append(f"srun: error: ottc01n{num % 200:03d}: task {num}: {words}")
+    return "\n".join(output) + "\n"
+
+
+def record_log(messages=1000, jobs=200, seed=0):
+    """Get full message log with long job outputs."""
+    rng = random.Random(seed)
+    error = record_error(lines=20, seed=seed)
+    log_data = {"Message List": [], "PID List": [str(100000 + num) for num in range(jobs)], "GUI Data": []}
+    for num in range(messages):
+        if num % 10 == 0:
+            message = error
+        else:
+            message = f"Submitted batch job {100000 + num}\n" + "ANSYS Electronics Desktop output line " * 5
+        log_data["Message List"].append(
+            ["2021-06-01 08:00:00", str(100000 + rng.randrange(jobs)), message, bool(num % 3)]
+        )
+    log_data["Log Files"] = {pid: f"/lus01/user/project_{pid}.{pid}.log" for pid in log_data["PID List"]}
+    return json.dumps(log_data, indent=4)
+
+
+def main():
+    """Record all fixtures."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    write_fixture(SQUEUE_FIXTURE, record_squeue())
+    write_fixture(LOG_FIXTURE, record_log())
+    write_fixture(ERROR_FIXTURE, record_error())
+    for path in (SQUEUE_FIXTURE, LOG_FIXTURE, ERROR_FIXTURE):
+        print(f"Recorded {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
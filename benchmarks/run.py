@@ -0,0 +1,237 @@
+"""Run micro-benchmarks of the launcher data paths and compare them with the baseline.
+
+Benchmarks use recorded fixtures (see :mod:`benchmarks.record`) and need no cluster and no display::
+
+    python -m benchmarks.run
+    python -m benchmarks.run --update  # store current results as baseline
+
+Each run of a benchmark is preceded by a run of a pure Python calibration loop and the time is stored relative to
+it, so that the baseline recorded on one machine could be used on another and changes of the machine load during
+the run cancel out. Run fails if any benchmark is slower than the baseline by more than the threshold.
+
+Baseline is a ratio keyed by benchmark name or a dictionary with ``ratio`` and ``threshold``. The own threshold is
+used for benchmarks that take less than 0.1 ms, their time varies with the file system cache and the interpreter
+state more than the default threshold allows.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+
+from benchmarks.record import ERROR_FIXTURE
+from benchmarks.record import LOG_FIXTURE
+from benchmarks.record import SQUEUE_FIXTURE
+from benchmarks.record import read_fixture
+from core.config import LAUNCHER_DIR
+from core.config import load_cluster_config
+from core.config import read_settings
+from core.config import write_settings
+from core.messages import read_log
+from core.messages import wrap_message
+from core.messages import write_log
+from core.submit import parse_squeue
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TEMPLATE_CONFIGURATION_FILE = os.path.join(LAUNCHER_DIR, "templates", "cluster_configuration.json")
+
+DEFAULT_THRESHOLD = 0.3
+
+# width of the message column in the UI
+MESSAGE_WIDTH = 600
+
+SETTINGS = {
+    "version": "3.2.3",
+    "queue": "ottc01",
+    "allocation": "1 Node and Cores",
+    "num_cores": 8,
+    "aedt_version": "2021 R1",
+    "env_var": "ANS_NODEPCHECK=1,ANSYSEM_FEATURE_F395486_RIBBON_ENABLE=1",
+    "use_node_list": False,
+    "node_list": "ottc01n[001-030,045]",
+    "project_path": "/lus01/user/projects",
+    "use_reservation": False,
+    "reservation_id": "",
+    "stage_project": False,
+}
+
+
+def calibrate():
+    """Pure Python loop to measure speed of the machine."""
+    total = 0
+    for num in range(10000):
+        total += num % 7
+    return total
+
+
+def monospace_extents(line):
+    """Partial text extents of 7 pixel wide font, stands for ``wx.DC.GetPartialTextExtents``."""
+    return [7 * (num + 1) for num in range(len(line))]
+
+
+def benchmarks(work_dir):
+    """Get benchmarks keyed by name.
+
+    Parameters
+    ----------
+    work_dir : str
+        Directory for files written by the benchmarks.
+
+    Returns
+    -------
+    dict
+        Functions without arguments.
+    """
+    squeue_output = read_fixture(SQUEUE_FIXTURE)
+    error_output = read_fixture(ERROR_FIXTURE)
+    cluster_config = load_cluster_config(TEMPLATE_CONFIGURATION_FILE)
+    exclude = cluster_config["vnc_nodes"] + cluster_config["dcv_nodes"]
+
+    logfile = os.path.join(work_dir, "user_log_VNC.json")
+    with open(logfile, "w") as file:
+        file.write(read_fixture(LOG_FIXTURE))
+    log_data = read_log(logfile)
+
+    settings_file = os.path.join(work_dir, "default.json")
+    write_settings(settings_file, SETTINGS)
+
+    return {
+        "squeue_parse": lambda: parse_squeue(squeue_output),
+        "squeue_exclude": lambda: parse_squeue(squeue_output, exclude),
+        "log_read": lambda: read_log(logfile),
+        "log_write": lambda: write_log(logfile, log_data),
+        "message_wrap": lambda: wrap_message(error_output, MESSAGE_WIDTH, monospace_extents),
+        "settings_load": lambda: read_settings(settings_file),
+        "settings_save": lambda: write_settings(settings_file, SETTINGS),
+        "config_load": lambda: load_cluster_config(TEMPLATE_CONFIGURATION_FILE),
+    }
+
+
+def measure(function, repeat=7):
+    """Measure function relative to the calibration loop.
+
+    Parameters
+    ----------
+    function : callable
+        Benchmark.
+    repeat : int, optional
+        Number of runs, each run is at least 0.2 seconds.
+
+    Returns
+    -------
+    tuple
+        Time of a call in seconds (best run) and median ratio of the time to the time of the calibration loop.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    calibration_timer = timeit.Timer(calibrate)
+    calibration_number, _ = calibration_timer.autorange()
+
+    times = []
+    ratios = []
+    for _ in range(repeat):
+        calibration = calibration_timer.timeit(calibration_number) / calibration_number
+        seconds = timer.timeit(number) / number
+        times.append(seconds)
+        ratios.append(seconds / calibration)
+
+    return min(times), statistics.median(ratios)
+
+
+def parse_baseline(value, threshold):
+    """Get ratio and threshold of a benchmark from the baseline entry, see module docstring."""
+    if isinstance(value, dict):
+        return value["ratio"], value.get("threshold", threshold)
+    return value, threshold
+
+
+def compare(results, baseline, threshold):
+    """Compare results with the baseline.
+
+    Parameters
+    ----------
+    results : dict
+        Results of :func:`measure` keyed by benchmark name.
+    baseline : dict
+        Ratios to the calibration loop keyed by benchmark name, see :func:`parse_baseline`.
+    threshold : float
+        Allowed slowdown as a fraction, eg ``0.3`` for 30%, if the benchmark has no own threshold.
+
+    Returns
+    -------
+    list
+        Dictionaries with name, time, baseline time on this machine (``None`` if benchmark is new), change as a
+        fraction and regression flag.
+    """
+    report = []
+    for name, (seconds, ratio) in results.items():
+        if name not in baseline:
+            report.append({"name": name, "ms": seconds * 1000, "baseline_ms": None, "change": 0.0, "regression": False})
+            continue
+
+        baseline_ratio, allowed = parse_baseline(baseline[name], threshold)
+        change = ratio / baseline_ratio - 1
+        report.append(
+            {
+                "name": name,
+                "ms": seconds * 1000,
+                "baseline_ms": seconds / ratio * baseline_ratio * 1000,
+                "change": change,
+                "regression": change > allowed,
+            }
+        )
+    return report
+
+
+def format_report(report):
+    """Format comparison with the baseline as a table."""
+    lines = ["{:<16}{:>12}{:>14}{:>10}".format("benchmark", "ms", "baseline ms", "change")]
+    for row in report:
+        baseline = f"{row['baseline_ms']:.3f}" if row["baseline_ms"] is not None else "new"
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<16}{row['ms']:>12.3f}{baseline:>14}{row['change']:>+10.0%}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Run benchmarks from command line."""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the launcher data paths")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, eg 0.3")
+    parser.add_argument("--filter", default="", help="Run only benchmarks which name contains this text")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs of each benchmark")
+    parser.add_argument("--update", action="store_true", help="Store results as the baseline")
+    parser.add_argument("--json", action="store_true", help="Print report as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = {}
+        for name, function in benchmarks(work_dir).items():
+            if args.filter in name:
+                results[name] = measure(function, args.repeat)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    if args.update:
+        for name, (_seconds, ratio) in results.items():
+            if isinstance(baseline.get(name), dict):
+                baseline[name]["ratio"] = round(ratio, 3)  # keep own threshold
+            else:
+                baseline[name] = round(ratio, 3)
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    report = compare(results, baseline, args.threshold)
+    print(json.dumps(report, indent=4) if args.json else format_report(report))
+    return 1 if any(row["regression"] for row in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
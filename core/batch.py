@@ -0,0 +1,235 @@
+"""Non-graphical batch solve of AEDT projects submitted as independent Slurm jobs."""
+import os
+import re
+import shlex
+import time
+
+from core.machinelist import machinelist_argument
+from core.staging import project_include
+from core.staging import staging_prefix
+from core.submit import SubmissionError
+from core.submit import job_resources
+from core.submit import submit_job
+
+
+def batch_log_file(project, job_id="%j"):
+    """Get path to the output file of batch solve job.
+
+    Parameters
+    ----------
+    project : str
+        Path to the ``.aedt`` project.
+    job_id : str, optional
+        Job ID, by default ``sbatch`` pattern.
+
+    Returns
+    -------
+    str
+        Path to the file next to the project.
+    """
+    project = os.path.abspath(project)
+    return f"{os.path.splitext(project)[0]}.{job_id}.log"
+
+
+def batch_command(aedt_path, queue, allocation_rule, total_cores, queue_config, batch_options_file=""):
+    """Build shell words of non-graphical AEDT solve up to ``-batchsolve``, the target is appended by the caller.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+    queue : str
+        Partition name.
+    allocation_rule : int
+        ``0`` for cores on a single node, ``1`` for multiple whole nodes.
+    total_cores : int
+        Total number of cores of the job.
+    queue_config : dict
+        Cores and RAM per node for each queue.
+    batch_options_file : str, optional
+        AEDT batch options file of the queue HPC profile, see :mod:`core.hpc`.
+
+    Returns
+    -------
+    list
+        Quoted shell words.
+    """
+    aedt_command = [
+        os.path.join(aedt_path, "ansysedt"),
+        "-ng",
+        "-monitor",
+        "-waitforlicense",
+    ]
+    if allocation_rule != 0:
+        aedt_command.append("-distributed")
+    if batch_options_file:
+        aedt_command += ["-batchoptions", batch_options_file]
+    aedt_command = [shlex.quote(arg) for arg in aedt_command]
+    aedt_command += [
+        "-machinelist",
+        machinelist_argument(queue_config[queue], allocation_rule, total_cores),
+        "-batchsolve",
+    ]
+    return aedt_command
+
+
+def batch_script(
+    aedt_path,
+    project,
+    queue,
+    allocation_rule,
+    num,
+    queue_config,
+    env,
+    nodes_list_str="",
+    reservation_id="",
+    batch_options_file="",
+    scratch_dir="",
+    exclude_str="",
+):
+    """Render ``sbatch`` script that solves all setups of the project in non-graphical mode.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+    project : str
+        Path to the ``.aedt`` project.
+    queue : str
+        Partition name.
+    allocation_rule : int
+        ``0`` for cores on a single node, ``1`` for multiple whole nodes.
+    num : int
+        Number of cores or nodes depending on allocation rule.
+    queue_config : dict
+        Cores and RAM per node for each queue.
+    env : str
+        Comma separated environment variables.
+    nodes_list_str : str, optional
+        Nodes to run the job on.
+    reservation_id : str, optional
+        Reservation to run the job in.
+    exclude_str : str, optional
+        Nodes to avoid, see :mod:`core.exclusions`.
+    batch_options_file : str, optional
+        AEDT batch options file of the queue HPC profile, see :mod:`core.hpc`.
+    scratch_dir : str, optional
+        Node-local scratch directory. If specified, project and its results are solved on scratch and copied back when
+        the job ends, see :mod:`core.staging`.
+
+    Returns
+    -------
+    str
+        Content of the script.
+    """
+    resources, total_cores = job_resources(queue, allocation_rule, num, queue_config)
+    project_dir, project_file = os.path.split(os.path.abspath(project))
+    project_name = os.path.splitext(project_file)[0]
+
+    options = [
+        f"--job-name={re.sub(r'[^A-Za-z0-9_.-]', '_', project_name)[:32]}",
+        f"--partition={queue}",
+        *resources,
+        f"--chdir={project_dir}",
+        f"--output={batch_log_file(project)}",
+    ]
+    if env:
+        options.append(f"--export={env}")
+    nodes_list_str = nodes_list_str.replace(" ", "")
+    if nodes_list_str:
+        options.append(f"--nodelist={nodes_list_str}")
+    if exclude_str:
+        options.append(f"--exclude={exclude_str}")
+    if reservation_id:
+        options.append(f"--reservation={reservation_id}")
+
+    aedt_command = batch_command(aedt_path, queue, allocation_rule, total_cores, queue_config, batch_options_file)
+    if scratch_dir:
+        aedt_command = staging_prefix(project_dir, scratch_dir, project_include([project_file])) + aedt_command
+        aedt_command.append(shlex.quote(f"{{scratch}}/{project_file}"))
+    else:
+        aedt_command.append(shlex.quote(os.path.join(project_dir, project_file)))
+
+    lines = ["#!/bin/bash"]
+    lines += [f"#SBATCH {option}" for option in options]
+    lines += ["", " ".join(aedt_command), ""]
+    return "\n".join(lines)
+
+
+def check_project(project):
+    """Validate that project could be solved in batch.
+
+    Parameters
+    ----------
+    project : str
+        Path to the ``.aedt`` project.
+
+    Returns
+    -------
+    str
+        Error message, empty if project is fine.
+    """
+    if not project.endswith(".aedt"):
+        return f"{project} is not an AEDT project"
+    if not os.path.isfile(project):
+        return f"{project} does not exist"
+    if os.path.exists(project + ".lock"):
+        return f"{project} is locked, probably it is opened in another session"
+    return ""
+
+
+def submit_batch(projects, script_dir, submit=None, **job_options):
+    """Submit each project as an independent batch solve job.
+
+    Parameters
+    ----------
+    projects : list
+        Paths to the ``.aedt`` projects.
+    script_dir : str
+        Directory to write job scripts to.
+    submit : callable, optional
+        Function that submits ``sbatch`` command with partition, total number of cores, description and output file
+        of the job, eg :meth:`core.limits.LimitGate.submit`. By default job is submitted directly.
+    **job_options
+        Options of :func:`batch_script` except ``project``.
+
+    Returns
+    -------
+    list
+        Tuples of project, job ID (``None`` if job was not submitted) and message.
+    """
+    os.makedirs(script_dir, exist_ok=True)
+    _resources, total_cores = job_resources(
+        job_options["queue"], job_options["allocation_rule"], job_options["num"], job_options["queue_config"]
+    )
+
+    results = []
+    for project in projects:
+        error = check_project(project)
+        if error:
+            results.append((project, None, error))
+            continue
+
+        script = batch_script(project=project, **job_options)
+        project_name = os.path.splitext(os.path.basename(project))[0]
+        script_file = os.path.join(script_dir, f"{project_name}_{time.strftime('%Y%m%d_%H%M%S')}.sh")
+        with open(script_file, "w") as file:
+            file.write(script)
+
+        try:
+            if submit:
+                pid = submit(
+                    ["sbatch", script_file],
+                    job_options["queue"],
+                    total_cores,
+                    f"Batch solve of {project}",
+                    batch_log_file(project),
+                )
+            else:
+                pid = submit_job(["sbatch", script_file])
+        except SubmissionError as exc:
+            results.append((project, None, str(exc)))
+        else:
+            results.append((project, pid, f"Batch solve of {project} submitted\nJob script: {script_file}"))
+
+    return results
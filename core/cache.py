@@ -0,0 +1,50 @@
+"""Helpers to keep small cache files in the application folder (``~/.aedt``)."""
+import json
+import os
+import tempfile
+
+
+def read_json(path, default=None):
+    """Read a JSON cache file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the cache file.
+    default : optional
+        Value returned if file does not exist or is corrupted.
+
+    Returns
+    -------
+    object
+        Content of the file or ``default``.
+    """
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        return default
+
+
+def write_json(path, data):
+    """Dump data to a JSON cache file.
+
+    File is written to a temporary file first and then moved, so that the reader (eg second instance of the
+    launcher) never sees partially written file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the cache file.
+    data : object
+        JSON serializable data.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
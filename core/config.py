@@ -0,0 +1,179 @@
+"""Cluster configuration and user settings shared by GUI and command line interface."""
+import errno
+import json
+import os
+from collections import OrderedDict
+
+from core.licenses import ACTIONS
+
+LAUNCHER_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CLUSTER_CONFIGURATION_FILE = os.path.join(LAUNCHER_DIR, "cluster_configuration.json")
+
+REQUIRED_KEYS = [
+    "path_to_ssh",
+    "overwatch_url",
+    "overwatch_api_url",
+    "default_version",
+    "install_dir",
+    "queue_config_dict",
+    "default_queue",
+    "user_project_path_root",
+]
+
+
+# node-local directory for project staging if not set by ``scratch_dir`` of cluster configuration
+DEFAULT_SCRATCH_DIR = "/tmp"
+
+
+class ConfigurationError(Exception):
+    """Raised when cluster configuration file is missing or wrong."""
+
+
+def load_cluster_config(config_file=CLUSTER_CONFIGURATION_FILE):
+    """Read cluster configuration from a file.
+
+    Parameters
+    ----------
+    config_file : str, optional
+        Path to the configuration file.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Cluster configuration.
+    """
+    try:
+        with open(config_file) as file:
+            cluster_config = json.load(file, object_pairs_hook=OrderedDict)
+    except FileNotFoundError:
+        raise ConfigurationError("\nConfiguration file does not exist!\nCheck existence of " + config_file)
+    except json.decoder.JSONDecodeError:
+        raise ConfigurationError(
+            "\nConfiguration file is wrong!\nCheck format of {} \nOnly double quotes are allowed!".format(config_file)
+        )
+
+    for key in REQUIRED_KEYS:
+        if key not in cluster_config:
+            raise ConfigurationError(
+                (
+                    "\nConfiguration file is wrong!\nCheck format of {} \nOnly double quotes are allowed."
+                    + "\nFollowing key does not exist: {}"
+                ).format(config_file, key)
+            )
+
+    hpc_profiles = cluster_config.get("hpc_profiles", {})
+    for queue, queue_settings in cluster_config["queue_config_dict"].items():
+        profile_name = queue_settings.get("hpc_profile")
+        if profile_name and profile_name not in hpc_profiles:
+            raise ConfigurationError(
+                "\nConfiguration file is wrong!\nQueue {} refers to HPC profile {} that is not in hpc_profiles".format(
+                    queue, profile_name
+                )
+            )
+
+    for queue, pool_settings in cluster_config.get("session_pool", {}).items():
+        queue_settings = cluster_config["queue_config_dict"].get(queue)
+        if queue_settings is None or not 0 < pool_settings.get("cores", 0) <= queue_settings["cores"]:
+            raise ConfigurationError(
+                "\nConfiguration file is wrong!\nSession pool of queue {} needs a queue from queue_config_dict and "
+                "cores within the node size".format(queue)
+            )
+
+    license_settings = cluster_config.get("licenses", {})
+    if license_settings and license_settings.get("action", "warn") not in ACTIONS:
+        raise ConfigurationError(
+            "\nConfiguration file is wrong!\nLicense action {} is not supported, use one of {}".format(
+                license_settings["action"], ", ".join(ACTIONS)
+            )
+        )
+
+    return cluster_config
+
+
+def ensure_app_folder():
+    """Create a path for .aedt folder if first run
+
+    Returns
+    -------
+    str
+        Path to application directory.
+    """
+
+    user_dir = os.path.expanduser("~")
+    app_dir = os.path.join(user_dir, ".aedt")
+    if not os.path.exists(app_dir):
+        try:
+            os.makedirs(app_dir)
+        except OSError as exc:  # Guard against race condition
+            if exc.errno != errno.EEXIST:
+                raise
+
+    return app_dir
+
+
+def read_product(aedt_path):
+    """Get product name of the installation used for registry.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+
+    Returns
+    -------
+    str
+        First line of ``ProductList.txt``.
+    """
+    with open(os.path.join(aedt_path, "config", "ProductList.txt")) as file:
+        return next(file).rstrip()  # get first line
+
+
+def read_custom_builds(user_build_json):
+    """Read builds added by user.
+
+    Parameters
+    ----------
+    user_build_json : str
+        Path to the JSON file with user builds.
+
+    Returns
+    -------
+    dict
+        Paths to installation keyed by build name. Empty if file does not exist.
+
+    Raises
+    ------
+    json.decoder.JSONDecodeError
+        If file is corrupted.
+    """
+    if not os.path.isfile(user_build_json):
+        return {}
+
+    with open(user_build_json) as file:
+        return json.load(file)
+
+
+def read_settings(default_settings_json):
+    """Read settings saved by user as default.
+
+    Parameters
+    ----------
+    default_settings_json : str
+        Path to the settings file.
+
+    Returns
+    -------
+    dict
+        Settings, empty if file does not exist or is corrupted.
+    """
+    try:
+        with open(default_settings_json, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        return {}
+
+
+def write_settings(default_settings_json, settings):
+    """Save settings as default, see :func:`read_settings`."""
+    with open(default_settings_json, "w") as file:
+        json.dump(settings, file, indent=4)
@@ -0,0 +1,158 @@
+"""Resource usage of running jobs collected with one batched ``sacct`` and one batched ``sstat`` call."""
+import subprocess
+
+from core.runner import get_runner
+
+MEMORY_UNITS = {"K": 1 / 1024**2, "M": 1 / 1024, "G": 1, "T": 1024}
+
+
+def parse_duration(value):
+    """Convert Slurm duration to seconds.
+
+    Parameters
+    ----------
+    value : str
+        Duration in one of ``[DD-[HH:]]MM:SS[.mmm]`` formats.
+
+    Returns
+    -------
+    float
+        Duration in seconds, 0 for empty or invalid values.
+    """
+    try:
+        days, _, clock = value.rpartition("-")
+        parts = [float(part) for part in clock.split(":")]
+        while len(parts) < 3:
+            parts.insert(0, 0.0)
+        hours, minutes, seconds = parts
+        return int(days or 0) * 86400 + hours * 3600 + minutes * 60 + seconds
+    except ValueError:
+        return 0.0
+
+
+def parse_memory(value):
+    """Convert Slurm memory value (eg ``1024K``, ``3.5G``) to GB. Values without unit are in bytes."""
+    value = value.strip()
+    if not value:
+        return 0.0
+
+    try:
+        if value[-1] in MEMORY_UNITS:
+            return float(value[:-1]) * MEMORY_UNITS[value[-1]]
+        return float(value) / 1024**3
+    except ValueError:
+        return 0.0
+
+
+def collect_efficiency(job_ids, queue_config):
+    """Get CPU and memory efficiency of jobs.
+
+    Allocation data comes from ``sacct`` and live usage of the steps from ``sstat``, each called only once for all
+    the jobs.
+
+    Parameters
+    ----------
+    job_ids : list
+        IDs of the jobs.
+    queue_config : dict
+        Queue configuration with RAM per node (``queue_config_dict``).
+
+    Returns
+    -------
+    list
+        Dictionaries with job ID, partition, number of nodes and cores, elapsed time, CPU utilization (0 to 1),
+        max RSS in GB and max RSS as a fraction of RAM per node.
+    """
+    if not job_ids:
+        return []
+
+    jobs = ",".join(job_ids)
+    runner = get_runner()
+    sacct_output = runner.check_output(
+        [
+            "sacct",
+            "--noheader",
+            "--parsable2",
+            "--jobs",
+            jobs,
+            "--format",
+            "JobID,Partition,NNodes,NCPUS,ElapsedRaw,TotalCPU,MaxRSS",
+        ],
+    )
+    try:
+        sstat_output = runner.check_output(
+            [
+                "sstat",
+                "--noheader",
+                "--parsable2",
+                "--allsteps",
+                "--jobs",
+                jobs,
+                "--format",
+                "JobID,AveCPU,NTasks,MaxRSS",
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+    except subprocess.CalledProcessError as exc:
+        # sstat fails if any of the jobs has no running steps, but still reports the rest
+        sstat_output = exc.output or ""
+
+    return merge_usage(sacct_output, sstat_output, queue_config)
+
+
+def merge_usage(sacct_output, sstat_output, queue_config):
+    """Combine output of ``sacct`` and ``sstat`` into per job efficiency, see :func:`collect_efficiency`."""
+    jobs = {}
+    steps = {}  # CPU time and max RSS of each step keyed by job ID and step ID
+
+    for line in sacct_output.splitlines():
+        fields = line.strip().split("|")
+        if len(fields) != 7:
+            continue
+
+        step_id, partition, nodes, cores, elapsed, total_cpu, max_rss = fields
+        job_id, _, step = step_id.partition(".")
+        if not step:
+            try:
+                jobs[job_id] = {
+                    "pid": job_id,
+                    "partition": partition,
+                    "nodes": int(nodes),
+                    "cores": int(cores),
+                    "elapsed": int(elapsed),
+                }
+            except ValueError:
+                pass
+            continue
+
+        # finished steps are reported only by sacct
+        steps.setdefault(job_id, {})[step] = [parse_duration(total_cpu), parse_memory(max_rss)]
+
+    for line in sstat_output.splitlines():
+        fields = line.strip().split("|")
+        if len(fields) != 4:
+            continue
+
+        step_id, ave_cpu, num_tasks, max_rss = fields
+        job_id, _, step = step_id.partition(".")
+        try:
+            cpu_time = parse_duration(ave_cpu) * int(num_tasks or 1)
+        except ValueError:
+            continue
+
+        usage = steps.setdefault(job_id, {}).setdefault(step, [0.0, 0.0])
+        usage[0] = max(usage[0], cpu_time)
+        usage[1] = max(usage[1], parse_memory(max_rss))
+
+    for job_id, job in jobs.items():
+        job_steps = steps.get(job_id, {}).values()
+        cpu_time = sum(usage[0] for usage in job_steps)
+        max_rss = max([usage[1] for usage in job_steps], default=0.0)
+
+        core_time = job["elapsed"] * job["cores"]
+        ram = queue_config.get(job["partition"], {}).get("ram", 0)
+        job["cpu_efficiency"] = cpu_time / core_time if core_time else 0.0
+        job["max_rss"] = max_rss
+        job["ram_fraction"] = max_rss / ram if ram else 0.0
+
+    return list(jobs.values())
@@ -0,0 +1,213 @@
+"""Nodes that new jobs should avoid: down or drained nodes and nodes where recent jobs of the user failed.
+
+Unavailable nodes come from ``sinfo -R``, failing nodes from the exit states of the jobs of the user in the last day:
+any ``NODE_FAIL`` or :data:`FAILURES_TO_EXCLUDE` single node jobs that failed within :data:`QUICK_FAILURE` seconds
+after start, as ``ansysedt`` does on a broken node. The set is cached in ``~/.aedt/excluded_nodes.json`` and added to
+submissions as ``--exclude``.
+"""
+import getpass
+import threading
+import time
+from datetime import datetime
+
+from core.cache import read_json
+from core.cache import write_json
+from core.hostlist import compress
+from core.hostlist import expand
+from core.runner import get_runner
+from core.waittime import SACCT_TIME_FORMAT
+
+SINFO_REASONS = ["sinfo", "--list-reasons", "--noheader", "--format", "%N|%T|%E"]
+
+REFRESH_PERIOD = 600
+FAILURE_WINDOW = 86400  # failures older than a day are forgiven
+QUICK_FAILURE = 600  # job that failed within 10 minutes after start blames the node
+FAILURES_TO_EXCLUDE = 2
+
+
+def sacct_failures_command(user, since):
+    """Get ``sacct`` command for failed jobs of the user that started after ``since``."""
+    return [
+        "sacct",
+        "--user",
+        user,
+        "--allocations",
+        "--noheader",
+        "--parsable2",
+        "--starttime",
+        datetime.fromtimestamp(since).strftime(SACCT_TIME_FORMAT),
+        "--state",
+        "FAILED,NODE_FAIL",
+        "--format",
+        "JobID,State,ElapsedRaw,NNodes,NodeList",
+    ]
+
+
+def parse_reasons(sinfo_output):
+    """Parse output of :data:`SINFO_REASONS`.
+
+    Returns
+    -------
+    dict
+        State and reason (eg ``drained: Kill task failed``) keyed by node name.
+    """
+    nodes = {}
+    for line in sinfo_output.splitlines():
+        fields = line.strip().split("|")
+        if len(fields) != 3:
+            continue
+
+        hostlist, state, reason = fields
+        try:
+            hosts = expand(hostlist)
+        except ValueError:
+            continue
+        state = state.rstrip("*~#!%$@^-").lower()  # drop flags, eg ``down*`` of not responding node
+        for host in hosts:
+            nodes[host] = f"{state}: {reason}" if reason and reason != "none" else state
+    return nodes
+
+
+def parse_failures(sacct_output):
+    """Parse output of :func:`sacct_failures_command`.
+
+    Returns
+    -------
+    dict
+        Reason to avoid the node keyed by node name, only for nodes that should be excluded.
+    """
+    node_failures = set()
+    quick_failures = {}
+    for line in sacct_output.splitlines():
+        fields = line.strip().split("|")
+        if len(fields) != 5:
+            continue
+
+        _job_id, state, elapsed, nodes, hostlist = fields
+        if not hostlist or hostlist == "None assigned":
+            continue  # job failed before allocation
+        try:
+            hosts = expand(hostlist)
+            elapsed, nodes = int(elapsed), int(nodes)
+        except ValueError:
+            continue
+
+        if state.startswith("NODE_FAIL"):
+            node_failures.update(hosts)
+        elif state.startswith("FAILED") and nodes == 1 and elapsed < QUICK_FAILURE:
+            for host in hosts:
+                quick_failures[host] = quick_failures.get(host, 0) + 1
+
+    failing = {host: "node failure of your job" for host in node_failures}
+    for host, count in quick_failures.items():
+        if count >= FAILURES_TO_EXCLUDE and host not in failing:
+            failing[host] = f"{count} of your jobs failed right after start"
+    return failing
+
+
+class ExcludedNodes:
+    """Cached set of nodes to exclude from submissions.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the JSON file with cached nodes.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.unavailable = {}
+        self.failing = {}
+        self.updated = 0
+        self._lock = threading.Lock()
+
+        cached = read_json(self.cache_file, default={})
+        if isinstance(cached, dict):
+            self.unavailable = cached.get("unavailable", {})
+            self.failing = cached.get("failing", {})
+            self.updated = cached.get("updated", 0)
+
+    def is_outdated(self):
+        """Check if nodes should be refreshed."""
+        return time.time() - self.updated > REFRESH_PERIOD
+
+    def refresh(self, user=None):
+        """Update nodes from ``sinfo -R`` and failed jobs of the user.
+
+        Parameters
+        ----------
+        user : str, optional
+            Name of the user, by default current user.
+
+        Returns
+        -------
+        bool
+            ``True`` if excluded nodes changed.
+        """
+        runner = get_runner()
+        unavailable = parse_reasons(runner.check_output(SINFO_REASONS))
+        since = time.time() - FAILURE_WINDOW
+        failing = parse_failures(runner.check_output(sacct_failures_command(user or getpass.getuser(), since)))
+
+        with self._lock:
+            changed = unavailable != self.unavailable or failing != self.failing
+            self.unavailable = unavailable
+            self.failing = failing
+            self.updated = time.time()
+            write_json(
+                self.cache_file, {"updated": self.updated, "unavailable": self.unavailable, "failing": self.failing}
+            )
+        return changed
+
+    def nodes(self, partition=None, inventory=None):
+        """Get nodes to avoid with the reasons.
+
+        Parameters
+        ----------
+        partition : str, optional
+            Partition of the job.
+        inventory : core.nodes.NodeInventory, optional
+            Node inventory used to keep only nodes of the partition. All nodes are returned if the partition is not in
+            the inventory.
+
+        Returns
+        -------
+        dict
+            Reason keyed by node name.
+        """
+        with self._lock:
+            nodes = dict(self.unavailable, **self.failing)
+        if partition and inventory is not None:
+            partition_nodes = {node["name"] for node in inventory.partition_nodes(partition)}
+            if partition_nodes:
+                nodes = {node: reason for node, reason in nodes.items() if node in partition_nodes}
+        return nodes
+
+    def exclude(self, partition=None, inventory=None, nodelist=""):
+        """Get hostlist expression for ``--exclude`` of a job.
+
+        Parameters
+        ----------
+        partition : str, optional
+            Partition of the job.
+        inventory : core.nodes.NodeInventory, optional
+            Node inventory, see :meth:`nodes`.
+        nodelist : str, optional
+            Nodes requested by the user, they are never excluded.
+
+        Returns
+        -------
+        str
+            Compressed hostlist expression, empty if there is nothing to exclude.
+        """
+        requested = set(expand(nodelist.replace(" ", ""))) if nodelist.strip() else set()
+        return compress(sorted(node for node in self.nodes(partition, inventory) if node not in requested))
+
+    def pinned(self, nodelist):
+        """Get nodes requested by the user that should be avoided, with the reasons. Invalid node list has none."""
+        try:
+            requested = expand(nodelist.replace(" ", "")) if nodelist.strip() else []
+        except ValueError:
+            return {}
+        nodes = self.nodes()
+        return {node: nodes[node] for node in requested if node in nodes}
@@ -0,0 +1,152 @@
+"""History of the cluster load stored in fixed-size ring buffers with minute resolution."""
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+# file header: magic, format version, buffer capacity, epoch minute of the latest sample, number of queues
+HEADER = struct.Struct("<4sHIQH")
+MAGIC = b"AEDH"
+FORMAT_VERSION = 1
+
+MISSING = 0xFFFF  # marker of the minute without sample
+SCALE = 10000  # load fraction is stored as unsigned short with 0.01% precision
+
+
+class LoadHistory:
+    """Per-queue history of the cluster load.
+
+    Each queue has a preallocated ``array`` of unsigned shorts, one slot per minute. Slot of the sample is defined
+    by the epoch minute, so the buffer never needs to be shifted and gaps (eg launcher was closed) are simply marked
+    as missing. Three days of history take about 8 kB per queue.
+
+    Parameters
+    ----------
+    history_file : str
+        Path to the binary file where history is persisted.
+    queues : iterable
+        Names of the queues to track.
+    days : int, optional
+        Depth of the history in days.
+    """
+
+    def __init__(self, history_file, queues, days=3):
+        self.history_file = history_file
+        self.capacity = days * 24 * 60
+        self.last_minute = 0
+        self.samples = {queue: array("H", [MISSING]) * self.capacity for queue in queues}
+        self._lock = threading.Lock()
+
+        try:
+            self.load()
+        except (OSError, ValueError, struct.error):
+            print("Cannot read cluster load history, start new one")
+            self.samples = {queue: array("H", [MISSING]) * self.capacity for queue in queues}
+            self.last_minute = 0
+
+    def add(self, queue_data, timestamp=None):
+        """Record current load of all queues.
+
+        Parameters
+        ----------
+        queue_data : dict
+            Queue load in format of ``queue_dict``.
+        timestamp : float, optional
+            Time of the sample, by default current time.
+        """
+        minute = int((timestamp or time.time()) // 60)
+        with self._lock:
+            if self.last_minute:
+                # mark minutes without samples since the previous one
+                for missed in range(max(self.last_minute + 1, minute - self.capacity + 1), minute):
+                    for buffer in self.samples.values():
+                        buffer[missed % self.capacity] = MISSING
+
+            slot = minute % self.capacity
+            for queue, buffer in self.samples.items():
+                load = queue_data.get(queue, {})
+                total = load.get("total_cores", 0)
+                if total:
+                    busy = min(max(total - load.get("avail_cores", 0), 0), total)
+                    buffer[slot] = round(SCALE * busy / total)
+                else:
+                    buffer[slot] = MISSING
+
+            self.last_minute = max(minute, self.last_minute)
+
+    def trend(self, queue, points, minutes=24 * 60):
+        """Get downsampled load of the queue for a sparkline.
+
+        Parameters
+        ----------
+        queue : str
+            Name of the queue.
+        points : int
+            Number of points in the output.
+        minutes : int, optional
+            Time span of the trend ending at the latest sample.
+
+        Returns
+        -------
+        list
+            Average load fraction (0 to 1) per point, ``None`` for points without samples.
+        """
+        buffer = self.samples.get(queue)
+        if buffer is None or not self.last_minute or points < 1:
+            return []
+
+        minutes = min(minutes, self.capacity)
+        with self._lock:
+            start = self.last_minute - minutes + 1
+            values = [buffer[minute % self.capacity] for minute in range(start, self.last_minute + 1)]
+
+        trend = []
+        for i in range(points):
+            first, last = i * minutes // points, (i + 1) * minutes // points
+            chunk = [val for val in values[first:last] if val != MISSING]
+            trend.append(sum(chunk) / len(chunk) / SCALE if chunk else None)
+
+        return trend
+
+    def save(self):
+        """Dump all buffers to the history file."""
+        with self._lock:
+            blobs = [HEADER.pack(MAGIC, FORMAT_VERSION, self.capacity, self.last_minute, len(self.samples))]
+            for queue, buffer in self.samples.items():
+                name = queue.encode()
+                if sys.byteorder == "big":
+                    buffer = array("H", buffer)
+                    buffer.byteswap()
+                blobs += [struct.pack("<B", len(name)), name, buffer.tobytes()]
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.history_file), prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(b"".join(blobs))
+        os.replace(tmp_path, self.history_file)
+
+    def load(self):
+        """Read buffers from the history file. Queues that are not tracked anymore are skipped."""
+        if not os.path.isfile(self.history_file):
+            return
+
+        with open(self.history_file, "rb") as file:
+            magic, version, capacity, last_minute, num_queues = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION or capacity != self.capacity:
+                raise ValueError("History file has different format")
+
+            for _ in range(num_queues):
+                (name_length,) = struct.unpack("<B", file.read(1))
+                queue = file.read(name_length).decode()
+                buffer = array("H")
+                buffer.frombytes(file.read(capacity * buffer.itemsize))
+                if len(buffer) != capacity:
+                    raise ValueError("History file is truncated")
+                if sys.byteorder == "big":
+                    buffer.byteswap()
+                if queue in self.samples:
+                    self.samples[queue] = buffer
+
+        self.last_minute = last_minute
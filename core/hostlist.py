@@ -0,0 +1,133 @@
+"""Slurm hostlist expressions, eg ``ottc01sn[001-003,010],ottvnc1``."""
+import re
+
+
+def split_hostlist(hostlist):
+    """Split hostlist on commas that are not inside of brackets.
+
+    Parameters
+    ----------
+    hostlist : str
+        Hostlist expression.
+
+    Returns
+    -------
+    list
+        Hostlist expressions of single host or host range.
+    """
+    parts = []
+    depth = 0
+    current = ""
+    for char in hostlist.replace(" ", ""):
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced brackets in {hostlist}")
+        elif char == "," and depth == 0:
+            if current:
+                parts.append(current)
+            current = ""
+            continue
+        current += char
+
+    if depth != 0:
+        raise ValueError(f"Unbalanced brackets in {hostlist}")
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _expand_range(range_str):
+    """Expand content of brackets, eg ``001-003,010``, keeping zero padding."""
+    values = []
+    for item in range_str.split(","):
+        if not re.fullmatch(r"\d+(-\d+)?", item):
+            raise ValueError(f"Wrong range [{range_str}]")
+
+        start, _, end = item.partition("-")
+        end = end or start
+        if int(end) < int(start):
+            raise ValueError(f"Wrong range [{range_str}]")
+
+        width = len(start)
+        values += [str(num).zfill(width) for num in range(int(start), int(end) + 1)]
+    return values
+
+
+def expand(hostlist):
+    """Expand hostlist expression to the list of host names.
+
+    Parameters
+    ----------
+    hostlist : str
+        Hostlist expression, eg ``ott[001-003],vnc1``. Multiple ranges in one name are supported.
+
+    Returns
+    -------
+    list
+        Host names in the order of the expression.
+
+    Raises
+    ------
+    ValueError
+        If expression is malformed.
+    """
+    hosts = []
+    for part in split_hostlist(hostlist):
+        names = [""]
+        for prefix, range_str in re.findall(r"([^\[\]]*)(?:\[([^\[\]]*)\])?", part):
+            suffixes = _expand_range(range_str) if range_str else [""]
+            names = [name + prefix + suffix for name in names for suffix in suffixes]
+        hosts += names
+    return hosts
+
+
+def compress(hosts):
+    """Compress host names to hostlist expression, inverse of :func:`expand`.
+
+    Parameters
+    ----------
+    hosts : list
+        Host names, duplicates are dropped.
+
+    Returns
+    -------
+    str
+        Hostlist expression, eg ``ott[001-003,010],vnc1``. Hosts with the same prefix and width of the number are
+        grouped in the order of the first appearance.
+    """
+    groups = {}
+    for host in hosts:
+        match = re.fullmatch(r"(.*?)(\d+)", host)
+        if match:
+            prefix, number = match.groups()
+            groups.setdefault((prefix, len(number)), set()).add(int(number))
+        else:
+            groups.setdefault((host, None), set())
+
+    parts = []
+    for (prefix, width), numbers in groups.items():
+        if width is None:
+            parts.append(prefix)
+            continue
+
+        ranges = []
+        for number in sorted(numbers):
+            if ranges and number == ranges[-1][1] + 1:
+                ranges[-1][1] = number
+            else:
+                ranges.append([number, number])
+
+        if len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+            parts.append(f"{prefix}{str(ranges[0][0]).zfill(width)}")
+            continue
+
+        range_strs = [
+            str(start).zfill(width) if start == end else f"{str(start).zfill(width)}-{str(end).zfill(width)}"
+            for start, end in ranges
+        ]
+        parts.append(f"{prefix}[{','.join(range_strs)}]")
+
+    return ",".join(parts)
@@ -0,0 +1,119 @@
+"""HPC profiles of the queues: AEDT batch options and environment tuned by cluster administrator.
+
+Profiles are defined in ``hpc_profiles`` of cluster configuration and assigned to the queue with ``hpc_profile`` key::
+
+    "hpc_profiles": {
+        "infiniband": {
+            "batch_options": {"HFSS/MPIVendor": "Intel", "tempdirectory": "/tmp"},
+            "environment_vars": {"I_MPI_FABRICS": "shm:ofi"}
+        }
+    },
+    "queue_config_dict": {
+        "ottc01": {"cores": 28, "ram": 976, "hpc_profile": "infiniband"}
+    }
+
+"""
+import os
+import time
+
+from core.submit import build_env
+
+
+def queue_profile(cluster_config, queue):
+    """Get HPC profile assigned to the queue.
+
+    Parameters
+    ----------
+    cluster_config : dict
+        Cluster configuration.
+    queue : str
+        Partition name.
+
+    Returns
+    -------
+    dict
+        Profile with optional ``batch_options`` and ``environment_vars``, empty if queue has no profile.
+    """
+    profile_name = cluster_config["queue_config_dict"][queue].get("hpc_profile")
+    if not profile_name:
+        return {}
+
+    return cluster_config.get("hpc_profiles", {})[profile_name]
+
+
+def render_batch_options(options):
+    """Render AEDT batch options file.
+
+    Parameters
+    ----------
+    options : dict
+        Registry keys and values, eg ``{"HFSS/MPIVendor": "Intel", "HFSS/NumCoresPerDistributedTask": 8}``.
+
+    Returns
+    -------
+    str
+        Content of the file for ``-batchoptions`` argument.
+    """
+    lines = ["$begin 'Config'"]
+    for key, value in options.items():
+        if isinstance(value, bool):
+            value = str(value).lower()
+        elif not isinstance(value, (int, float)):
+            value = "'{}'".format(str(value).replace("'", "\\'"))
+        lines.append(f"'{key}'={value}")
+    lines.append("$end 'Config'")
+    return "\n".join(lines) + "\n"
+
+
+def write_batch_options(options, folder, name):
+    """Write batch options file for a job.
+
+    Parameters
+    ----------
+    options : dict
+        Registry keys and values, see :func:`render_batch_options`.
+    folder : str
+        Directory to write file to.
+    name : str
+        Prefix of the file name.
+
+    Returns
+    -------
+    str
+        Path to the file.
+    """
+    os.makedirs(folder, exist_ok=True)
+    options_file = os.path.join(folder, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+    with open(options_file, "w") as file:
+        file.write(render_batch_options(options))
+    return options_file
+
+
+def apply_profile(cluster_config, queue, env, folder):
+    """Add HPC profile of the queue to the job.
+
+    Parameters
+    ----------
+    cluster_config : dict
+        Cluster configuration.
+    queue : str
+        Partition name.
+    env : str
+        Comma separated environment variables, see :func:`core.submit.build_env`.
+    folder : str
+        Directory to write batch options file to.
+
+    Returns
+    -------
+    tuple
+        Environment variables with variables of the profile and path to batch options file, empty string if the
+        profile has no batch options.
+    """
+    profile = queue_profile(cluster_config, queue)
+    env = build_env(env, profile.get("environment_vars"))
+
+    options_file = ""
+    if profile.get("batch_options"):
+        options_file = write_batch_options(profile["batch_options"], folder, queue)
+
+    return env, options_file
@@ -0,0 +1,305 @@
+"""History of the jobs submitted by the launcher in ``~/.aedt/jobs.db`` SQLite database.
+
+Every submission is recorded with its command, queue, size, AEDT version and project. Final state, start and end
+time are filled from ``sacct`` once the job leaves the queue. Indexes keep "recent jobs" and per-version pages fast
+however long the history is, and open jobs are found through a partial index without scanning finished ones.
+"""
+import sqlite3
+import subprocess
+import threading
+import time
+
+from core.runner import get_runner
+from core.waittime import parse_sacct_time
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    command TEXT NOT NULL,
+    queue TEXT NOT NULL,
+    nodes INTEGER NOT NULL,
+    cores INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    project TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    ended REAL,
+    state TEXT,
+    exit_code TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_submitted ON jobs (submitted);
+CREATE INDEX IF NOT EXISTS jobs_version ON jobs (version, submitted);
+CREATE INDEX IF NOT EXISTS jobs_open ON jobs (submitted) WHERE state IS NULL;
+"""
+
+COLUMNS = [
+    "job_id",
+    "description",
+    "command",
+    "queue",
+    "nodes",
+    "cores",
+    "version",
+    "project",
+    "submitted",
+    "started",
+    "ended",
+    "state",
+    "exit_code",
+]
+
+ACTIVE_STATES = {"PENDING", "RUNNING", "REQUEUED", "RESIZING", "SUSPENDED", "COMPLETING"}
+SACCT_BATCH = 200  # job IDs per sacct call
+OPEN_TTL = 30 * 86400  # mark jobs that accounting never reported as unknown
+
+
+def array_job_id(job_id):
+    """Get ID of the job array of the task, eg ``123`` for ``123_4`` or ``123_[5-9]``. Other IDs are returned as is."""
+    return job_id.split("_")[0]
+
+
+class JobDatabase:
+    """Submissions of the launcher and their final states.
+
+    Connection is shared by UI and subthread and guarded by a lock. Database errors are printed and the launcher
+    continues without history: submissions are not recorded and queries return nothing.
+
+    Parameters
+    ----------
+    db_file : str
+        Path to the SQLite database, created on first use.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._connection = None
+        try:
+            connection = sqlite3.connect(db_file, timeout=10, check_same_thread=False)
+            # default rollback journal, WAL needs shared memory of one host and ~/.aedt is on the shared file system
+            with connection:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        except sqlite3.Error as exc:
+            print(f"Cannot open job history {db_file}: {exc}")
+            return
+        self._connection = connection
+
+    @property
+    def available(self):
+        """``True`` if the database was opened."""
+        return self._connection is not None
+
+    def _query(self, query, params=()):
+        """Get rows of the query, empty if the database is not available or the query failed."""
+        if self._connection is None:
+            return []
+        with self._lock:
+            try:
+                return self._connection.execute(query, params).fetchall()
+            except sqlite3.Error as exc:
+                print(f"Cannot read job history: {exc}")
+                return []
+
+    def close(self):
+        """Close the database."""
+        if self._connection is None:
+            return
+        with self._lock:
+            self._connection.close()
+
+    def record(self, job_id, description, command, queue, cores, nodes=1, version="", project=""):
+        """Record new submission.
+
+        Parameters
+        ----------
+        job_id : str
+            Slurm job ID.
+        description : str
+            Kind of the job, eg ``Interactive session``.
+        command : list or str
+            ``sbatch`` command or session command.
+        queue : str
+            Partition of the job.
+        cores : int
+            Total number of cores.
+        nodes : int, optional
+            Number of nodes.
+        version : str, optional
+            AEDT version.
+        project : str, optional
+            Project file or project directory.
+        """
+        if self._connection is None:
+            return
+        if not isinstance(command, str):
+            command = " ".join(command)
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO jobs (job_id, description, command, queue, nodes, cores, version, "
+                    "project, submitted) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, description, command, queue, nodes, cores, version, project, time.time()),
+                )
+        except sqlite3.Error as exc:
+            # job is already submitted, it must be followed even if it is missing in the history
+            print(f"Cannot record job {job_id} in job history: {exc}")
+
+    def recorder(self, submit, nodes=1, version="", project=""):
+        """Wrap submission function to record every submitted job.
+
+        Parameters
+        ----------
+        submit : callable
+            Function with arguments of :meth:`core.limits.LimitGate.submit` that returns job ID.
+        nodes : int, optional
+            Number of nodes of the jobs.
+        version : str, optional
+            AEDT version of the jobs.
+        project : str, optional
+            Project of the jobs. Batch jobs have the project in the description.
+
+        Returns
+        -------
+        callable
+            Function with the same arguments.
+        """
+
+        def record_submit(command, partition, cores, description, output="", tasks=1):
+            pid = submit(command, partition, cores, description, output, tasks)
+            self.record(pid, description, command, partition, cores, nodes, version, project)
+            return pid
+
+        return record_submit
+
+    def open_jobs(self):
+        """Get IDs of the jobs without final state."""
+        return [row[0] for row in self._query("SELECT job_id FROM jobs WHERE state IS NULL")]
+
+    def refresh(self, active_ids):
+        """Fill final state of the jobs that left the queue from ``sacct``.
+
+        Parameters
+        ----------
+        active_ids : iterable
+            IDs of the jobs of the user in the queue.
+
+        Returns
+        -------
+        int
+            Number of jobs that got final state.
+        """
+        active_ids = {array_job_id(job_id) for job_id in active_ids}
+        finished = [job_id for job_id in self.open_jobs() if job_id not in active_ids]
+        runner = get_runner()
+        updated = 0
+        while finished:
+            chunk, finished = finished[:SACCT_BATCH], finished[SACCT_BATCH:]
+            sacct_output = runner.check_output(
+                [
+                    "sacct",
+                    "--noheader",
+                    "--parsable2",
+                    "--allocations",
+                    "--jobs",
+                    ",".join(chunk),
+                    "--format",
+                    "JobID,State,Start,End,ExitCode",
+                ],
+                stderr=subprocess.DEVNULL,
+            )
+            updated += self.update_states(sacct_output, chunk)
+        return updated
+
+    def update_states(self, sacct_output, job_ids):
+        """Store final states from ``sacct`` output, see :meth:`refresh`.
+
+        Tasks of a job array (``123_4``) are combined into the job: it is finished when all tasks are, gets the earliest
+        start, the latest end and the state and exit code of the first task that did not complete. Jobs of ``job_ids``
+        that are not reported for :data:`OPEN_TTL` get ``UNKNOWN`` state.
+
+        Returns
+        -------
+        int
+            Number of jobs that got final state.
+        """
+        tasks = {}
+        for line in sacct_output.splitlines():
+            fields = line.strip().split("|")
+            if len(fields) != 5 or "." in fields[0]:
+                continue
+            job_id, state, start, end, exit_code = fields
+            state = state.split(" ")[0]  # CANCELLED by <uid>
+            tasks.setdefault(array_job_id(job_id), []).append(
+                (parse_sacct_time(start), parse_sacct_time(end), state, exit_code)
+            )
+
+        rows = []
+        for job_id, job_tasks in tasks.items():
+            if any(state in ACTIVE_STATES for _start, _end, state, _exit_code in job_tasks):
+                continue
+            starts = [start for start, _end, _state, _exit_code in job_tasks if start is not None]
+            ends = [end for _start, end, _state, _exit_code in job_tasks if end is not None]
+            failed = [task for task in job_tasks if task[2] != "COMPLETED"]
+            _start, _end, state, exit_code = (failed or job_tasks)[0]
+            rows.append((min(starts, default=None), max(ends, default=None), state, exit_code, job_id))
+
+        reported = set(tasks)
+        stale_before = time.time() - OPEN_TTL
+        if self._connection is None:
+            return 0
+        try:
+            with self._lock, self._connection:
+                updated = self._connection.executemany(
+                    "UPDATE jobs SET started = ?, ended = ?, state = ?, exit_code = ? "
+                    "WHERE job_id = ? AND state IS NULL",
+                    rows,
+                ).rowcount
+                updated += self._connection.executemany(
+                    "UPDATE jobs SET state = 'UNKNOWN' WHERE job_id = ? AND state IS NULL AND submitted < ?",
+                    [(job_id, stale_before) for job_id in job_ids if job_id not in reported],
+                ).rowcount
+        except sqlite3.Error as exc:
+            print(f"Cannot update job history: {exc}")
+            return 0
+        return updated
+
+    def recent(self, limit=50, offset=0, version=None):
+        """Get page of jobs, newest first.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Number of jobs on the page.
+        offset : int, optional
+            Number of newer jobs to skip.
+        version : str, optional
+            Return only jobs of this AEDT version.
+
+        Returns
+        -------
+        list
+            Dictionaries with :data:`COLUMNS`.
+        """
+        query = f"SELECT {', '.join(COLUMNS)} FROM jobs"
+        params = []
+        if version:
+            query += " WHERE version = ?"
+            params.append(version)
+        query += " ORDER BY submitted DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        return [dict(zip(COLUMNS, row)) for row in self._query(query, params)]
+
+    def count(self, version=None):
+        """Get number of recorded jobs, optionally of one AEDT version."""
+        if version:
+            rows = self._query("SELECT COUNT(*) FROM jobs WHERE version = ?", (version,))
+        else:
+            rows = self._query("SELECT COUNT(*) FROM jobs")
+        return rows[0][0] if rows else 0
+
+    def versions(self):
+        """Get AEDT versions that have recorded jobs."""
+        return [row[0] for row in self._query("SELECT DISTINCT version FROM jobs WHERE version != ''")]
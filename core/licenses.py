@@ -0,0 +1,202 @@
+"""Availability of AEDT licenses from the license server, checked before nodes are allocated.
+
+Licenses needed by a job are configured per feature in ``licenses`` of cluster configuration::
+
+    "licenses": {
+        "lmutil": "/software/licensingclient/linx64/lmutil",
+        "server": "1055@licserver",
+        "ttl": 60,
+        "action": "warn",
+        "features": {
+            "electronics_desktop": {"per_job": 1},
+            "anshpc": {"per_core": 1, "included_cores": 4}
+        }
+    }
+
+Feature needs ``per_job + per_core * (cores - included_cores)`` licenses. With ``"action": "warn"`` user is warned
+before submission, with ``"action": "hold"`` submission is held by the launcher until licenses are free, see
+:mod:`core.limits`.
+"""
+import re
+import subprocess
+import threading
+import time
+
+from core.cache import read_json
+from core.cache import write_json
+from core.runner import get_runner
+
+DEFAULT_TTL = 60
+ACTIONS = ["warn", "hold"]
+
+LMSTAT_PATTERN = re.compile(
+    r"Users of ([^:\s]+):\s+\(Total of (\d+) licenses? issued;\s+Total of (\d+) licenses? in use\)"
+)
+
+
+def lmstat_command(settings):
+    """Get ``lmutil lmstat`` command for all features of the license server.
+
+    Parameters
+    ----------
+    settings : dict
+        ``licenses`` of cluster configuration.
+
+    Returns
+    -------
+    list
+        Command.
+    """
+    command = [settings.get("lmutil", "lmutil"), "lmstat", "-a"]
+    if settings.get("server"):
+        command += ["-c", settings["server"]]
+    return command
+
+
+def parse_lmstat(lmstat_output):
+    """Parse output of ``lmutil lmstat -a``.
+
+    Parameters
+    ----------
+    lmstat_output : str
+        Output of ``lmstat``. Features are taken from ``Users of <feature>: (Total of N licenses issued; Total of M
+        licenses in use)`` lines, features with errors (eg vendor daemon is down) are skipped.
+
+    Returns
+    -------
+    dict
+        Number of issued and used licenses keyed by feature.
+    """
+    features = {}
+    for feature, issued, in_use in LMSTAT_PATTERN.findall(lmstat_output):
+        features[feature] = {"issued": int(issued), "in_use": int(in_use)}
+    return features
+
+
+def required_licenses(settings, cores):
+    """Get number of licenses needed by the job.
+
+    Parameters
+    ----------
+    settings : dict
+        ``licenses`` of cluster configuration.
+    cores : int
+        Total number of cores of the job.
+
+    Returns
+    -------
+    dict
+        Number of licenses keyed by feature, features that are not needed are skipped.
+    """
+    required = {}
+    for feature, rule in settings.get("features", {}).items():
+        count = rule.get("per_job", 0) + rule.get("per_core", 0) * max(0, cores - rule.get("included_cores", 0))
+        if count > 0:
+            required[feature] = count
+    return required
+
+
+class LicenseProbe:
+    """Cached availability of licenses of the license server.
+
+    Availability is refreshed with ``lmstat`` when the cache is older than ``ttl`` seconds. Cache is shared by UI and
+    command line interface.
+
+    Parameters
+    ----------
+    settings : dict
+        ``licenses`` of cluster configuration.
+    cache_file : str
+        Path to the JSON file with cached availability.
+    """
+
+    def __init__(self, settings, cache_file):
+        self.settings = settings
+        self.cache_file = cache_file
+        self.ttl = settings.get("ttl", DEFAULT_TTL)
+        self.action = settings.get("action", "warn")
+        self.features = {}
+        self.updated = 0
+        self.reserved = {}  # licenses of jobs admitted since the last refresh, not seen by the license server yet
+        self._lock = threading.Lock()
+
+        cached = read_json(self.cache_file, default={})
+        if isinstance(cached, dict):
+            self.features = cached.get("features", {})
+            self.updated = cached.get("updated", 0)
+
+    def is_outdated(self):
+        """Check if availability should be refreshed."""
+        return time.time() - self.updated > self.ttl
+
+    def refresh(self):
+        """Update availability from ``lmstat``.
+
+        Returns
+        -------
+        dict
+            Number of issued and used licenses keyed by feature, see :func:`parse_lmstat`.
+        """
+        features = parse_lmstat(get_runner().check_output(lmstat_command(self.settings)))
+        with self._lock:
+            self.features = features
+            self.reserved = {}
+            self.updated = time.time()
+            write_json(self.cache_file, {"updated": self.updated, "features": self.features})
+        return features
+
+    def shortage(self, cores, jobs=1, refresh=True):
+        """Check if there are enough free licenses for the jobs.
+
+        Parameters
+        ----------
+        cores : int
+            Total number of cores of one job.
+        jobs : int, optional
+            Number of identical jobs, eg projects of batch submission.
+        refresh : bool, optional
+            Refresh outdated availability before the check. If ``lmstat`` fails, cached availability is used.
+
+        Returns
+        -------
+        str
+            Features without enough free licenses, empty if job could start. Features unknown to the license server
+            are not reported, so that broken probe never blocks submission.
+        """
+        if refresh and self.is_outdated():
+            try:
+                self.refresh()
+            except (OSError, subprocess.CalledProcessError) as exc:
+                print(f"Cannot get licenses from lmstat: {exc}")
+                self.updated = time.time()  # do not wait for unavailable license server on every check
+
+        missing = []
+        with self._lock:
+            for feature, count in required_licenses(self.settings, cores).items():
+                if feature not in self.features:
+                    continue
+                count *= jobs
+                free = self.features[feature]["issued"] - self.features[feature]["in_use"]
+                free -= self.reserved.get(feature, 0)
+                if free < count:
+                    missing.append(f"{feature} needs {count}, {max(free, 0)} free")
+
+        return f"not enough licenses: {', '.join(missing)}" if missing else ""
+
+    def check(self, _partition, cores, tasks=1):
+        """Check for :class:`core.limits.LimitGate` and :meth:`core.limits.HeldQueue.release`.
+
+        Licenses are not bound to partitions, every task of a job array checks out its own licenses. Array larger
+        than the issued licenses allow runs in waves, only the first wave is checked. Licenses of admitted job are
+        reserved until the next refresh, so that jobs submitted together do not count the same free licenses.
+        """
+        with self._lock:
+            for feature, count in required_licenses(self.settings, cores).items():
+                if feature in self.features and count:
+                    tasks = max(1, min(tasks, self.features[feature]["issued"] // count))
+        reason = self.shortage(cores, tasks)
+        if not reason:
+            with self._lock:
+                for feature, count in required_licenses(self.settings, cores).items():
+                    self.reserved[feature] = self.reserved.get(feature, 0) + count * tasks
+        return reason
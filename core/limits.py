@@ -0,0 +1,498 @@
+"""QOS and association limits of the user and local queue of submissions that would exceed them.
+
+Limits are cached from ``sacctmgr`` and compared with the jobs of the user from ``squeue`` before submission. Jobs
+that would be rejected by the scheduler or left pending with ``AssocGrpCpuLimit``-like reasons are held in
+``~/.aedt/held_jobs.json`` instead and submitted in the order of submission as soon as running jobs free the capacity.
+Additional checks, eg free licenses from :class:`core.licenses.LicenseProbe`, could hold submissions the same way.
+"""
+import getpass
+import threading
+import time
+
+from core.cache import read_json
+from core.cache import write_json
+from core.runner import get_runner
+from core.submit import SubmissionError
+from core.submit import submit_job
+
+ASSOC_FIELDS = [
+    "Partition",
+    "QOS",
+    "DefaultQOS",
+    "GrpJobs",
+    "GrpSubmitJobs",
+    "GrpTRES",
+    "MaxJobs",
+    "MaxSubmitJobs",
+    "MaxTRES",
+]
+QOS_FIELDS = ["Name", "MaxJobsPerUser", "MaxSubmitJobsPerUser", "MaxTRESPerUser", "MaxTRES"]
+
+# limits change rarely, refresh once per hour
+REFRESH_PERIOD = 3600
+
+# prefix of the IDs of submissions held by the launcher, to distinguish them from Slurm job IDs
+HELD_PREFIX = "L"
+HELD_STATE = "LH"
+
+
+class SubmissionHeld(SubmissionError):
+    """Raised when submission exceeds limits of the user and is held by the launcher. Message contains the limit."""
+
+    def __init__(self, message, entry_id):
+        super().__init__(message)
+        self.entry_id = entry_id
+
+
+def sacctmgr_commands(user):
+    """Get ``sacctmgr`` commands for associations of the user and for all QOS."""
+    base = ["sacctmgr", "--noheader", "--parsable2", "show"]
+    return (
+        base + ["assoc", "where", f"user={user}", f"format={','.join(ASSOC_FIELDS)}"],
+        base + ["qos", f"format={','.join(QOS_FIELDS)}"],
+    )
+
+
+def _count(value):
+    """Convert ``sacctmgr`` limit to integer, ``None`` if it is not set."""
+    return int(value) if value.isdigit() else None
+
+
+def _cpus(tres):
+    """Get CPU count from ``sacctmgr`` TRES value, eg ``cpu=64,mem=500G``. ``None`` if it is not set."""
+    for item in tres.split(","):
+        key, _, value = item.partition("=")
+        if key == "cpu":
+            return _count(value)
+    return None
+
+
+def _lowest(*values):
+    """Get lowest limit ignoring limits that are not set."""
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def parse_limits(assoc_output, qos_output):
+    """Parse output of :func:`sacctmgr_commands`.
+
+    Parameters
+    ----------
+    assoc_output : str
+        Associations of the user, ``|`` separated :data:`ASSOC_FIELDS`.
+    qos_output : str
+        All QOS, ``|`` separated :data:`QOS_FIELDS`.
+
+    Returns
+    -------
+    list
+        Limits of associations and of their default QOS: name, partition (empty for all partitions), maximum number
+        of jobs (``max_jobs``), of submitted jobs (``max_submit``), of cores of all jobs (``max_cpus``) and of cores
+        of one job (``max_job_cpus``). Values that are not set are ``None``.
+    """
+    qos_limits = {}
+    for line in qos_output.splitlines():
+        fields = line.split("|")
+        if len(fields) != len(QOS_FIELDS):
+            continue
+        name, max_jobs, max_submit, max_tres, max_job_tres = fields
+        qos_limits[name] = {
+            "name": f"QOS {name}",
+            "max_jobs": _count(max_jobs),
+            "max_submit": _count(max_submit),
+            "max_cpus": _cpus(max_tres),
+            "max_job_cpus": _cpus(max_job_tres),
+        }
+
+    limits = []
+    for line in assoc_output.splitlines():
+        fields = line.split("|")
+        if len(fields) != len(ASSOC_FIELDS):
+            continue
+        partition, qos_list, default_qos, grp_jobs, grp_submit, grp_tres, max_jobs, max_submit, max_tres = fields
+        limits.append(
+            {
+                "name": f"association on {partition}" if partition else "association",
+                "partition": partition,
+                "max_jobs": _lowest(_count(grp_jobs), _count(max_jobs)),
+                "max_submit": _lowest(_count(grp_submit), _count(max_submit)),
+                "max_cpus": _cpus(grp_tres),
+                "max_job_cpus": _cpus(max_tres),
+            }
+        )
+
+        qos_names = [name for name in qos_list.split(",") if name]
+        qos = default_qos or (qos_names[0] if len(qos_names) == 1 else "")
+        if qos in qos_limits:
+            limits.append(dict(qos_limits[qos], partition=partition))
+
+    # drop associations and QOS without limits
+    keys = ("max_jobs", "max_submit", "max_cpus", "max_job_cpus")
+    return [limit for limit in limits if any(limit[key] is not None for key in keys)]
+
+
+def check_limits(limits, jobs, partition, cores, tasks=1):
+    """Check if a new job fits into the limits of the user.
+
+    Parameters
+    ----------
+    limits : list
+        Limits from :func:`parse_limits`.
+    jobs : list
+        Jobs of the user from :func:`core.submit.list_jobs`.
+    partition : str
+        Partition of the new job.
+    cores : int
+        Total number of cores of the new job, of one task for a job array.
+    tasks : int, optional
+        Number of tasks of a job array. Slurm counts every task as a job, tasks that do not fit into the limits of
+        running jobs and cores wait for the previous ones.
+
+    Returns
+    -------
+    str
+        Limit that would be exceeded now, empty if job fits.
+
+    Raises
+    ------
+    ValueError
+        If the job exceeds a limit for a single job and would never start, or the array has more tasks than the
+        scheduler accepts.
+    """
+    for limit in limits:
+        if limit["partition"] and limit["partition"] != partition:
+            continue
+
+        if limit["max_job_cpus"] is not None and cores > limit["max_job_cpus"]:
+            raise ValueError(f"{limit['name']} allows up to {limit['max_job_cpus']} cores per job")
+
+        if limit["max_submit"] is not None and tasks > limit["max_submit"]:
+            raise ValueError(
+                f"{limit['name']} allows {limit['max_submit']} submitted jobs, the array has {tasks} tasks"
+            )
+
+        # tasks of an array that does not fit into running limits as a whole run in waves, the first one must fit
+        scoped = [job for job in jobs if not limit["partition"] or job.get("partition") == limit["partition"]]
+        for key, text, needed in (
+            ("max_submit", "submitted jobs", tasks),
+            ("max_jobs", "jobs at a time", min(tasks, limit["max_jobs"] or tasks)),
+        ):
+            if limit[key] is not None and len(scoped) + needed > limit[key]:
+                return f"{limit['name']} allows {limit[key]} {text}, you have {len(scoped)}" + _array_note(tasks)
+
+        used = sum(int(job["proc"]) for job in scoped if job["proc"].isdigit())
+        if limit["max_cpus"] is not None:
+            wave = max(1, min(tasks, limit["max_cpus"] // max(cores, 1)))
+            if used + cores * wave > limit["max_cpus"]:
+                return (
+                    f"{limit['name']} allows {limit['max_cpus']} cores at a time, your jobs use {used}"
+                    + _array_note(tasks)
+                )
+
+    return ""
+
+
+def _array_note(tasks):
+    """Get note about the size of the job array for the reason to hold it."""
+    return f", the array has {tasks} tasks" if tasks > 1 else ""
+
+
+def _check_reason(checks, partition, cores, tasks=1):
+    """Get reason to hold the job from the first additional check that fails, empty if job could be submitted."""
+    for check in checks:
+        reason = check(partition, cores, tasks)
+        if reason:
+            return reason
+    return ""
+
+
+def _submitted(pid, partition, cores, tasks):
+    """Get entries of the submitted job for the job list, one per task of a job array as Slurm counts them."""
+    return [{"pid": pid, "partition": partition, "state": "PD", "proc": str(cores)} for _ in range(tasks)]
+
+
+class LimitCache:
+    """Cached limits of the user.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the JSON file with cached limits.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.limits = []
+        self.updated = 0
+
+        cached = read_json(self.cache_file, default={})
+        if isinstance(cached, dict):
+            self.limits = cached.get("limits", [])
+            self.updated = cached.get("updated", 0)
+
+    def is_outdated(self):
+        """Check if limits should be refreshed."""
+        return time.time() - self.updated > REFRESH_PERIOD
+
+    def refresh(self, user=None):
+        """Update cache from ``sacctmgr``.
+
+        Parameters
+        ----------
+        user : str, optional
+            Name of the user, by default current user.
+
+        Returns
+        -------
+        bool
+            ``True`` if limits changed.
+        """
+        assoc_command, qos_command = sacctmgr_commands(user or getpass.getuser())
+        runner = get_runner()
+        limits = parse_limits(runner.check_output(assoc_command), runner.check_output(qos_command))
+
+        changed = limits != self.limits
+        self.limits = limits
+        self.updated = time.time()
+        write_json(self.cache_file, {"updated": self.updated, "limits": self.limits})
+        return changed
+
+
+class HeldQueue:
+    """Submissions held by the launcher until they fit into the limits of the user.
+
+    Queue is shared by UI and command line interface through the queue file.
+
+    Parameters
+    ----------
+    queue_file : str
+        Path to the JSON file with held submissions.
+    """
+
+    def __init__(self, queue_file):
+        self.queue_file = queue_file
+        self._lock = threading.Lock()
+
+    def entries(self):
+        """Get held submissions in the order of submission.
+
+        Returns
+        -------
+        list
+            Dictionaries with ID (``L<number>``), ``sbatch`` command, partition, cores, description, reason, number of
+            tasks of a job array and time when the submission was held.
+        """
+        return read_json(self.queue_file, {}).get("entries", [])
+
+    def hold(self, command, partition, cores, description, reason, output="", tasks=1):
+        """Add submission to the end of the queue.
+
+        Parameters
+        ----------
+        command : list
+            ``sbatch`` command.
+        partition : str
+            Partition of the job.
+        cores : int
+            Total number of cores of the job.
+        description : str
+            Text shown to the user when the job is submitted, eg ``Interactive session``.
+        reason : str
+            Limit that is exceeded, see :func:`check_limits`.
+        output : str, optional
+            Output file of the job with ``%j`` instead of job ID, to follow it after submission.
+        tasks : int, optional
+            Number of tasks of a job array, ``cores`` are cores of one task.
+
+        Returns
+        -------
+        str
+            ID of the held submission.
+        """
+        with self._lock:
+            data = read_json(self.queue_file, {})
+            number = data.get("next", 1)
+            entry_id = f"{HELD_PREFIX}{number}"
+            data.setdefault("entries", []).append(
+                {
+                    "id": entry_id,
+                    "command": command,
+                    "partition": partition,
+                    "cores": cores,
+                    "description": description,
+                    "reason": reason,
+                    "output": output,
+                    "tasks": tasks,
+                    "held": time.time(),
+                }
+            )
+            data["next"] = number + 1
+            write_json(self.queue_file, data)
+        return entry_id
+
+    def drop(self, entry_ids):
+        """Remove submissions from the queue.
+
+        Returns
+        -------
+        list
+            IDs of removed submissions.
+        """
+        with self._lock:
+            data = read_json(self.queue_file, {})
+            entries = data.get("entries", [])
+            dropped = [entry["id"] for entry in entries if entry["id"] in entry_ids]
+            if dropped:
+                data["entries"] = [entry for entry in entries if entry["id"] not in dropped]
+                write_json(self.queue_file, data)
+        return dropped
+
+    def release(self, limits, jobs, checks=()):
+        """Submit held jobs that fit into the limits now.
+
+        Jobs are submitted in the order of submission, release stops at the first job that still does not fit, so
+        that smaller jobs do not overtake earlier larger ones.
+
+        Parameters
+        ----------
+        limits : list
+            Limits from :func:`parse_limits`.
+        jobs : list
+            Jobs of the user from :func:`core.submit.list_jobs`.
+        checks : iterable, optional
+            Additional checks, callables that get partition, cores and number of tasks and return reason to hold
+            the job.
+
+        Returns
+        -------
+        list
+            Tuples of entry, job ID (``None`` if scheduler rejected the job) and message.
+        """
+        jobs = list(jobs)
+        results = []
+        for entry in self.entries():
+            tasks = entry.get("tasks", 1)
+            try:
+                reason = check_limits(limits, jobs, entry["partition"], entry["cores"], tasks)
+            except ValueError as exc:
+                self.drop([entry["id"]])
+                results.append((entry, None, str(exc)))
+                continue
+
+            reason = reason or _check_reason(checks, entry["partition"], entry["cores"], tasks)
+            if reason:
+                self.update_reason(entry["id"], reason)
+                break
+
+            if not self.drop([entry["id"]]):
+                continue  # released by another instance of the launcher
+
+            try:
+                pid = submit_job(entry["command"])
+            except SubmissionError as exc:
+                results.append((entry, None, str(exc)))
+            else:
+                results.append((entry, pid, f"{entry['description']} held as {entry['id']} submitted"))
+                jobs += _submitted(pid, entry["partition"], entry["cores"], tasks)
+
+        return results
+
+    def update_reason(self, entry_id, reason):
+        """Store limit that still holds the submission."""
+        with self._lock:
+            data = read_json(self.queue_file, {})
+            for entry in data.get("entries", []):
+                if entry["id"] == entry_id and entry["reason"] != reason:
+                    entry["reason"] = reason
+                    write_json(self.queue_file, data)
+                    break
+
+    def as_jobs(self):
+        """Get held submissions in the format of :func:`core.submit.parse_squeue` to show them in the job list."""
+        return [
+            {
+                "pid": entry["id"],
+                "partition": entry["partition"],
+                "state": HELD_STATE,
+                "name": entry["description"][:8],
+                "user": getpass.getuser(),
+                "queue_data": entry["reason"],
+                "proc": str(entry["cores"] * entry.get("tasks", 1)),
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(entry["held"])),
+            }
+            for entry in self.entries()
+        ]
+
+
+class LimitGate:
+    """Submit jobs that fit into the limits of the user and hold the rest in :class:`HeldQueue`.
+
+    Jobs submitted through the gate are counted for the next submissions, so that a batch of jobs is checked as a
+    whole. New submissions are held while earlier ones are waiting, to keep the order.
+
+    Parameters
+    ----------
+    limits : list
+        Limits from :func:`parse_limits`.
+    jobs : list
+        Jobs of the user from :func:`core.submit.list_jobs`.
+    held_queue : HeldQueue
+        Queue of held submissions.
+    checks : iterable, optional
+        Additional checks, callables that get partition, cores and number of tasks and return reason to hold the job.
+    """
+
+    def __init__(self, limits, jobs, held_queue, checks=()):
+        self.limits = limits
+        self.jobs = list(jobs)
+        self.held_queue = held_queue
+        self.checks = list(checks)
+
+    def submit(self, command, partition, cores, description, output="", tasks=1):
+        """Submit job or hold it if it exceeds the limits.
+
+        Parameters
+        ----------
+        command : list
+            ``sbatch`` command.
+        partition : str
+            Partition of the job.
+        cores : int
+            Total number of cores of the job, of one task for a job array.
+        description : str
+            Text shown to the user when held job is submitted.
+        output : str, optional
+            Output file of the job with ``%j`` instead of job ID.
+        tasks : int, optional
+            Number of tasks of a job array.
+
+        Returns
+        -------
+        str
+            Job ID.
+
+        Raises
+        ------
+        SubmissionHeld
+            If job was held.
+        core.submit.SubmissionError
+            If scheduler rejected the job.
+        ValueError
+            If job exceeds a limit for a single job.
+        """
+        reason = check_limits(self.limits, self.jobs, partition, cores, tasks)
+        if not reason and self.held_queue.entries():
+            reason = "earlier submissions are held"
+        reason = reason or _check_reason(self.checks, partition, cores, tasks)
+
+        if reason:
+            entry_id = self.held_queue.hold(command, partition, cores, description, reason, output, tasks)
+            raise SubmissionHeld(
+                f"{description} is held by the launcher as {entry_id}: {reason}. It is submitted automatically as soon "
+                "as it fits",
+                entry_id,
+            )
+
+        pid = submit_job(command)
+        self.jobs += _submitted(pid, partition, cores, tasks)
+        return pid
@@ -0,0 +1,113 @@
+"""AEDT machinelist built at job start from the nodes that Slurm allocated.
+
+Run inside of the job to print the machinelist argument::
+
+    python -m core.machinelist --tasks-per-node 4 --threads-per-task 8
+
+"""
+import argparse
+import os
+import shlex
+import sys
+
+from core.config import LAUNCHER_DIR
+from core.hostlist import expand
+
+
+def distribution(queue_settings):
+    """Get split of the node cores between distributed tasks.
+
+    Parameters
+    ----------
+    queue_settings : dict
+        Settings of the queue from ``queue_config_dict``. Optional ``tasks_per_node`` and ``threads_per_task``
+        keys define the split, by default each core runs one task.
+
+    Returns
+    -------
+    tuple
+        Number of tasks per node and threads per task.
+    """
+    cores = queue_settings["cores"]
+    tasks_per_node = int(queue_settings.get("tasks_per_node", cores))
+    threads_per_task = int(queue_settings.get("threads_per_task", cores // max(tasks_per_node, 1)))
+    if tasks_per_node < 1 or threads_per_task < 1 or tasks_per_node * threads_per_task > cores:
+        raise ValueError(f"Wrong tasks_per_node/threads_per_task split of {cores} cores per node")
+
+    return tasks_per_node, threads_per_task
+
+
+def machinelist(hosts, tasks_per_node, threads_per_task):
+    """Build explicit AEDT machinelist.
+
+    Parameters
+    ----------
+    hosts : list
+        Host names.
+    tasks_per_node : int
+        Number of distributed tasks on each host.
+    threads_per_task : int
+        Number of cores used by each task.
+
+    Returns
+    -------
+    str
+        Value of ``-machinelist`` argument, eg ``list=node1:4:32,node2:4:32``.
+    """
+    cores = tasks_per_node * threads_per_task
+    return "list=" + ",".join(f"{host}:{tasks_per_node}:{cores}" for host in hosts)
+
+
+def machinelist_argument(queue_settings, allocation_rule, total_cores):
+    """Get ``-machinelist`` value to put into the job command.
+
+    Single node jobs use the total number of cores. Multiple node jobs expand ``SLURM_JOB_NODELIST`` at job start
+    with this module, so that each allocated node gets explicit number of tasks and cores.
+
+    Parameters
+    ----------
+    queue_settings : dict
+        Settings of the queue from ``queue_config_dict``.
+    allocation_rule : int
+        ``0`` for cores on a single node, ``1`` for multiple whole nodes.
+    total_cores : int
+        Total number of requested cores.
+
+    Returns
+    -------
+    str
+        Value for the shell command of the job.
+    """
+    if allocation_rule == 0:
+        return f"num={total_cores}"
+
+    tasks_per_node, threads_per_task = distribution(queue_settings)
+    command = [
+        f"PYTHONPATH={shlex.quote(LAUNCHER_DIR)}",
+        shlex.quote(sys.executable),
+        "-m",
+        "core.machinelist",
+        "--tasks-per-node",
+        str(tasks_per_node),
+        "--threads-per-task",
+        str(threads_per_task),
+    ]
+    return f"$({' '.join(command)})"
+
+
+def main(argv=None):
+    """Print machinelist for the nodes of the current job."""
+    parser = argparse.ArgumentParser(description="Print AEDT machinelist for the nodes allocated to the job")
+    parser.add_argument("--tasks-per-node", type=int, required=True)
+    parser.add_argument("--threads-per-task", type=int, default=1)
+    parser.add_argument("--nodelist", default=os.getenv("SLURM_JOB_NODELIST", ""), help="Slurm hostlist")
+    args = parser.parse_args(argv)
+
+    if not args.nodelist:
+        parser.error("SLURM_JOB_NODELIST is not set, specify --nodelist")
+
+    print(machinelist(expand(args.nodelist), args.tasks_per_node, args.threads_per_task))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Scheduler message log of the UI, kept in ``~/.aedt/user_log_<session type>.json``."""
+import json
+import os
+
+
+def new_log():
+    """Get empty message log."""
+    return {"Message List": [], "PID List": [], "GUI Data": []}
+
+
+def read_log(logfile):
+    """Read message log.
+
+    Parameters
+    ----------
+    logfile : str
+        Path to the log file.
+
+    Returns
+    -------
+    dict
+        Messages, IDs of submitted jobs and their log files. Empty log if file does not exist or is corrupted,
+        corrupted file is removed.
+    """
+    try:
+        with open(logfile, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return new_log()
+    except json.decoder.JSONDecodeError:
+        print("Error reading log file")
+        os.remove(logfile)
+        return new_log()
+
+
+def write_log(logfile, log_data):
+    """Write message log, see :func:`read_log`."""
+    with open(logfile, "w") as file:
+        json.dump(log_data, file, indent=4)
+
+
+def wrap_message(message, width, partial_extents):
+    """Wrap message to fit the width of the message column.
+
+    Lines are broken after the last space that fits, words longer than the width are broken anywhere. Each line is
+    measured only once.
+
+    Parameters
+    ----------
+    message : str
+        Message, existing line breaks are kept.
+    width : int
+        Width of the column in pixels.
+    partial_extents : callable
+        Function that returns width of each prefix of a string in pixels, eg ``wx.DC.GetPartialTextExtents``.
+
+    Returns
+    -------
+    str
+        Wrapped message.
+    """
+    lines = []
+    for line in message.split("\n"):
+        extents = partial_extents(line) if line else []
+        start = 0
+        offset = 0  # width of the text before start
+        last_space = -1
+        for idx, char in enumerate(line):
+            if char == " ":
+                last_space = idx
+            if extents[idx] - offset > width and idx > start:
+                end = last_space + 1 if last_space >= start else idx
+                lines.append(line[start:end])
+                start = end
+                offset = extents[end - 1]
+                last_space = -1
+        lines.append(line[start:])
+
+    return "\n".join(lines)
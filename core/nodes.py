@@ -0,0 +1,203 @@
+"""Node inventory of the cluster built from ``sinfo -N`` snapshots."""
+import threading
+import time
+
+from core.cache import read_json
+from core.cache import write_json
+from core.hostlist import compress
+from core.hostlist import expand
+from core.runner import get_runner
+
+# one line per node and partition: name|partition|state|cpus (alloc/idle/other/total)|memory|free memory
+SINFO_NODES = ["sinfo", "--Node", "--noheader", "--format", "%N|%P|%T|%C|%m|%e"]
+
+# states in which node cannot accept new jobs
+UNAVAILABLE_STATES = ("down", "drain", "drained", "draining", "fail", "failing", "maint", "unknown")
+
+
+def parse_sinfo_nodes(sinfo_output):
+    """Parse output of :data:`SINFO_NODES` command.
+
+    Parameters
+    ----------
+    sinfo_output : str
+        Output of the ``sinfo`` command.
+
+    Returns
+    -------
+    dict
+        Node records keyed by node name. Nodes that belong to multiple partitions are merged into one record.
+    """
+    nodes = {}
+    for line in sinfo_output.splitlines():
+        fields = line.strip().split("|")
+        if len(fields) != 6:
+            continue
+
+        name, partition, state, cpus, memory, free_memory = fields
+        partition = partition.rstrip("*")  # default partition is marked with asterisk
+        if name in nodes:
+            if partition not in nodes[name]["partitions"]:
+                nodes[name]["partitions"].append(partition)
+            continue
+
+        try:
+            alloc_cores, idle_cores, other_cores, total_cores = [int(val) for val in cpus.split("/")]
+        except ValueError:
+            alloc_cores = idle_cores = other_cores = total_cores = 0
+
+        nodes[name] = {
+            "name": name,
+            "partitions": [partition],
+            "state": state.rstrip("*~#!%$@^-").lower(),
+            "alloc_cores": alloc_cores,
+            "idle_cores": idle_cores,
+            "other_cores": other_cores,
+            "total_cores": total_cores,
+            "memory": _to_gb(memory),
+            "free_memory": _to_gb(free_memory),
+        }
+
+    return nodes
+
+
+def _to_gb(value_mb):
+    """Convert memory value reported by ``sinfo`` in MB to GB. Unknown values (``N/A``) are converted to 0."""
+    try:
+        return int(value_mb) // 1024
+    except ValueError:
+        return 0
+
+
+def is_available(node):
+    """Check if node is able to accept new jobs.
+
+    Parameters
+    ----------
+    node : dict
+        Node record from :func:`parse_sinfo_nodes`.
+
+    Returns
+    -------
+    bool
+        ``True`` if node is neither down nor drained.
+    """
+    return not node["state"].startswith(UNAVAILABLE_STATES)
+
+
+class NodeInventory:
+    """Cached inventory of cluster nodes.
+
+    Inventory is stored in the application folder, so that the node view could be rendered instantly on start.
+    Each refresh compares the new ``sinfo`` snapshot with the cached one and only replaces records that changed.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the JSON file with cached inventory.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.nodes = {}
+        self.updated = 0
+        self._lock = threading.Lock()
+
+        cached = read_json(self.cache_file, default={})
+        if isinstance(cached, dict):
+            self.nodes = cached.get("nodes", {})
+            self.updated = cached.get("updated", 0)
+
+    def refresh(self, sinfo_output=None):
+        """Update inventory with a new snapshot.
+
+        Parameters
+        ----------
+        sinfo_output : str, optional
+            Output of ``sinfo``. If not provided, ``sinfo`` is called.
+
+        Returns
+        -------
+        set
+            Names of nodes that were added, changed or removed.
+        """
+        if sinfo_output is None:
+            sinfo_output = get_runner().check_output(SINFO_NODES)
+
+        snapshot = parse_sinfo_nodes(sinfo_output)
+        with self._lock:
+            changed = {name for name, node in snapshot.items() if self.nodes.get(name) != node}
+            removed = set(self.nodes) - set(snapshot)
+            for name in changed:
+                self.nodes[name] = snapshot[name]
+            for name in removed:
+                del self.nodes[name]
+
+            self.updated = time.time()
+            if changed or removed:
+                write_json(self.cache_file, {"updated": self.updated, "nodes": self.nodes})
+
+        return changed | removed
+
+    def partition_nodes(self, partition):
+        """Get nodes of the partition.
+
+        Parameters
+        ----------
+        partition : str
+            Name of the partition (queue).
+
+        Returns
+        -------
+        list
+            Node records sorted by node name.
+        """
+        with self._lock:
+            nodes = [node for node in self.nodes.values() if partition in node["partitions"]]
+
+        return sorted(nodes, key=lambda node: node["name"])
+
+
+def check_nodelist(nodelist, partition, inventory, max_nodes=None):
+    """Validate node list of the job against node inventory.
+
+    Parameters
+    ----------
+    nodelist : str
+        Hostlist expression entered by the user, see :func:`core.hostlist.expand`.
+    partition : str
+        Partition of the job.
+    inventory : NodeInventory
+        Node inventory. Only syntax and number of nodes are checked if inventory is empty.
+    max_nodes : int, optional
+        Number of nodes requested by the job.
+
+    Returns
+    -------
+    str
+        Compressed hostlist expression.
+
+    Raises
+    ------
+    ValueError
+        If expression is malformed, has more nodes than requested, or nodes are not in the partition or not available.
+    """
+    hosts = list(dict.fromkeys(expand(nodelist)))
+    if not hosts:
+        raise ValueError("Node list is empty")
+
+    if max_nodes is not None and len(hosts) > max_nodes:
+        raise ValueError(f"Node list has {len(hosts)} nodes, but the job requests {max_nodes}")
+
+    if inventory.nodes:
+        known = {node["name"]: node for node in inventory.partition_nodes(partition)}
+        unknown = [host for host in hosts if host not in known]
+        if unknown:
+            raise ValueError(f"Nodes are not in partition {partition}: {compress(unknown)}")
+
+        unavailable = [host for host in hosts if not is_available(known[host])]
+        if unavailable:
+            states = ", ".join(f"{host} ({known[host]['state']})" for host in unavailable)
+            raise ValueError(f"Nodes cannot accept jobs: {states}")
+
+    return compress(hosts)
@@ -0,0 +1,458 @@
+"""Warm pool of pre-allocated single node sessions, so that interactive launch does not wait in the queue.
+
+Pool job holds cores on one node and runs this module as an agent there. Agent waits for a launch request that the
+launcher writes to the pool folder on the shared file system (``~/.aedt/pool``) and starts the session inside of the
+allocation. If no request comes within the idle timeout, agent exits and the allocation is released::
+
+    python -m core.pool --dir ~/.aedt/pool --idle-timeout 1800
+
+Files of the pool job ``<id>`` in the pool folder:
+
+* ``<id>.ready`` is written by the agent when the allocation is started and contains the node name
+* ``<id>.launch`` is the launch request with session command and environment. It is created atomically and only once,
+  so that exactly one session is bound to the allocation. Empty request releases the allocation
+* ``<id>.out`` is the output of the pool job
+
+Pool is configured per queue in ``session_pool`` of cluster configuration, see :func:`pool_settings`.
+"""
+import argparse
+import json
+import os
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from core.cache import read_json
+from core.cache import write_json
+from core.config import LAUNCHER_DIR
+from core.runner import get_runner
+from core.submit import cancel_jobs
+from core.submit import job_resources
+from core.submit import submit_job
+
+POOL_JOB_NAME = "aedtpool"  # squeue shows first 8 characters of the name
+SESSION_JOB_NAME = "aedt"
+
+DEFAULT_IDLE_TIMEOUT = 1800
+POLL_INTERVAL = 1
+
+# pool jobs submitted recently could be missing in the job list that was fetched before the submission
+SUBMIT_GRACE = 120
+
+
+def pool_settings(cluster_config, queue):
+    """Get settings of the session pool of the queue.
+
+    Pool is configured in cluster configuration, eg
+    ``"session_pool": {"ottc01": {"cores": 8, "max_per_user": 2, "idle_timeout": 1800}}``.
+
+    Parameters
+    ----------
+    cluster_config : dict
+        Cluster configuration.
+    queue : str
+        Partition name.
+
+    Returns
+    -------
+    dict or None
+        Cores of each allocation, maximum number of waiting allocations of a user and idle timeout in seconds.
+        ``None`` if pool is not configured for the queue.
+    """
+    settings = cluster_config.get("session_pool", {}).get(queue)
+    if not settings:
+        return None
+
+    return {
+        "cores": settings["cores"],
+        "max_per_user": settings.get("max_per_user", 1),
+        "idle_timeout": settings.get("idle_timeout", DEFAULT_IDLE_TIMEOUT),
+    }
+
+
+def pool_command(queue, cores, queue_config, pool_dir, idle_timeout, exclude_str=""):
+    """Build ``sbatch`` command of a pool job.
+
+    Parameters
+    ----------
+    queue : str
+        Partition name.
+    cores : int
+        Number of cores on a single node.
+    queue_config : dict
+        Cores and RAM per node for each queue.
+    pool_dir : str
+        Pool folder on the shared file system.
+    idle_timeout : int
+        Seconds after which allocation without session is released.
+    exclude_str : str, optional
+        Nodes to avoid, see :mod:`core.exclusions`.
+
+    Returns
+    -------
+    list
+        Command.
+    """
+    resources, _total_cores = job_resources(queue, 0, cores, queue_config)
+    agent = [
+        f"PYTHONPATH={shlex.quote(LAUNCHER_DIR)}",
+        shlex.quote(sys.executable),
+        "-m",
+        "core.pool",
+        "--dir",
+        shlex.quote(pool_dir),
+        "--idle-timeout",
+        str(idle_timeout),
+    ]
+    command = ["sbatch", "--job-name", POOL_JOB_NAME, "--partition", queue, "--export", "ALL"] + resources
+    if exclude_str:
+        command += ["--exclude", exclude_str]
+    command += ["--output", os.path.join(pool_dir, "%j.out"), "--wrap", " ".join(agent)]
+    return command
+
+
+def parse_env(env):
+    """Convert comma separated ``VARIABLE=VALUE`` pairs of :func:`core.submit.build_env` to dictionary."""
+    variables = {}
+    for var_value in env.split(","):
+        variable, _, value = var_value.partition("=")
+        if variable:
+            variables[variable] = value
+    return variables
+
+
+class SessionPool:
+    """Pool jobs submitted by the launcher, kept in ``pool.json`` of the pool folder.
+
+    Parameters
+    ----------
+    pool_dir : str
+        Pool folder on the shared file system, created if it does not exist.
+    """
+
+    def __init__(self, pool_dir):
+        self.pool_dir = pool_dir
+        self.state_file = os.path.join(pool_dir, "pool.json")
+        self._lock = threading.Lock()
+        os.makedirs(pool_dir, exist_ok=True)
+
+    def path(self, pid, kind):
+        """Get path to the file of the pool job, see module description for the kinds."""
+        return os.path.join(self.pool_dir, f"{pid}.{kind}")
+
+    def allocations(self):
+        """Get waiting pool jobs: queue, cores and submission time keyed by job ID."""
+        return read_json(self.state_file, {})
+
+    def sync(self, jobs, now=None):
+        """Forget pool jobs that left the scheduler and remove their files.
+
+        Parameters
+        ----------
+        jobs : list
+            Jobs of the user from :func:`core.submit.list_jobs`.
+        now : float, optional
+            Current time, by default now.
+
+        Returns
+        -------
+        dict
+            Waiting pool jobs, see :meth:`allocations`.
+        """
+        now = now or time.time()
+        active = {job["pid"] for job in jobs}
+        with self._lock:
+            allocations = self.allocations()
+            kept = {
+                pid: allocation
+                for pid, allocation in allocations.items()
+                if pid in active or now - allocation["submitted"] < SUBMIT_GRACE
+            }
+            if kept != allocations:
+                write_json(self.state_file, kept)
+
+        for name in os.listdir(self.pool_dir):
+            pid, _, kind = name.partition(".")
+            if kind in ("ready", "launch", "out") and pid not in active and pid not in kept:
+                try:
+                    os.remove(os.path.join(self.pool_dir, name))
+                except FileNotFoundError:
+                    pass  # removed by another instance of the launcher
+
+        return kept
+
+    def status(self, jobs):
+        """Get state of waiting pool jobs.
+
+        Parameters
+        ----------
+        jobs : list
+            Jobs of the user from :func:`core.submit.list_jobs`.
+
+        Returns
+        -------
+        list
+            Dictionaries with job ID, queue, cores, state (``pending``, ``starting`` or ``idle``) and node.
+        """
+        states = {job["pid"]: job["state"] for job in jobs}
+        result = []
+        for pid, allocation in sorted(self.allocations().items()):
+            ready = read_json(self.path(pid, "ready"))
+            if states.get(pid) != "R":
+                state = "pending"
+            elif ready is None:
+                state = "starting"
+            else:
+                state = "idle"
+            result.append(
+                {
+                    "pid": pid,
+                    "queue": allocation["queue"],
+                    "cores": allocation["cores"],
+                    "state": state,
+                    "node": ready["node"] if ready else "",
+                }
+            )
+        return result
+
+    def fill(self, queue, size, cluster_config, jobs, exclude_str=""):
+        """Submit pool jobs until the user has ``size`` waiting allocations in the queue.
+
+        Parameters
+        ----------
+        queue : str
+            Partition name.
+        size : int
+            Requested number of waiting allocations, limited by ``max_per_user`` of the queue pool.
+        cluster_config : dict
+            Cluster configuration.
+        jobs : list
+            Jobs of the user from :func:`core.submit.list_jobs`.
+        exclude_str : str, optional
+            Nodes to avoid, see :mod:`core.exclusions`.
+
+        Returns
+        -------
+        list
+            IDs of submitted jobs.
+
+        Raises
+        ------
+        core.submit.SubmissionError
+            If scheduler rejected the job.
+        """
+        settings = pool_settings(cluster_config, queue)
+        if settings is None:
+            return []
+
+        waiting = [pid for pid, allocation in self.sync(jobs).items() if allocation["queue"] == queue]
+        command = pool_command(
+            queue,
+            settings["cores"],
+            cluster_config["queue_config_dict"],
+            self.pool_dir,
+            settings["idle_timeout"],
+            exclude_str,
+        )
+
+        submitted = []
+        for _ in range(min(size, settings["max_per_user"]) - len(waiting)):
+            pid = submit_job(command)
+            with self._lock:
+                allocations = self.allocations()
+                allocations[pid] = {"queue": queue, "cores": settings["cores"], "submitted": time.time()}
+                write_json(self.state_file, allocations)
+            submitted.append(pid)
+
+        return submitted
+
+    def _request(self, pid, content):
+        """Create launch request of the pool job unless it already exists. Returns ``True`` if it was created."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.pool_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(content)
+            os.link(tmp_path, self.path(pid, "launch"))  # fails if request exists, also on NFS
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def _forget(self, pids):
+        with self._lock:
+            allocations = self.allocations()
+            for pid in pids:
+                allocations.pop(pid, None)
+            write_json(self.state_file, allocations)
+
+    def claim(self, queue, cores, command, env, output_dir, jobs):
+        """Start session in an idle allocation of the queue.
+
+        Parameters
+        ----------
+        queue : str
+            Partition name.
+        cores : int
+            Number of requested cores, allocation must have at least that many.
+        command : str
+            Shell command of the session, see :func:`core.submit.session_command`.
+        env : str
+            Comma separated environment variables of the session including ``DISPLAY``.
+        output_dir : str
+            Directory for ``ansysedt.o<job id>`` and ``ansysedt.e<job id>`` output files.
+        jobs : list
+            Jobs of the user from :func:`core.submit.list_jobs`.
+
+        Returns
+        -------
+        tuple or None
+            Job ID and node of the allocation. ``None`` if there is no idle allocation.
+        """
+        request = json.dumps({"command": command, "env": env, "output_dir": output_dir})
+        for allocation in self.status(jobs):
+            if allocation["state"] != "idle" or allocation["queue"] != queue or allocation["cores"] < cores:
+                continue
+
+            pid = allocation["pid"]
+            if not self._request(pid, request):
+                continue  # claimed by another instance of the launcher or released after idle timeout
+
+            self._forget([pid])
+            try:
+                # name of the session is shown in the job list as for submitted session
+                get_runner().check_output(["scontrol", "update", f"JobId={pid}", f"JobName={SESSION_JOB_NAME}"])
+            except (subprocess.CalledProcessError, OSError):
+                print(f"Cannot rename pool job {pid}")
+            return pid, allocation["node"]
+
+        return None
+
+    def release(self, queue=None):
+        """Cancel waiting pool jobs.
+
+        Parameters
+        ----------
+        queue : str, optional
+            Release only pool jobs of the queue, by default all.
+
+        Returns
+        -------
+        list
+            IDs of cancelled jobs.
+
+        Raises
+        ------
+        core.submit.SubmissionError
+            If scheduler rejected cancellation.
+        """
+        # empty request makes sure that no session is bound to the allocation during cancellation
+        pids = [
+            pid
+            for pid, allocation in sorted(self.allocations().items())
+            if (queue is None or allocation["queue"] == queue) and self._request(pid, "")
+        ]
+        if pids:
+            self._forget(pids)
+            cancel_jobs(pids)
+        return pids
+
+
+def run_session(request, job_id):
+    """Run session of the launch request in the allocation and wait for it.
+
+    Returns
+    -------
+    int
+        Exit code of the session.
+    """
+    env = dict(os.environ, **parse_env(request["env"]))
+    output_dir = request.get("output_dir")
+    stdout = stderr = None
+    if output_dir:
+        stdout = open(os.path.join(output_dir, f"ansysedt.o{job_id}"), "a")
+        stderr = open(os.path.join(output_dir, f"ansysedt.e{job_id}"), "a")
+
+    try:
+        proc = get_runner().spawn(["/bin/sh", "-c", request["command"]], env=env, stdout=stdout, stderr=stderr)
+    finally:
+        for file in (stdout, stderr):
+            if file:
+                file.close()
+
+    signal.signal(signal.SIGTERM, lambda signum, _frame: proc.send_signal(signum))
+    return_code = proc.wait()
+
+    # killed by signal, report the same way as shell does
+    return 128 - return_code if return_code < 0 else return_code
+
+
+def serve(pool_dir, job_id, idle_timeout, poll_interval=POLL_INTERVAL):
+    """Wait in the allocation for a launch request and run its session.
+
+    Parameters
+    ----------
+    pool_dir : str
+        Pool folder on the shared file system.
+    job_id : str
+        ID of the pool job.
+    idle_timeout : float
+        Seconds after which allocation is released if no request came.
+    poll_interval : float, optional
+        Seconds between checks of the request.
+
+    Returns
+    -------
+    int
+        Exit code of the session, ``0`` if allocation was released.
+    """
+    pool = SessionPool(pool_dir)
+    ready_file = pool.path(job_id, "ready")
+    launch_file = pool.path(job_id, "launch")
+    write_json(ready_file, {"node": socket.gethostname(), "started": time.time()})
+
+    deadline = time.time() + idle_timeout
+    while True:
+        try:
+            with open(launch_file) as file:
+                request = file.read()
+            break
+        except FileNotFoundError:
+            pass
+
+        if time.time() >= deadline and pool._request(job_id, ""):
+            request = ""
+            break
+        time.sleep(poll_interval)
+
+    os.remove(ready_file)
+    if not request:
+        print(f"Allocation {job_id} released without session", flush=True)
+        return 0
+
+    print(f"Session started in allocation {job_id}", flush=True)
+    return run_session(json.loads(request), job_id)
+
+
+def main(argv=None):
+    """Run pool agent in the allocation, see :func:`serve`."""
+    parser = argparse.ArgumentParser(description="Keep allocation warm until the launcher starts a session in it")
+    parser.add_argument("--dir", required=True, help="Pool folder on shared file system")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="Seconds to wait for session")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="Seconds between checks")
+    args = parser.parse_args(argv)
+
+    job_id = os.getenv("SLURM_JOB_ID")
+    if not job_id:
+        parser.error("SLURM_JOB_ID is not set, agent runs only inside of the pool job")
+
+    return serve(args.dir, job_id, args.idle_timeout, args.poll_interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
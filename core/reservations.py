@@ -0,0 +1,206 @@
+"""Slurm reservations available to the user, cached from ``scontrol show reservation`` snapshots."""
+import re
+import threading
+import time
+from datetime import datetime
+
+from core.cache import read_json
+from core.cache import write_json
+from core.hostlist import expand
+from core.nodes import is_available
+from core.runner import get_runner
+
+SCONTROL_RESERVATIONS = ["scontrol", "show", "reservation", "--oneliner"]
+
+
+def _parse_time(value):
+    """Convert ``scontrol`` time, eg ``2021-06-01T08:00:00``, to epoch. Unknown values are converted to 0."""
+    try:
+        return int(datetime.strptime(value, "%Y-%m-%dT%H:%M:%S").timestamp())
+    except ValueError:
+        return 0
+
+
+def _parse_list(value):
+    """Convert comma separated ``scontrol`` value to list, ``(null)`` to empty list."""
+    if not value or value == "(null)":
+        return []
+    return value.split(",")
+
+
+def parse_reservations(scontrol_output):
+    """Parse output of :data:`SCONTROL_RESERVATIONS` command.
+
+    Parameters
+    ----------
+    scontrol_output : str
+        Output of ``scontrol``, one reservation per line.
+
+    Returns
+    -------
+    list
+        Reservation records with name, partition, nodes (hostlist expression), number of nodes and cores, start and
+        end time (epoch), state, users and accounts.
+    """
+    reservations = []
+    for line in scontrol_output.splitlines():
+        # values may contain spaces, value lasts until the next key
+        fields = dict(re.findall(r"(\w+)=(.*?)(?=\s+\w+=|\s*$)", line.strip()))
+        if "ReservationName" not in fields:
+            continue
+
+        try:
+            node_count = int(fields.get("NodeCnt", 0))
+            core_count = int(fields.get("CoreCnt", 0))
+        except ValueError:
+            node_count = core_count = 0
+
+        reservations.append(
+            {
+                "name": fields["ReservationName"],
+                "partition": "" if fields.get("PartitionName") == "(null)" else fields.get("PartitionName", ""),
+                "nodes": "" if fields.get("Nodes") == "(null)" else fields.get("Nodes", ""),
+                "node_count": node_count,
+                "core_count": core_count,
+                "start": _parse_time(fields.get("StartTime", "")),
+                "end": _parse_time(fields.get("EndTime", "")),
+                "state": fields.get("State", ""),
+                "users": _parse_list(fields.get("Users")),
+                "accounts": _parse_list(fields.get("Accounts")),
+            }
+        )
+
+    return reservations
+
+
+def is_allowed(reservation, user):
+    """Check if user may submit to the reservation.
+
+    Reservations that are restricted by accounts only are considered allowed, since accounts of the user are not
+    known without a call to the accounting database.
+
+    Parameters
+    ----------
+    reservation : dict
+        Reservation record from :func:`parse_reservations`.
+    user : str
+        Name of the user.
+
+    Returns
+    -------
+    bool
+        ``True`` if user is not excluded from the reservation.
+    """
+    users = reservation["users"]
+    if f"-{user}" in users:
+        return False
+
+    allowed_users = [name for name in users if not name.startswith("-")]
+    return not allowed_users or user in allowed_users
+
+
+def free_cores(reservation, inventory):
+    """Get number of idle cores on the nodes of the reservation.
+
+    Parameters
+    ----------
+    reservation : dict
+        Reservation record from :func:`parse_reservations`.
+    inventory : core.nodes.NodeInventory
+        Node inventory of the cluster.
+
+    Returns
+    -------
+    int or None
+        Number of idle cores on available nodes, ``None`` if nodes are not in the inventory.
+    """
+    try:
+        hosts = expand(reservation["nodes"])
+    except ValueError:
+        return None
+
+    nodes = [inventory.nodes[host] for host in hosts if host in inventory.nodes]
+    if not nodes:
+        return None
+
+    return sum(node["idle_cores"] for node in nodes if is_available(node))
+
+
+class ReservationCache:
+    """Cached list of cluster reservations.
+
+    The list is refreshed in background by the UI and read from the cache on start and by the reservation selector,
+    so that opening the selector never calls ``scontrol``.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the JSON file with cached reservations.
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.reservations = []
+        self.updated = 0
+        self._lock = threading.Lock()
+
+        cached = read_json(self.cache_file, default={})
+        if isinstance(cached, dict):
+            self.reservations = cached.get("reservations", [])
+            self.updated = cached.get("updated", 0)
+
+    def refresh(self, scontrol_output=None):
+        """Update cache with a new snapshot.
+
+        Parameters
+        ----------
+        scontrol_output : str, optional
+            Output of ``scontrol``. If not provided, ``scontrol`` is called.
+
+        Returns
+        -------
+        bool
+            ``True`` if reservations changed.
+        """
+        if scontrol_output is None:
+            scontrol_output = get_runner().check_output(SCONTROL_RESERVATIONS)
+
+        reservations = parse_reservations(scontrol_output)
+        with self._lock:
+            changed = reservations != self.reservations
+            self.reservations = reservations
+            self.updated = time.time()
+            if changed:
+                write_json(self.cache_file, {"updated": self.updated, "reservations": self.reservations})
+
+        return changed
+
+    def usable(self, user, timestamp=None):
+        """Get reservations that the user may submit to.
+
+        Parameters
+        ----------
+        user : str
+            Name of the user.
+        timestamp : float, optional
+            Current time, by default now.
+
+        Returns
+        -------
+        list
+            Reservation records that are not over, sorted by start time.
+        """
+        timestamp = timestamp or time.time()
+        with self._lock:
+            reservations = [
+                reservation
+                for reservation in self.reservations
+                if is_allowed(reservation, user) and (not reservation["end"] or reservation["end"] > timestamp)
+            ]
+
+        return sorted(reservations, key=lambda reservation: reservation["start"])
+
+    def names(self):
+        """Get names of all known reservations."""
+        with self._lock:
+            return {reservation["name"] for reservation in self.reservations}
@@ -0,0 +1,355 @@
+"""Single layer to run external commands (Slurm, AEDT, helper scripts).
+
+Commands are executed from argument lists without shell, each call is bounded by a timeout of the command, duration
+and exit code of every call are recorded, and running commands could be cancelled, eg when the UI is closed. All the
+modules use the runner returned by :func:`get_runner`, tests and benchmarks could replace it with
+:class:`FakeRunner` via :func:`set_runner`.
+"""
+import copy
+import os
+import subprocess
+import threading
+import time
+
+# timeouts in seconds by command name, commands that are not listed use DEFAULT_TIMEOUT
+TIMEOUTS = {
+    "squeue": 30,
+    "sinfo": 30,
+    "scontrol": 30,
+    "scancel": 30,
+    "sstat": 30,
+    "sacct": 120,  # accounting database is slow for long periods
+    "sbatch": 60,
+    "UpdateRegistry": 60,
+    "lmutil": 20,  # submission waits for the license server
+}
+DEFAULT_TIMEOUT = 60
+
+
+class CommandTimeout(subprocess.CalledProcessError):
+    """Raised when command did not finish in time and was killed."""
+
+    def __init__(self, returncode, cmd, output=None, stderr=None, timeout=None):
+        super().__init__(returncode, cmd, output, stderr)
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"Command '{os.path.basename(self.cmd[0])}' did not finish in {self.timeout} seconds"
+
+
+class CommandCancelled(subprocess.CalledProcessError):
+    """Raised when command was cancelled with :meth:`Runner.cancel` or the runner was shut down."""
+
+    def __str__(self):
+        return f"Command '{os.path.basename(self.cmd[0])}' was cancelled"
+
+
+class Runner:
+    """Run commands with timeouts and collect metrics.
+
+    Parameters
+    ----------
+    timeouts : dict, optional
+        Timeouts in seconds by command name, override :data:`TIMEOUTS`.
+    default_timeout : float, optional
+        Timeout of commands that are not in ``timeouts``.
+    """
+
+    def __init__(self, timeouts=None, default_timeout=DEFAULT_TIMEOUT):
+        self.timeouts = dict(TIMEOUTS, **(timeouts or {}))
+        self.default_timeout = default_timeout
+        self.is_shut_down = False
+        self._metrics = {}
+        self._running = {}  # process: command name
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def timeout(self, name):
+        """Get timeout of the command by its name."""
+        return self.timeouts.get(name, self.default_timeout)
+
+    def run(self, command, timeout=None, input=None, env=None, stderr=subprocess.PIPE):
+        """Run command and wait for it to finish.
+
+        Parameters
+        ----------
+        command : list
+            Command and arguments, passed to the program as is.
+        timeout : float, optional
+            Timeout in seconds, by default timeout of the command.
+        input : str, optional
+            Text sent to standard input. If not set, standard input is empty.
+        env : dict, optional
+            Environment of the command, by default environment of the launcher.
+        stderr : int, optional
+            ``subprocess.PIPE`` to capture error output separately, ``subprocess.STDOUT`` to merge it with output
+            or ``subprocess.DEVNULL`` to drop it.
+
+        Returns
+        -------
+        subprocess.CompletedProcess
+            Exit code and text output.
+
+        Raises
+        ------
+        CommandTimeout
+            If command did not finish in time.
+        CommandCancelled
+            If command was cancelled.
+        OSError
+            If program could not be started.
+        """
+        command = [str(arg) for arg in command]
+        name = os.path.basename(command[0])
+        timeout = self.timeout(name) if timeout is None else timeout
+        if self.is_shut_down:
+            self._record(name, 0.0, "cancelled")
+            raise CommandCancelled(-1, command)
+
+        start = time.perf_counter()
+        try:
+            returncode, output, error = self._execute(command, timeout, input, env, stderr)
+        except subprocess.TimeoutExpired as exc:
+            self._record(name, time.perf_counter() - start, "timeout")
+            raise CommandTimeout(-9, command, exc.output, exc.stderr, timeout)
+        except CommandCancelled:
+            self._record(name, time.perf_counter() - start, "cancelled")
+            raise
+        except OSError:
+            self._record(name, time.perf_counter() - start, None)
+            raise
+
+        self._record(name, time.perf_counter() - start, returncode)
+        return subprocess.CompletedProcess(command, returncode, output, error)
+
+    def _execute(self, command, timeout, input, env, stderr):
+        """Start process and wait for it, see :meth:`run`."""
+        proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            env=env,
+            universal_newlines=True,
+            errors="replace",
+        )
+        with self._lock:
+            self._running[proc] = os.path.basename(command[0])
+
+        try:
+            output, error = proc.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            output, error = proc.communicate()
+            raise subprocess.TimeoutExpired(command, timeout, output, error)
+        finally:
+            with self._lock:
+                self._running.pop(proc, None)
+                cancelled = proc in self._cancelled
+                self._cancelled.discard(proc)
+
+        if cancelled:
+            raise CommandCancelled(proc.returncode, command, output, error)
+        return proc.returncode, output, error
+
+    def check_output(self, command, timeout=None, input=None, env=None, stderr=subprocess.PIPE):
+        """Run command and get its output, see :meth:`run`.
+
+        Returns
+        -------
+        str
+            Output of the command.
+
+        Raises
+        ------
+        subprocess.CalledProcessError
+            If command failed. :class:`CommandTimeout` and :class:`CommandCancelled` are its subclasses.
+        """
+        result = self.run(command, timeout, input, env, stderr)
+        if result.returncode:
+            raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+        return result.stdout
+
+    def call(self, command, timeout=None, env=None):
+        """Run command and get its exit code, output of the command is printed to the output of the launcher.
+
+        See :meth:`run` for the parameters and exceptions.
+        """
+        result = self.run(command, timeout, env=env, stderr=subprocess.STDOUT)
+        if result.stdout:
+            print(result.stdout, end="")
+        return result.returncode
+
+    def spawn(self, command, env=None, stdout=None, stderr=None):
+        """Start long running program (AEDT session, browser) without waiting for it.
+
+        Only start of the program is recorded in the metrics, it is neither bounded by a timeout nor cancelled.
+        Output goes to the output of the launcher unless ``stdout`` and ``stderr`` files are specified.
+
+        Returns
+        -------
+        subprocess.Popen
+            Started process.
+        """
+        command = [str(arg) for arg in command]
+        name = os.path.basename(command[0])
+        start = time.perf_counter()
+        try:
+            proc = subprocess.Popen(command, env=env, stdout=stdout, stderr=stderr)
+        except OSError:
+            self._record(name, time.perf_counter() - start, None)
+            raise
+
+        self._record(name, time.perf_counter() - start, 0)
+        return proc
+
+    def cancel(self, name=None):
+        """Kill running commands, their callers get :class:`CommandCancelled`.
+
+        Parameters
+        ----------
+        name : str, optional
+            Cancel only commands with this name, eg ``squeue``. By default all commands are cancelled.
+
+        Returns
+        -------
+        int
+            Number of killed processes.
+        """
+        with self._lock:
+            procs = [proc for proc, proc_name in self._running.items() if name is None or proc_name == name]
+            self._cancelled.update(procs)
+
+        for proc in procs:
+            try:
+                proc.kill()
+            except OSError:
+                pass  # already finished
+        return len(procs)
+
+    def shutdown(self):
+        """Cancel all running commands and refuse new ones."""
+        self.is_shut_down = True
+        self.cancel()
+
+    def _record(self, name, duration, result):
+        """Add call to the metrics, ``result`` is exit code, ``timeout``, ``cancelled`` or ``None`` if not started."""
+        with self._lock:
+            stats = self._metrics.setdefault(
+                name,
+                {
+                    "calls": 0,
+                    "failures": 0,
+                    "timeouts": 0,
+                    "cancelled": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "last_exit_code": None,
+                },
+            )
+            stats["calls"] += 1
+            stats["total_time"] += duration
+            stats["max_time"] = max(stats["max_time"], duration)
+            if result == "timeout":
+                stats["timeouts"] += 1
+            elif result == "cancelled":
+                stats["cancelled"] += 1
+            else:
+                stats["last_exit_code"] = result
+                if result != 0:
+                    stats["failures"] += 1
+
+    def metrics(self):
+        """Get metrics of the calls.
+
+        Returns
+        -------
+        dict
+            Number of calls, failures (non-zero exit code or program not found), timeouts and cancelled calls,
+            total and max duration in seconds and last exit code, keyed by command name.
+        """
+        with self._lock:
+            return copy.deepcopy(self._metrics)
+
+
+class FakeRunner(Runner):
+    """Runner that returns prepared results instead of running commands, for tests and benchmarks.
+
+    Parameters
+    ----------
+    responses : dict, optional
+        Results keyed by full command (tuple) or by command name. Result is a tuple of exit code and output, a
+        callable that gets the command and returns such tuple, or ``"timeout"``. Commands without response succeed
+        with empty output.
+    **kwargs
+        Arguments of :class:`Runner`.
+    """
+
+    def __init__(self, responses=None, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = responses or {}
+        self.calls = []
+
+    def _execute(self, command, timeout, input, env, stderr):
+        self.calls.append(command)
+        response = self.responses.get(tuple(command), self.responses.get(os.path.basename(command[0]), (0, "")))
+        if callable(response):
+            response = response(command)
+        if response == "timeout":
+            raise subprocess.TimeoutExpired(command, timeout, "", "")
+
+        returncode, output = response
+        return returncode, output, ""
+
+    def spawn(self, command, env=None, stdout=None, stderr=None):
+        self.run(command)
+        return subprocess.CompletedProcess(command, 0)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """Get runner used by all the modules, created on first use."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = Runner()
+        return _runner
+
+
+def set_runner(runner):
+    """Replace runner used by all the modules, eg with :class:`FakeRunner`.
+
+    Returns
+    -------
+    Runner
+        Previous runner.
+    """
+    global _runner
+    with _runner_lock:
+        previous, _runner = _runner, runner
+    return previous
+
+
+def format_metrics(metrics):
+    """Format metrics of :meth:`Runner.metrics` as a table."""
+    lines = [
+        "{:<16}{:>7}{:>10}{:>10}{:>11}{:>10}{:>10}".format(
+            "command", "calls", "failures", "timeouts", "cancelled", "avg s", "max s"
+        )
+    ]
+    for name, stats in sorted(metrics.items()):
+        lines.append(
+            "{:<16}{:>7}{:>10}{:>10}{:>11}{:>10.3f}{:>10.3f}".format(
+                name,
+                stats["calls"],
+                stats["failures"],
+                stats["timeouts"],
+                stats["cancelled"],
+                stats["total_time"] / stats["calls"] if stats["calls"] else 0.0,
+                stats["max_time"],
+            )
+        )
+    return "\n".join(lines)
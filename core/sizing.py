@@ -0,0 +1,211 @@
+"""Right-sizing advice from CPU and memory usage of finished jobs submitted by the launcher.
+
+Jobs are registered at submission with AEDT version and project. When they leave the queue, their usage is taken
+from one batched ``sacct`` call and only the last :data:`SAMPLES_PER_KEY` jobs per version and project are kept in
+``~/.aedt/sizing.json``, so that the store stays small however long the launcher is used.
+"""
+import math
+import os
+import subprocess
+import threading
+import time
+
+from core.cache import read_json
+from core.cache import write_json
+from core.efficiency import merge_usage
+from core.runner import get_runner
+
+SAMPLES_PER_KEY = 10
+MIN_SAMPLES = 3  # do not advise from fewer jobs
+MIN_ELAPSED = 300  # jobs shorter than 5 minutes were aborted on start and say nothing about the need
+HEADROOM = 1.25  # suggested cores and memory above the average usage
+PENDING_TTL = 7 * 86400  # forget registered jobs that accounting never reported
+ACTIVE_STATES = {"PENDING", "RUNNING", "REQUEUED", "RESIZING", "SUSPENDED", "COMPLETING"}
+
+
+def sample_key(version, project):
+    """Build key of the samples from AEDT version and project path."""
+    return f"{version}|{project}"
+
+
+def suggest_size(samples, queue, queue_config):
+    """Suggest number of cores, nodes and queue that cover the usage of the samples.
+
+    Parameters
+    ----------
+    samples : list
+        Samples of :class:`SizingAdvisor`: requested cores, used cores, max RSS in GB, partition and submission time.
+    queue : str
+        Currently selected queue, kept if it fits.
+    queue_config : dict
+        Queue configuration with cores and RAM per node (``queue_config_dict``).
+
+    Returns
+    -------
+    dict or None
+        Number of jobs, average requested and used cores, max RSS, suggested cores, nodes and queue. ``None`` if
+        there are fewer than :data:`MIN_SAMPLES` samples.
+    """
+    if len(samples) < MIN_SAMPLES:
+        return None
+
+    requested = sum(sample[0] for sample in samples) / len(samples)
+    used = sum(sample[1] for sample in samples) / len(samples)
+    max_rss = max(sample[2] for sample in samples)
+    cores = max(1, math.ceil(used * HEADROOM))
+    memory = max_rss * HEADROOM
+
+    # keep selected queue if the job fits, otherwise the queue with the smallest nodes that fit
+    fitting = [name for name, config in queue_config.items() if config["cores"] >= cores and config["ram"] >= memory]
+    if queue not in fitting and fitting:
+        queue = min(fitting, key=lambda name: (queue_config[name]["ram"], queue_config[name]["cores"]))
+
+    nodes = math.ceil(cores / queue_config[queue]["cores"]) if queue in queue_config else 1
+    return {
+        "jobs": len(samples),
+        "requested": requested,
+        "used": used,
+        "max_rss": max_rss,
+        "cores": cores,
+        "nodes": nodes,
+        "queue": queue,
+    }
+
+
+class SizingAdvisor:
+    """Usage of finished jobs of the launcher per AEDT version and project.
+
+    Parameters
+    ----------
+    store_file : str
+        Path to the JSON file with registered jobs and collected samples.
+    """
+
+    def __init__(self, store_file):
+        self.store_file = store_file
+        self._lock = threading.Lock()
+
+        cached = read_json(self.store_file, default={})
+        cached = cached if isinstance(cached, dict) else {}
+        self.pending = cached.get("pending", {})  # job ID: version, project, submission time
+        self.samples = cached.get("samples", {})  # key: lists of requested and used cores, max RSS, partition, time
+
+    def _save(self):
+        write_json(self.store_file, {"pending": self.pending, "samples": self.samples})
+
+    def register(self, job_id, version, project):
+        """Remember job submitted by the launcher to collect its usage when it ends.
+
+        Parameters
+        ----------
+        job_id : str
+            Slurm job ID.
+        version : str
+            AEDT version.
+        project : str
+            Project file of batch jobs or project directory of interactive sessions.
+        """
+        with self._lock:
+            self.pending[job_id] = [version, project, time.time()]
+            self._save()
+
+    def ingest(self, active_ids, queue_config):
+        """Collect usage of registered jobs that are not in the queue anymore.
+
+        Parameters
+        ----------
+        active_ids : iterable
+            IDs of the jobs of the user in the queue.
+        queue_config : dict
+            Queue configuration with RAM per node (``queue_config_dict``).
+
+        Returns
+        -------
+        int
+            Number of added samples.
+        """
+        active_ids = set(active_ids)
+        with self._lock:
+            finished = [job_id for job_id in self.pending if job_id not in active_ids]
+        if not finished:
+            return 0
+
+        sacct_output = get_runner().check_output(
+            [
+                "sacct",
+                "--noheader",
+                "--parsable2",
+                "--jobs",
+                ",".join(finished),
+                "--format",
+                "JobID,Partition,NNodes,NCPUS,ElapsedRaw,TotalCPU,MaxRSS,State",
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+
+        # job could still be in the queue if squeue failed, usage is final only when the job ended
+        ended = set()
+        lines = []
+        for line in sacct_output.splitlines():
+            fields = line.strip().split("|")
+            if len(fields) != 8:
+                continue
+            if "." not in fields[0] and fields[7].split(" ")[0] not in ACTIVE_STATES:
+                ended.add(fields[0])
+            lines.append("|".join(fields[:7]))
+        usage = {job["pid"]: job for job in merge_usage("\n".join(lines), "", queue_config) if job["pid"] in ended}
+
+        added = 0
+        now = time.time()
+        with self._lock:
+            for job_id in finished:
+                version, project, submitted = self.pending[job_id]
+                job = usage.get(job_id)
+                if job is None:
+                    # accounting could lag behind the queue, wait for the record unless it is too old
+                    if now - submitted > PENDING_TTL:
+                        del self.pending[job_id]
+                    continue
+
+                del self.pending[job_id]
+                if job["elapsed"] < MIN_ELAPSED:
+                    continue
+
+                samples = self.samples.setdefault(sample_key(version, project), [])
+                used = round(job["cpu_efficiency"] * job["cores"], 2)
+                samples.append([job["cores"], used, round(job["max_rss"], 2), job["partition"], round(submitted)])
+                del samples[:-SAMPLES_PER_KEY]
+                added += 1
+
+            self._save()
+        return added
+
+    def advise(self, version, project, queue, queue_config):
+        """Suggest job size from the jobs of the version in the project or in its subdirectories.
+
+        Parameters
+        ----------
+        version : str
+            AEDT version.
+        project : str
+            Project directory or project file.
+        queue : str
+            Currently selected queue.
+        queue_config : dict
+            Queue configuration (``queue_config_dict``).
+
+        Returns
+        -------
+        dict or None
+            See :func:`suggest_size`.
+        """
+        project = project.rstrip(os.sep)
+        samples = []
+        with self._lock:
+            for key, key_samples in self.samples.items():
+                key_version, _, key_project = key.partition("|")
+                if key_version == version and (key_project == project or key_project.startswith(project + os.sep)):
+                    samples.extend(key_samples)
+
+        samples.sort(key=lambda sample: sample[4])
+        return suggest_size(samples[-SAMPLES_PER_KEY:], queue, queue_config)
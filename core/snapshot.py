@@ -0,0 +1,71 @@
+"""Last known state of the user jobs and cluster load, used to render UI before the first update."""
+import copy
+import threading
+import time
+
+from core.cache import read_json
+from core.cache import write_json
+
+
+class Snapshot:
+    """Persistent snapshot of the data sections shown in the UI.
+
+    Each section (eg ``jobs``, ``load``) keeps the latest data and the time when it was received. The file is only
+    rewritten if data changed or if the stored timestamp is older than ``max_age`` seconds, so that frequent polling
+    does not cause frequent writes.
+
+    Parameters
+    ----------
+    snapshot_file : str
+        Path to the JSON file with the snapshot.
+    max_age : int, optional
+        Maximum age of the stored timestamp for unchanged data in seconds.
+    """
+
+    def __init__(self, snapshot_file, max_age=60):
+        self.snapshot_file = snapshot_file
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+        self.sections = read_json(self.snapshot_file, default={})
+        if not isinstance(self.sections, dict):
+            self.sections = {}
+
+    def get(self, section):
+        """Get data of the section.
+
+        Parameters
+        ----------
+        section : str
+            Name of the section.
+
+        Returns
+        -------
+        tuple
+            Data (``None`` if section was never stored) and time when it was received.
+        """
+        with self._lock:
+            stored = self.sections.get(section, {})
+        return stored.get("data"), stored.get("time", 0)
+
+    def update(self, section, data):
+        """Store new data of the section.
+
+        Parameters
+        ----------
+        section : str
+            Name of the section.
+        data : object
+            JSON serializable data.
+        """
+        now = time.time()
+        with self._lock:
+            stored = self.sections.get(section, {})
+            if stored.get("data") == data and now - stored.get("time", 0) < self.max_age:
+                return
+
+            self.sections[section] = {"time": now, "data": copy.deepcopy(data)}
+            try:
+                write_json(self.snapshot_file, self.sections)
+            except OSError:
+                print("Cannot save snapshot")
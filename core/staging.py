@@ -0,0 +1,250 @@
+"""Staging of projects to node-local scratch for the time of the job.
+
+Job command is wrapped by this module, which copies project files from the shared file system to scratch, runs
+AEDT there and copies new and changed files back when AEDT exits or the job is cancelled::
+
+    python -m core.staging --source /lus01/user --scratch /tmp -- ansysedt -batchsolve {scratch}/project.aedt
+
+``{scratch}`` in the command is replaced with the job folder on scratch.
+"""
+import argparse
+import os
+import shlex
+import shutil
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import LAUNCHER_DIR
+from core.runner import get_runner
+
+# files that belong to the running session and must not be copied
+SKIP_SUFFIXES = (".lock",)
+
+COPY_WORKERS = 8
+
+
+def _needs_copy(src_file, dst_file):
+    """Check if destination file is missing or differs from source by size or modification time."""
+    try:
+        dst_stat = os.stat(dst_file)
+    except FileNotFoundError:
+        return True
+
+    src_stat = os.stat(src_file)
+    return src_stat.st_size != dst_stat.st_size or int(src_stat.st_mtime) != int(dst_stat.st_mtime)
+
+
+def copy_tree(src, dst, workers=COPY_WORKERS):
+    """Copy new and changed files from source to destination in parallel.
+
+    Files that are not in the source are kept in the destination. Lock files are skipped.
+
+    Parameters
+    ----------
+    src : str
+        Source file or directory.
+    dst : str
+        Destination file or directory.
+    workers : int, optional
+        Number of parallel copy threads.
+
+    Returns
+    -------
+    tuple
+        Number of copied files and bytes.
+    """
+    if os.path.isfile(src):
+        pairs = [(src, dst)]
+    else:
+        pairs = []
+        for root, _dirs, files in os.walk(src):
+            dst_root = os.path.join(dst, os.path.relpath(root, src))
+            os.makedirs(dst_root, exist_ok=True)
+            pairs += [(os.path.join(root, name), os.path.join(dst_root, name)) for name in files]
+
+    pairs = [
+        (src_file, dst_file)
+        for src_file, dst_file in pairs
+        if not src_file.endswith(SKIP_SUFFIXES) and _needs_copy(src_file, dst_file)
+    ]
+    if not pairs:
+        return 0, 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(pairs[0][1])), exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda pair: shutil.copy2(*pair), pairs))
+
+    return len(pairs), sum(os.path.getsize(dst_file) for _src_file, dst_file in pairs)
+
+
+def stage(source_dir, target_dir, include=(), workers=COPY_WORKERS):
+    """Copy project files from one directory to another.
+
+    Parameters
+    ----------
+    source_dir : str
+        Directory with projects.
+    target_dir : str
+        Destination directory.
+    include : iterable, optional
+        Names of files and folders in ``source_dir`` to copy, by default everything.
+    workers : int, optional
+        Number of parallel copy threads.
+
+    Returns
+    -------
+    tuple
+        Number of copied files and bytes.
+    """
+    if not include:
+        return copy_tree(source_dir, target_dir, workers)
+
+    copied_files = copied_bytes = 0
+    for name in include:
+        src = os.path.join(source_dir, name)
+        if os.path.exists(src):
+            files, size = copy_tree(src, os.path.join(target_dir, name), workers)
+            copied_files += files
+            copied_bytes += size
+
+    return copied_files, copied_bytes
+
+
+def project_include(project_files):
+    """Get names of the files and folders to stage for the projects of one folder: project files and their results."""
+    include = []
+    for project_file in project_files:
+        name = os.path.basename(project_file)
+        include += [name, f"{os.path.splitext(name)[0]}.aedtresults"]
+    return include
+
+
+def staging_prefix(source_dir, scratch_root, include=(), aedt_path="", product=""):
+    """Get shell words that wrap the job command with staging.
+
+    Parameters
+    ----------
+    source_dir : str
+        Directory with projects on the shared file system.
+    scratch_root : str
+        Node-local scratch directory, job folder is created inside.
+    include : iterable, optional
+        Names of files and folders in ``source_dir`` to stage, by default everything.
+    aedt_path : str, optional
+        Path to EDT. If specified with ``product``, ``Desktop/ProjectDirectory`` points to scratch during the job.
+    product : str, optional
+        Product name of the installation.
+
+    Returns
+    -------
+    list
+        Shell quoted words to put in front of the job command.
+    """
+    words = [
+        f"PYTHONPATH={shlex.quote(LAUNCHER_DIR)}",
+        shlex.quote(sys.executable),
+        "-m",
+        "core.staging",
+        "--source",
+        shlex.quote(source_dir),
+        "--scratch",
+        shlex.quote(scratch_root),
+    ]
+    for name in include:
+        words += ["--include", shlex.quote(name)]
+    if aedt_path and product:
+        words += ["--aedt-path", shlex.quote(aedt_path), "--product", shlex.quote(product)]
+    return words + ["--"]
+
+
+def set_project_directory(aedt_path, product, project_path):
+    """Set default project directory of EDT in user registry."""
+    get_runner().call(
+        [
+            os.path.join(aedt_path, "UpdateRegistry"),
+            "-Set",
+            "-ProductName",
+            product,
+            "-RegistryLevel",
+            "user",
+            "-RegistryKey",
+            "Desktop/ProjectDirectory",
+            "-RegistryValue",
+            project_path,
+        ]
+    )
+
+
+def run_staged(command, source_dir, scratch_root, include=(), aedt_path="", product=""):
+    """Stage projects to scratch, run command and copy results back.
+
+    Results are copied back also if the job is cancelled (``SIGTERM`` is forwarded to the command). Job folder on
+    scratch is removed only if results were copied back successfully.
+
+    Parameters
+    ----------
+    command : list
+        Command, ``{scratch}`` is replaced with the job folder.
+    source_dir : str
+        Directory with projects on the shared file system.
+    scratch_root : str
+        Node-local scratch directory.
+    include : iterable, optional
+        Names of files and folders in ``source_dir`` to stage, by default everything.
+    aedt_path : str, optional
+        Path to EDT to point ``Desktop/ProjectDirectory`` to scratch.
+    product : str, optional
+        Product name of the installation.
+
+    Returns
+    -------
+    int
+        Exit code of the command.
+    """
+    job_dir = os.path.join(scratch_root, f"aedt_{os.getenv('SLURM_JOB_ID', os.getpid())}")
+    os.makedirs(job_dir, exist_ok=True)
+
+    files, size = stage(source_dir, job_dir, include)
+    print(f"Staged {files} files ({size / 1024 ** 3:.2f} GB) from {source_dir} to {job_dir}", flush=True)
+
+    if aedt_path and product:
+        set_project_directory(aedt_path, product, job_dir)
+
+    proc = get_runner().spawn([arg.replace("{scratch}", job_dir) for arg in command])
+    signal.signal(signal.SIGTERM, lambda signum, _frame: proc.send_signal(signum))
+    try:
+        return_code = proc.wait()
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # do not interrupt copy back
+        if aedt_path and product:
+            set_project_directory(aedt_path, product, source_dir)
+
+        files, size = stage(job_dir, source_dir, include)
+        print(f"Copied back {files} files ({size / 1024 ** 3:.2f} GB) to {source_dir}", flush=True)
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    # killed by signal, report the same way as shell does
+    return 128 - return_code if return_code < 0 else return_code
+
+
+def main(argv=None):
+    """Run job command with staging, see :func:`run_staged`."""
+    parser = argparse.ArgumentParser(description="Run AEDT with projects staged to node-local scratch")
+    parser.add_argument("--source", required=True, help="Directory with projects on shared file system")
+    parser.add_argument("--scratch", required=True, help="Node-local scratch directory")
+    parser.add_argument("--include", action="append", default=[], help="File or folder in source to stage")
+    parser.add_argument("--aedt-path", default="", help="Path to EDT to set project directory")
+    parser.add_argument("--product", default="", help="Product name of EDT")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Command after --")
+    args = parser.parse_args(argv)
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("command is not specified")
+
+    return run_staged(command, args.source, args.scratch, args.include, args.aedt_path, args.product)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,550 @@
+"""Submission pipeline of AEDT jobs to Slurm. Does not depend on the UI."""
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import time
+from datetime import datetime
+
+from core.config import LAUNCHER_DIR
+from core.machinelist import machinelist_argument
+from core.runner import get_runner
+
+STATISTICS_SERVER = "OTTBLD02"
+STATISTICS_PORT = 8086
+
+SQUEUE = ["squeue", "--me", "--format", "%.18i %.9P %.8j %.8u %.2t %.4C %.20V %R"]
+
+# scheduler commands to control jobs, job IDs are appended
+JOB_ACTIONS = {
+    "cancel": ["scancel"],
+    "hold": ["scontrol", "hold"],
+    "release": ["scontrol", "release"],
+    "requeue": ["scontrol", "requeue"],
+}
+
+# allocation strategies in the same order as in UI
+ALLOCATIONS = ["1 Node and Cores", "Multiple Nodes"]
+
+
+class SubmissionError(Exception):
+    """Raised when scheduler rejects the job. Message contains scheduler output."""
+
+
+def display_value(display_var, hostname):
+    """Validate that DISPLAY variable follow convention hostname:display_number
+
+    Parameters
+    ----------
+    display_var : str
+        Value of ``DISPLAY`` environment variable.
+    hostname : str
+        Name of the current host, prepended if ``DISPLAY`` has no host.
+
+    Returns
+    -------
+    str
+        Proper display value
+    """
+    if not display_var:
+        raise EnvironmentError("DISPLAY environment variable is not specified. Contact cluster admin")
+
+    if ":" not in display_var:
+        raise EnvironmentError("DISPLAY hasn't session number specified. Contact cluster admin")
+
+    if not display_var.split(":")[0]:
+        return f"{hostname}:{display_var.split(':')[1]}"
+
+    return display_var
+
+
+def build_env(user_env, admin_env_vars=None):
+    """Merge environment variables specified by user and by cluster administrator.
+
+    Parameters
+    ----------
+    user_env : str
+        Comma separated ``VARIABLE=VALUE`` pairs.
+    admin_env_vars : dict, optional
+        Variables from cluster configuration.
+
+    Returns
+    -------
+    str
+        Comma separated ``VARIABLE=VALUE`` pairs without spaces and empty entries.
+    """
+    env = user_env or ""
+
+    if admin_env_vars:
+        env_list = [f"{env_var}={env_val}" for env_var, env_val in admin_env_vars.items()]
+        env += "," + ",".join(env_list)
+
+    # verify that no double commas, spaces, etc
+    if env:
+        env = re.sub(" ", "", env)
+        env = re.sub(",+", ",", env)
+        env = env.rstrip(",").lstrip(",")
+
+    return env
+
+
+def parse_squeue(squeue_output, exclude=()):
+    """Parse output of :data:`SQUEUE` command.
+
+    Parameters
+    ----------
+    squeue_output : str
+        Output of ``squeue``.
+    exclude : iterable, optional
+        Node names. Jobs that run on these nodes (VNC and DCV sessions) are skipped.
+
+    Returns
+    -------
+    list
+        Dictionaries with job information.
+    """
+    jobs = []
+    for line in squeue_output.split("\n")[1:]:
+        if not line.strip():
+            continue
+
+        pid = line[0:18].strip()
+        partition = line[19:28].strip()
+        job_name = line[29:38].strip()
+        user = line[38:47].strip()
+        state = line[47:49].strip()
+        num_cpu = line[50:54].strip()
+        started = line[54:75].strip()
+        node_list = line[76:].strip()
+
+        for node in exclude:
+            if node in node_list:
+                break
+        else:
+            # it is neither VNC nor DCV job
+            jobs.append(
+                {
+                    "pid": pid,
+                    "partition": partition,
+                    "state": state,
+                    "name": job_name,
+                    "user": user,
+                    "queue_data": node_list,
+                    "proc": num_cpu,
+                    "started": started,
+                }
+            )
+
+    return jobs
+
+
+def list_jobs(exclude=()):
+    """Get jobs of the current user from ``squeue``, see :func:`parse_squeue`."""
+    slurm_stat_output = get_runner().check_output(SQUEUE)
+    return parse_squeue(slurm_stat_output, exclude)
+
+
+def shared_memory(queue_settings, cores):
+    """Get memory for the job that shares the node with other jobs.
+
+    Memory is proportional to the share of requested cores in the node.
+
+    Parameters
+    ----------
+    queue_settings : dict
+        Settings of the queue from ``queue_config_dict``.
+    cores : int
+        Number of requested cores.
+
+    Returns
+    -------
+    int
+        Memory in GB.
+    """
+    return max(1, queue_settings["ram"] * cores // queue_settings["cores"])
+
+
+def job_resources(queue, allocation_rule, num, queue_config):
+    """Get ``sbatch`` resource options and total number of cores.
+
+    Cores on a single node are packed together with other jobs and request memory proportional to the number of
+    cores, see :func:`shared_memory`. Multiple nodes are requested exclusively.
+
+    Parameters
+    ----------
+    queue : str
+        Partition name.
+    allocation_rule : int
+        Index in :data:`ALLOCATIONS`: ``0`` for cores on a single node, ``1`` for multiple whole nodes.
+    num : int
+        Number of cores or nodes depending on allocation rule.
+    queue_config : dict
+        Cores and RAM per node for each queue.
+
+    Returns
+    -------
+    tuple
+        List of options and total number of cores.
+    """
+    if num < 1:
+        raise ValueError("Nodes Value must be a positive integer")
+
+    queue_settings = queue_config[queue]
+    if allocation_rule == 0:
+        if num > queue_settings["cores"]:
+            raise ValueError(f"Queue {queue} has only {queue_settings['cores']} cores per node")
+        return ["--nodes=1-1", f"--ntasks={num}", f"--mem={shared_memory(queue_settings, num)}G"], num
+
+    total_cores = queue_settings["cores"] * num
+    return [f"--nodes={num}-{num}", f"--ntasks={total_cores}", "--exclusive"], total_cores
+
+
+def interactive_command(
+    aedt_path,
+    env,
+    queue,
+    allocation_rule,
+    num,
+    queue_config,
+    display_node,
+    nodes_list_str="",
+    reservation_id="",
+    batch_options_file="",
+    wrapper=(),
+    exclude_str="",
+    output_dir="",
+):
+    """Build ``sbatch`` command for interactive session.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+    env : str
+        Comma separated environment variables, see :func:`build_env`.
+    queue : str
+        Partition name.
+    allocation_rule : int
+        Index in :data:`ALLOCATIONS`: ``0`` for cores on a single node, ``1`` for multiple whole nodes.
+    num : int
+        Number of cores or nodes depending on allocation rule.
+    queue_config : dict
+        Cores and RAM per node for each queue.
+    display_node : str
+        Value of ``DISPLAY`` to which session is sent.
+    nodes_list_str : str, optional
+        Nodes to run the job on.
+    reservation_id : str, optional
+        Reservation to run the job in.
+    exclude_str : str, optional
+        Nodes to avoid, see :mod:`core.exclusions`.
+    batch_options_file : str, optional
+        AEDT batch options file of the queue HPC profile, see :mod:`core.hpc`.
+    wrapper : list, optional
+        Shell words to put in front of AEDT command, eg :func:`core.staging.staging_prefix`.
+    output_dir : str, optional
+        Directory for ``ansysedt.o<job id>`` and ``ansysedt.e<job id>`` output files of the job.
+
+    Returns
+    -------
+    list
+        Command.
+    """
+    resources, total_cores = job_resources(queue, allocation_rule, num, queue_config)
+
+    scheduler = "sbatch"
+    env += f",DISPLAY={display_node}"
+    env = env.lstrip(",")
+
+    command = [scheduler, "--job-name", "aedt", "--partition", queue, "--export", env] + resources
+
+    nodes_list_str = nodes_list_str.replace(" ", "")
+    if nodes_list_str:
+        command += ["--nodelist", nodes_list_str]
+
+    if exclude_str:
+        command += ["--exclude", exclude_str]
+
+    if reservation_id:
+        command += ["--reservation", reservation_id]
+
+    if output_dir:
+        command += ["--output", os.path.join(output_dir, "ansysedt.o%j")]
+        command += ["--error", os.path.join(output_dir, "ansysedt.e%j")]
+
+    aedt_str = session_command(
+        aedt_path, queue, allocation_rule, total_cores, queue_config, batch_options_file, wrapper
+    )
+    command += ["--wrap", aedt_str]
+    return command
+
+
+def session_command(aedt_path, queue, allocation_rule, total_cores, queue_config, batch_options_file="", wrapper=()):
+    """Build shell command that starts AEDT session inside of the allocation.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+    queue : str
+        Partition name.
+    allocation_rule : int
+        Index in :data:`ALLOCATIONS`: ``0`` for cores on a single node, ``1`` for multiple whole nodes.
+    total_cores : int
+        Total number of cores of the session.
+    queue_config : dict
+        Cores and RAM per node for each queue.
+    batch_options_file : str, optional
+        AEDT batch options file of the queue HPC profile, see :mod:`core.hpc`.
+    wrapper : list, optional
+        Shell words to put in front of AEDT command, eg :func:`core.staging.staging_prefix`.
+
+    Returns
+    -------
+    str
+        Command for the shell of the job, which expands machinelist on the node.
+    """
+    machines = machinelist_argument(queue_config[queue], allocation_rule, total_cores)
+    aedt_args = [shlex.quote(os.path.join(aedt_path, "ansysedt")), "-machinelist", machines]
+    if batch_options_file:
+        aedt_args += ["-batchoptions", shlex.quote(batch_options_file)]
+    return " ".join(list(wrapper) + aedt_args)
+
+
+def submit_job(command):
+    """Submit job to the scheduler.
+
+    Parameters
+    ----------
+    command : list
+        ``sbatch`` command.
+
+    Returns
+    -------
+    str
+        Job ID.
+
+    Raises
+    ------
+    SubmissionError
+        If scheduler rejected the job.
+    """
+    print(f"Execute via: {shlex.join(command)}")
+
+    try:
+        output = get_runner().check_output(command, stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError as exc:
+        raise SubmissionError(exc.output or str(exc))
+
+    return output.strip().split()[-1]
+
+
+def control_jobs(action, job_ids):
+    """Apply action to all jobs with a single scheduler call.
+
+    Parameters
+    ----------
+    action : str
+        One of :data:`JOB_ACTIONS`.
+    job_ids : list
+        IDs of the jobs.
+
+    Returns
+    -------
+    str
+        Output of the scheduler.
+
+    Raises
+    ------
+    SubmissionError
+        If scheduler rejected the action.
+    """
+    if action == "cancel":
+        command = JOB_ACTIONS[action] + list(job_ids)
+    else:
+        command = JOB_ACTIONS[action] + [",".join(job_ids)]
+    print(f"Job {action} via: {subprocess.list2cmdline(command)}")
+
+    try:
+        return get_runner().check_output(command, stderr=subprocess.STDOUT)
+    except subprocess.CalledProcessError as exc:
+        raise SubmissionError(exc.output or str(exc))
+
+
+def cancel_jobs(job_ids):
+    """Cancel jobs with a single ``scancel`` call, see :func:`control_jobs`."""
+    return control_jobs("cancel", job_ids)
+
+
+def job_age(job, timestamp=None):
+    """Get time since submission of the job.
+
+    Parameters
+    ----------
+    job : dict
+        Job from :func:`parse_squeue`.
+    timestamp : float, optional
+        Current time, by default now.
+
+    Returns
+    -------
+    float or None
+        Age in seconds, ``None`` if submission time is unknown.
+    """
+    try:
+        submitted = datetime.strptime(job["started"], "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+    return (timestamp or time.time()) - submitted.timestamp()
+
+
+def update_registry(aedt_path, product, project_path):
+    """Set registry for each run of EDT.
+
+    This is necessary because each run occurs on a different Linux node.
+
+    Disables:
+    1. Question on product improvement
+    2. Question on Project directory, this is grabbed from UI
+    3. Welcome message
+    4. Question on personal lib
+
+    Sets:
+    1. EDT Installation path
+    2. Slurm scheduler as default
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+    product : str
+        Product name of the installation, see :func:`core.config.read_product`.
+    project_path : str
+        Default project directory.
+    """
+    if not os.path.isdir(project_path):
+        os.mkdir(project_path)
+
+    commands = []  # list to aggregate all commands to execute
+    registry_file = os.path.join(aedt_path, "UpdateRegistry")
+
+    # set base for each command: path to registry, product and level
+    command_base = [
+        registry_file,
+        "-Set",
+        "-ProductName",
+        product,
+        "-RegistryLevel",
+        "user",
+    ]
+
+    # disable question about participation in product improvement
+    commands.append(
+        ["-RegistryKey", "Desktop/Settings/ProjectOptions/ProductImprovementOptStatus", "-RegistryValue", "1"]
+    )
+
+    # set installation path
+    commands.append(["-RegistryKey", "Desktop/InstallationDirectory", "-RegistryValue", aedt_path])
+
+    # set project folder
+    commands.append(["-RegistryKey", "Desktop/ProjectDirectory", "-RegistryValue", project_path])
+
+    # disable welcome message
+    commands.append(["-RegistryKey", "Desktop/Settings/ProjectOptions/ShowWelcomeMsg", "-RegistryValue", "0"])
+
+    # set personal lib
+    personal_lib = os.path.join(os.environ["HOME"], "Ansoft", "Personallib")
+    commands.append(["-RegistryKey", "Desktop/PersonalLib", "-RegistryValue", personal_lib])
+
+    # set Slurm scheduler
+    settings_areg = os.path.join(LAUNCHER_DIR, "slurm_settings.areg")
+    commands.append(["-FromFile", settings_areg])
+
+    runner = get_runner()
+    for command in commands:
+        runner.call(command_base + command)
+
+
+def start_desktop(aedt_path, env, command_key):
+    """Start EDT on the current node in pre/post mode.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the EDT root.
+    env : str
+        String with list of environment variables.
+    command_key :
+        Add key to open Submit or Monitor Job dialog.
+    """
+
+    env_vars = os.environ.copy()
+    if env:
+        for var_value in env.split(","):
+            variable, value = var_value.split("=")
+            env_vars[variable] = value
+
+    command = [os.path.join(aedt_path, "ansysedt")]
+    if command_key:
+        command.append(command_key)
+    print("Electronics Desktop is started via:", subprocess.list2cmdline(command))
+    get_runner().spawn(command, env=env_vars)
+
+
+def check_ssh(path_to_ssh):
+    """Verify that all passwordless SSH are in place.
+
+    Parameters
+    ----------
+    path_to_ssh : str
+        Path to the script that configures SSH for the user.
+    """
+    ssh_path = os.path.join(os.environ["HOME"], ".ssh")
+    for file in ["authorized_keys", "config"]:
+        if not os.path.isfile(os.path.join(ssh_path, file)):
+            if os.path.isdir(ssh_path):
+                shutil.rmtree(ssh_path)
+
+            get_runner().run([path_to_ssh], input="\n\n\n", stderr=None)
+            break
+
+
+def send_statistics(username, hostname, version, job_type):
+    """Send usage statistics to the database.
+
+    Parameters
+    ----------
+    username : str
+        Name of the user.
+    hostname : str
+        Name of the host from which job was started.
+    version : str
+        Version of EDT used.
+    job_type : str
+        Interactive or non-graphical job type.
+    """
+    from influxdb import (
+        InfluxDBClient,  # imported on demand to keep command line interface start fast
+    )
+
+    client = InfluxDBClient(host=STATISTICS_SERVER, port=STATISTICS_PORT)
+    db_name = "aedt_hpc_launcher"
+    client.switch_database(db_name)
+
+    time_now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    json_body = [
+        {
+            "measurement": db_name,
+            "tags": {
+                "username": username,
+                "version": version,
+                "job_type": job_type,
+                "cluster": hostname[:3],
+            },
+            "time": time_now,
+            "fields": {"count": 1},
+        }
+    ]
+
+    client.write_points(json_body)
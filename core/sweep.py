@@ -0,0 +1,497 @@
+"""Parametric sweep of an AEDT project split into chunks solved by the tasks of a Slurm job array.
+
+Variations of an ``OptiParametric`` setup are read from the ``.aedt`` project. The independent sweep definition with
+the most points is split into contiguous ranges and each task of the array solves a copy of the project with its
+range, so that independent variations are solved on as many nodes as are free. A merge job that depends on the array
+(``--dependency=singleton``) collects the variations solved by each task into ``variations.csv``::
+
+    python -m core.sweep --merge /path/to/project_sweep_20210101_120000
+
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import re
+import shlex
+import sys
+import time
+
+from core.batch import batch_command
+from core.batch import check_project
+from core.cache import read_json
+from core.cache import write_json
+from core.config import LAUNCHER_DIR
+from core.submit import SubmissionError
+from core.submit import job_resources
+from core.submit import submit_job
+
+SWEEP_FILE = "sweep.json"
+VARIATIONS_FILE = "variations.csv"
+
+BEGIN_PATTERN = re.compile(r"^\s*\$begin '(.*)'\s*$")
+END_PATTERN = re.compile(r"^\s*\$end '(.*)'\s*$")
+PROPERTY_PATTERN = re.compile(r"^(\s*)(\w+)=(.*?)\s*$")
+NUMBER_PATTERN = re.compile(r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]*)$")
+
+RANGE_TYPES = ["LIN", "LINC", "DEC"]
+
+
+def _unquote(value):
+    return value[1:-1] if len(value) > 1 and value[0] == value[-1] == "'" else value
+
+
+def parse_setups(lines):
+    """Find parametric setups in the lines of ``.aedt`` project.
+
+    Parameters
+    ----------
+    lines : list
+        Lines of the project.
+
+    Returns
+    -------
+    list
+        Setups with ``name``, ``design`` and ``sweeps``. Each sweep definition has ``variable``, ``data``,
+        ``synchronize`` and ``line`` with the index of its ``Data`` line.
+    """
+    setups = []
+    stack = []  # names and properties of open blocks
+    for number, line in enumerate(lines):
+        match = BEGIN_PATTERN.match(line)
+        if match:
+            stack.append((match.group(1), {}))
+            continue
+
+        match = END_PATTERN.match(line)
+        if match and stack:
+            name, properties = stack.pop()
+            if name == "SweepDefinition" and len(stack) > 1 and stack[-1][0] == "Sweeps":
+                stack[-2][1].setdefault("sweeps", []).append(
+                    {
+                        "variable": _unquote(properties.get("Variable", "")),
+                        "data": _unquote(properties.get("Data", "")),
+                        "synchronize": int(properties.get("Synchronize", "0") or 0),
+                        "line": properties.get("line", -1),
+                    }
+                )
+            elif properties.get("SetupType") == "'OptiParametric'":
+                design = next((props["Name"] for _name, props in reversed(stack) if "Name" in props), "")
+                setups.append({"name": name, "design": _unquote(design), "sweeps": properties.get("sweeps", [])})
+            continue
+
+        match = PROPERTY_PATTERN.match(line)
+        if match and stack:
+            stack[-1][1][match.group(2)] = match.group(3)
+            if match.group(2) == "Data":
+                stack[-1][1]["line"] = number
+
+    return setups
+
+
+def read_setups(project):
+    """Get parametric setups of the project, see :func:`parse_setups`."""
+    with open(project, errors="replace") as file:
+        return parse_setups(file.readlines())
+
+
+def _number(text):
+    match = NUMBER_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Cannot parse sweep value {text}")
+    return float(match.group(1)), match.group(2)
+
+
+def sweep_values(data):
+    """Expand ``Data`` of sweep definition to the list of values.
+
+    Parameters
+    ----------
+    data : str
+        ``LIN start stop step``, ``LINC start stop count``, ``DEC start stop points_per_decade`` or single value.
+
+    Returns
+    -------
+    list
+        Values with units, eg ``["1mm", "2mm"]``.
+    """
+    words = data.split()
+    if len(words) == 1:
+        return words
+    if len(words) != 4 or words[0].upper() not in RANGE_TYPES:
+        raise ValueError(f"Sweep {data} is not supported")
+
+    kind = words[0].upper()
+    start, unit = _number(words[1])
+    stop, stop_unit = _number(words[2])
+    if stop_unit != unit:
+        raise ValueError(f"Sweep {data} mixes units")
+
+    if kind == "LIN":
+        step, step_unit = _number(words[3])
+        if step_unit not in ("", unit) or step == 0 or (stop - start) / step < 0:
+            raise ValueError(f"Sweep {data} is wrong")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [start + num * step for num in range(count)]
+    elif kind == "LINC":
+        count = int(words[3])
+        values = [start + (stop - start) * num / (count - 1) for num in range(count)] if count > 1 else [start]
+    else:
+        per_decade = int(words[3])
+        if start <= 0 or stop < start or per_decade < 1:
+            raise ValueError(f"Sweep {data} is wrong")
+        count = int(round(math.log10(stop / start) * per_decade)) + 1
+        values = [start * 10 ** (num / per_decade) for num in range(count)]
+
+    return [f"{value:.12g}{unit}" for value in values]
+
+
+def variations(setup):
+    """Get table of variations solved by the setup.
+
+    Definitions of one variable are merged, synchronized definitions are zipped and the rest are combined.
+
+    Parameters
+    ----------
+    setup : dict
+        Setup from :func:`parse_setups`.
+
+    Returns
+    -------
+    list
+        Values keyed by variable for each variation.
+    """
+    axes = {}  # each axis is a list of points, point is a dict of values
+    for sweep in setup["sweeps"]:
+        key = f"sync{sweep['synchronize']}" if sweep["synchronize"] else sweep["variable"]
+        values = sweep_values(sweep["data"])
+        if not sweep["synchronize"]:
+            axes.setdefault(key, []).extend({sweep["variable"]: value} for value in values)
+            continue
+
+        points = axes.setdefault(key, [{} for _ in values])
+        if len(points) != len(values):
+            raise ValueError(f"Synchronized sweeps of {setup['name']} have different number of points")
+        for point, value in zip(points, values):
+            point[sweep["variable"]] = value
+
+    table = []
+    for combination in itertools.product(*axes.values()):
+        variation = {}
+        for point in combination:
+            variation.update(point)
+        table.append(variation)
+    return table
+
+
+def split_sweep(setup):
+    """Find sweep definition to split between tasks.
+
+    Returns
+    -------
+    tuple
+        Sweep definition and its values, ``(None, [])`` if no definition could be split. Only range of a variable
+        with a single independent definition could be split.
+    """
+    definitions = {}
+    for sweep in setup["sweeps"]:
+        definitions[sweep["variable"]] = definitions.get(sweep["variable"], 0) + 1
+
+    best, best_values = None, []
+    for sweep in setup["sweeps"]:
+        kind = sweep["data"].split()[0].upper() if sweep["data"].strip() else ""
+        if sweep["synchronize"] or definitions[sweep["variable"]] > 1 or kind not in RANGE_TYPES:
+            continue
+        values = sweep_values(sweep["data"])
+        if len(values) > len(best_values):
+            best, best_values = sweep, values
+    return best, best_values
+
+
+def chunk_data(sweep, values):
+    """Build ``Data`` of the sweep definition for a contiguous range of its values."""
+    if len(values) == 1:
+        return values[0]
+
+    kind, _start, _stop, increment = sweep["data"].split()
+    if kind.upper() == "LINC":
+        increment = str(len(values))
+    return f"{kind} {values[0]} {values[-1]} {increment}"
+
+
+def max_tasks(setup):
+    """Get maximum number of tasks the variations of the setup could be split to."""
+    return max(1, len(split_sweep(setup)[1]))
+
+
+def default_tasks(setup, free_cores, task_cores):
+    """Get number of tasks that could start at once on the free cores, limited by :func:`max_tasks`."""
+    return max(1, min(max_tasks(setup), free_cores // max(task_cores, 1)))
+
+
+def write_sweep(project, setup, tasks, sweep_dir):
+    """Write copies of the project with the ranges of the tasks and the plan of the sweep.
+
+    Parameters
+    ----------
+    project : str
+        Path to the ``.aedt`` project.
+    setup : dict
+        Setup from :func:`parse_setups`.
+    tasks : int
+        Requested number of tasks, limited by :func:`max_tasks`.
+    sweep_dir : str
+        Directory for the copies ``task_<number>.aedt``, their results and logs.
+
+    Returns
+    -------
+    dict
+        Plan stored in :data:`SWEEP_FILE`: project, setup, variables and variations of each task.
+    """
+    with open(project, errors="replace") as file:
+        lines = file.readlines()
+
+    sweep, values = split_sweep(setup)
+    tasks = max(1, min(tasks, len(values))) if sweep else 1
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    plan = {"project": os.path.abspath(project), "setup": setup["name"], "design": setup["design"], "tasks": []}
+    for num in range(tasks):
+        task_lines = list(lines)
+        task_setup = setup
+        if sweep:
+            # contiguous ranges that differ by at most one value
+            first, last = len(values) * num // tasks, len(values) * (num + 1) // tasks
+            data = chunk_data(sweep, values[first:last])
+            indent = PROPERTY_PATTERN.match(lines[sweep["line"]]).group(1)
+            task_lines[sweep["line"]] = f"{indent}Data='{data}'\n"
+            task_setup = dict(
+                setup, sweeps=[dict(item, data=data) if item is sweep else item for item in setup["sweeps"]]
+            )
+
+        task_project = f"task_{num}.aedt"
+        with open(os.path.join(sweep_dir, task_project), "w") as file:
+            file.writelines(task_lines)
+        plan["tasks"].append({"project": task_project, "variations": variations(task_setup)})
+
+    plan["variables"] = list(plan["tasks"][0]["variations"][0]) if plan["tasks"][0]["variations"] else []
+    write_json(os.path.join(sweep_dir, SWEEP_FILE), plan)
+    return plan
+
+
+def sweep_script(
+    aedt_path,
+    plan,
+    sweep_dir,
+    job_name,
+    queue,
+    allocation_rule,
+    num,
+    queue_config,
+    env,
+    nodes_list_str="",
+    reservation_id="",
+    exclude_str="",
+    batch_options_file="",
+    max_parallel=0,
+):
+    """Render ``sbatch`` script of the job array, each task solves the setup in its copy of the project.
+
+    Parameters
+    ----------
+    aedt_path : str
+        Path to the installation directory of EDT.
+    plan : dict
+        Plan from :func:`write_sweep`.
+    sweep_dir : str
+        Directory with the copies of the project.
+    job_name : str
+        Name shared by the array and the merge job.
+    queue, allocation_rule, num, queue_config, env
+        Resources of each task, see :func:`core.batch.batch_script`.
+    nodes_list_str, reservation_id, exclude_str, batch_options_file : str, optional
+        Placement and AEDT batch options of each task, see :func:`core.batch.batch_script`.
+    max_parallel : int, optional
+        Maximum number of tasks running at once, by default not limited.
+
+    Returns
+    -------
+    str
+        Content of the script.
+    """
+    resources, total_cores = job_resources(queue, allocation_rule, num, queue_config)
+    array = f"0-{len(plan['tasks']) - 1}" + (f"%{max_parallel}" if max_parallel else "")
+    options = [
+        f"--job-name={job_name}",
+        f"--partition={queue}",
+        *resources,
+        f"--array={array}",
+        f"--chdir={sweep_dir}",
+        f"--output={os.path.join(sweep_dir, 'task_%a.log')}",
+    ]
+    if env:
+        options.append(f"--export={env}")
+    nodes_list_str = nodes_list_str.replace(" ", "")
+    if nodes_list_str:
+        options.append(f"--nodelist={nodes_list_str}")
+    if exclude_str:
+        options.append(f"--exclude={exclude_str}")
+    if reservation_id:
+        options.append(f"--reservation={reservation_id}")
+
+    aedt_command = batch_command(aedt_path, queue, allocation_rule, total_cores, queue_config, batch_options_file)
+    aedt_command += [shlex.quote(f"{plan['design']}:Optimetrics:{plan['setup']}"), '"task_${SLURM_ARRAY_TASK_ID}.aedt"']
+
+    lines = ["#!/bin/bash"]
+    lines += [f"#SBATCH {option}" for option in options]
+    lines += ["", " ".join(aedt_command), ""]
+    return "\n".join(lines)
+
+
+def merge_script(sweep_dir, job_name, queue, queue_config):
+    """Render ``sbatch`` script of the merge job that starts when all tasks of the array with the same name ended."""
+    resources, _total_cores = job_resources(queue, 0, 1, queue_config)
+    options = [
+        f"--job-name={job_name}",
+        f"--partition={queue}",
+        *resources,
+        "--dependency=singleton",
+        f"--chdir={sweep_dir}",
+        f"--output={os.path.join(sweep_dir, 'merge.log')}",
+    ]
+    command = [
+        f"PYTHONPATH={shlex.quote(LAUNCHER_DIR)}",
+        shlex.quote(sys.executable),
+        "-m",
+        "core.sweep",
+        "--merge",
+        shlex.quote(sweep_dir),
+    ]
+
+    lines = ["#!/bin/bash"]
+    lines += [f"#SBATCH {option}" for option in options]
+    lines += ["", " ".join(command), ""]
+    return "\n".join(lines)
+
+
+def submit_sweep(project, setup_name, tasks, submit=None, max_parallel=0, **job_options):
+    """Split parametric setup of the project between tasks of a job array and submit it with the merge job.
+
+    Parameters
+    ----------
+    project : str
+        Path to the ``.aedt`` project.
+    setup_name : str
+        Name of the parametric setup.
+    tasks : int
+        Requested number of tasks, see :func:`write_sweep`.
+    submit : callable, optional
+        Function with arguments of :meth:`core.limits.LimitGate.submit` that submits ``sbatch`` command. The array
+        is submitted with cores of one task and the number of tasks.
+    max_parallel : int, optional
+        Maximum number of tasks running at once.
+    **job_options
+        Options of :func:`sweep_script` except plan, sweep directory and job name.
+
+    Returns
+    -------
+    list
+        Tuples of description, job ID (``None`` if job was not submitted) and message for the array and the merge job.
+
+    Raises
+    ------
+    ValueError
+        If the setup does not exist or its sweep is not supported.
+    """
+    error = check_project(project)
+    if error:
+        return [(f"Sweep of {project}", None, error)]
+
+    setup = next((setup for setup in read_setups(project) if setup["name"] == setup_name), None)
+    if setup is None:
+        raise ValueError(f"{project} does not have parametric setup {setup_name}")
+
+    project_name = os.path.splitext(os.path.basename(project))[0]
+    sweep_dir = os.path.join(
+        os.path.dirname(os.path.abspath(project)), f"{project_name}_sweep_{time.strftime('%Y%m%d_%H%M%S')}"
+    )
+    plan = write_sweep(project, setup, tasks, sweep_dir)
+    job_name = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.basename(sweep_dir))
+
+    scripts = {
+        "sweep.sh": sweep_script(
+            plan=plan, sweep_dir=sweep_dir, job_name=job_name, max_parallel=max_parallel, **job_options
+        ),
+        "merge.sh": merge_script(sweep_dir, job_name, job_options["queue"], job_options["queue_config"]),
+    }
+    for name, script in scripts.items():
+        with open(os.path.join(sweep_dir, name), "w") as file:
+            file.write(script)
+
+    _resources, total_cores = job_resources(
+        job_options["queue"], job_options["allocation_rule"], job_options["num"], job_options["queue_config"]
+    )
+    count = len(plan["tasks"])
+    jobs = [
+        ("sweep.sh", total_cores, count, f"Sweep of {setup_name} in {project} ({count} tasks)", ""),
+        ("merge.sh", 1, 1, f"Merge of the sweep of {setup_name} in {project}", os.path.join(sweep_dir, "merge.log")),
+    ]
+
+    results = []
+    for name, cores, job_tasks, description, output in jobs:
+        command = ["sbatch", os.path.join(sweep_dir, name)]
+        try:
+            if submit:
+                pid = submit(command, job_options["queue"], cores, description, output, job_tasks)
+            else:
+                pid = submit_job(command)
+        except SubmissionError as exc:
+            results.append((description, None, str(exc)))
+        else:
+            results.append((description, pid, f"{description} submitted\nJob script: {command[1]}"))
+    return results
+
+
+def merge(sweep_dir):
+    """Collect variations solved by each task into :data:`VARIATIONS_FILE`.
+
+    Task is solved if AEDT created results folder of its project.
+
+    Returns
+    -------
+    tuple
+        Number of solved tasks and number of all tasks.
+    """
+    plan = read_json(os.path.join(sweep_dir, SWEEP_FILE))
+    if plan is None:
+        raise FileNotFoundError(f"{sweep_dir} does not have {SWEEP_FILE}")
+
+    solved = 0
+    rows = []
+    for num, task in enumerate(plan["tasks"]):
+        task_project = os.path.join(sweep_dir, task["project"])
+        done = os.path.isdir(os.path.splitext(task_project)[0] + ".aedtresults")
+        solved += done
+        for variation in task["variations"]:
+            rows.append([num, "yes" if done else "no", task_project] + [variation[var] for var in plan["variables"]])
+
+    with open(os.path.join(sweep_dir, VARIATIONS_FILE), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["task", "solved", "project"] + plan["variables"])
+        writer.writerows(rows)
+    return solved, len(plan["tasks"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect results of parametric sweep tasks")
+    parser.add_argument("--merge", required=True, help="Sweep directory")
+    args = parser.parse_args(argv)
+
+    solved, tasks = merge(args.merge)
+    print(f"{solved} of {tasks} tasks solved, variations are listed in {os.path.join(args.merge, VARIATIONS_FILE)}")
+    return 0 if solved == tasks else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Incremental reading of growing job output files."""
+import os
+from collections import deque
+
+
+class FileTailer:
+    """Read only new lines of the files since the previous call.
+
+    Offset of each file is kept between calls. If file is truncated or replaced by a new file (rotation), it is read
+    from the beginning. Memory is capped: each call reads at most ``max_read`` bytes of a file (the rest is read by
+    next calls) and incomplete last line is kept up to ``max_line`` bytes. :meth:`flush` keeps only the last
+    ``max_flush_lines`` lines of the rest of the file.
+
+    Parameters
+    ----------
+    max_read : int, optional
+        Maximum number of bytes read from a file per call.
+    max_line : int, optional
+        Maximum length of a line in bytes, longer lines are split.
+    max_flush_lines : int, optional
+        Maximum number of lines returned by :meth:`flush`.
+    """
+
+    def __init__(self, max_read=64 * 1024, max_line=4 * 1024, max_flush_lines=1000):
+        self.max_read = max_read
+        self.max_line = max_line
+        self.max_flush_lines = max_flush_lines
+        self.dropped = 0  # lines dropped by the last flush
+        self._files = {}  # path: [inode, offset, incomplete line]
+
+    def read(self, path):
+        """Read new complete lines of the file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file.
+
+        Returns
+        -------
+        list
+            New lines without line endings. Empty if file does not exist or has no new lines.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return []
+
+        inode, offset, partial = self._files.get(path, [stat.st_ino, 0, b""])
+        if inode != stat.st_ino or stat.st_size < offset:
+            # rotated or truncated
+            inode, offset, partial = stat.st_ino, 0, b""
+
+        if stat.st_size == offset:
+            self._files[path] = [inode, offset, partial]
+            return []
+
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = file.read(self.max_read)
+
+        offset += len(data)
+        chunks = (partial + data).split(b"\n")
+        partial = chunks.pop()
+        lines = []
+        for chunk in chunks:
+            lines += self._split_long(chunk)
+
+        if len(partial) > self.max_line:
+            lines += self._split_long(partial)
+            partial = b""
+
+        self._files[path] = [inode, offset, partial]
+        return [line.decode("utf-8", errors="replace").rstrip("\r") for line in lines]
+
+    def _split_long(self, line):
+        """Split line into parts of at most ``max_line`` bytes."""
+        parts = []
+        for start in range(0, len(line), self.max_line):
+            end = start + self.max_line
+            parts.append(line[start:end])
+        return parts or [line]
+
+    def flush(self, path):
+        """Read the rest of the file including incomplete last line and stop tracking it.
+
+        Only the last ``max_flush_lines`` lines are kept, so a huge output of a finished job is not loaded into memory.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file.
+
+        Returns
+        -------
+        list
+            Remaining lines. If some lines were dropped, the first line is a notice with their number and the path.
+        """
+        lines = deque(maxlen=self.max_flush_lines)
+        read_lines = 0
+        while True:
+            new_lines = self.read(path)
+            if not new_lines:
+                break
+            read_lines += len(new_lines)
+            lines.extend(new_lines)
+
+        state = self._files.pop(path, None)
+        if state and state[2]:
+            read_lines += 1
+            lines.append(state[2].decode("utf-8", errors="replace").rstrip("\r"))
+
+        lines = list(lines)
+        self.dropped = read_lines - len(lines)
+        if self.dropped:
+            lines.insert(0, f"... {self.dropped} lines truncated, see {path}")
+        return lines
+
+    def forget(self, path):
+        """Stop tracking the file."""
+        self._files.pop(path, None)
+
+    @property
+    def paths(self):
+        """Paths of the tracked files."""
+        return list(self._files)
@@ -0,0 +1,258 @@
+"""Prediction of the queue wait time from the accounting history of the partitions."""
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from core.cache import read_json
+from core.cache import write_json
+from core.runner import get_runner
+
+SACCT_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# upper edges of wait time bins in seconds, last bin is open
+WAIT_BINS = [30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 28800, 86400]
+CORE_BUCKETS = [1, 4, 16]  # single node jobs: up to 1, 4, 16 or more cores
+NODE_BUCKETS = [2, 4, 8]  # multiple node jobs: up to 2, 4, 8 or more nodes
+HOUR_BUCKETS = 4  # time of day split in 6 hour intervals
+
+MIN_SAMPLES = 5  # do not trust statistics with fewer jobs
+
+
+def size_class(nodes, cores):
+    """Get size class of the job.
+
+    Parameters
+    ----------
+    nodes : int
+        Number of requested nodes.
+    cores : int
+        Number of requested cores.
+
+    Returns
+    -------
+    str
+        Size class, eg ``c4`` for single node jobs up to 4 cores or ``n8`` for jobs up to 8 nodes.
+    """
+    if nodes > 1:
+        bucket = next((edge for edge in NODE_BUCKETS if nodes <= edge), "max")
+        return f"n{bucket}"
+
+    bucket = next((edge for edge in CORE_BUCKETS if cores <= edge), "max")
+    return f"c{bucket}"
+
+
+def parse_sacct_time(value):
+    """Convert ``sacct`` timestamp to epoch seconds, ``None`` for ``Unknown``/``None`` values."""
+    try:
+        return datetime.strptime(value, SACCT_TIME_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+
+def format_wait(seconds):
+    """Convert seconds to human readable string."""
+    if seconds < 60:
+        return "less than a minute"
+    if seconds < 3600:
+        return f"{round(seconds / 60)} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return "more than a day"
+
+
+class WaitTimePredictor:
+    """Wait time statistics per partition, job size and time of day.
+
+    Wait times are accumulated in histograms with logarithmic bins, one ``array`` per partition, size class and time
+    of day. Each refresh only requests records that started after the previous refresh and adds them to the
+    histograms, older statistics slowly decay, so that the prediction follows the recent cluster behavior.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the JSON file with accumulated statistics.
+    partitions : iterable
+        Names of the partitions to track.
+    refresh_period : int, optional
+        Minimum time between requests to the accounting database in seconds.
+    lookback_days : int, optional
+        Depth of history requested on the first run.
+    half_life_days : float, optional
+        Time after which weight of the collected statistics halves.
+    """
+
+    def __init__(self, cache_file, partitions, refresh_period=600, lookback_days=7, half_life_days=7):
+        self.cache_file = cache_file
+        self.partitions = list(partitions)
+        self.refresh_period = refresh_period
+        self.lookback = lookback_days * 86400
+        self.half_life = half_life_days * 86400
+
+        self.histograms = {}
+        self.watermark = 0  # latest start time seen
+        self.seen = {}  # job IDs that started near watermark, to skip them on overlapping request
+        self.updated = 0
+        self._lock = threading.Lock()
+
+        cached = read_json(self.cache_file, default={})
+        if isinstance(cached, dict) and len(cached.get("bins", [])) == len(WAIT_BINS) + 1:
+            self.watermark = cached.get("watermark", 0)
+            self.seen = cached.get("seen", {})
+            self.updated = cached.get("updated", 0)
+            self.histograms = {key: array("d", hist) for key, hist in cached.get("histograms", {}).items()}
+
+    def is_outdated(self):
+        """Check if statistics should be refreshed."""
+        return time.time() - self.updated > self.refresh_period
+
+    def query_start(self):
+        """Get start of the time window of the next request."""
+        # overlap with previous request to catch records that were written to the database with delay
+        return max(self.watermark - 3600, time.time() - self.lookback)
+
+    def sacct_command(self, since=None):
+        """Command to request allocations that started since the previous refresh, see :meth:`query_start`."""
+        since = self.query_start() if since is None else since
+        return [
+            "sacct",
+            "--allusers",
+            "--allocations",
+            "--noheader",
+            "--parsable2",
+            "--partition",
+            ",".join(self.partitions),
+            "--starttime",
+            datetime.fromtimestamp(since).strftime(SACCT_TIME_FORMAT),
+            "--format",
+            "JobID,Partition,Submit,Start,NNodes,NCPUS",
+        ]
+
+    def refresh(self, sacct_output=None):
+        """Add new accounting records to the statistics.
+
+        Parameters
+        ----------
+        sacct_output : str, optional
+            Output of :meth:`sacct_command`. If not provided, ``sacct`` is called.
+
+        Returns
+        -------
+        int
+            Number of records added to the statistics.
+        """
+        since = self.query_start()
+        if sacct_output is None:
+            sacct_output = get_runner().check_output(self.sacct_command(since))
+
+        now = time.time()
+        with self._lock:
+            if self.updated:
+                decay = 0.5 ** ((now - self.updated) / self.half_life)
+                for hist in self.histograms.values():
+                    for i, count in enumerate(hist):
+                        hist[i] = count * decay
+
+            added = 0
+            for line in sacct_output.splitlines():
+                fields = line.strip().split("|")
+                if len(fields) != 6 or fields[0] in self.seen:
+                    continue
+
+                job_id, partition, submit, start, nodes, cores = fields
+                submit = parse_sacct_time(submit)
+                start = parse_sacct_time(start)
+                if partition not in self.partitions or submit is None or start is None or start > now:
+                    continue
+                if start < since:
+                    # sacct also returns jobs that started earlier and are still running, they were counted before
+                    continue
+
+                try:
+                    key = self.key(partition, int(nodes), int(cores), submit)
+                except ValueError:
+                    continue
+
+                hist = self.histograms.setdefault(key, array("d", [0.0]) * (len(WAIT_BINS) + 1))
+                hist[self.wait_bin(start - submit)] += 1
+                self.seen[job_id] = start
+                self.watermark = max(self.watermark, start)
+                added += 1
+
+            # only jobs inside of the overlap window could be returned again
+            self.seen = {job: start for job, start in self.seen.items() if start >= self.watermark - 3600}
+            self.updated = now
+
+            write_json(
+                self.cache_file,
+                {
+                    "bins": WAIT_BINS + [None],
+                    "watermark": self.watermark,
+                    "seen": self.seen,
+                    "updated": self.updated,
+                    "histograms": {key: hist.tolist() for key, hist in self.histograms.items()},
+                },
+            )
+
+        return added
+
+    @staticmethod
+    def key(partition, nodes, cores, timestamp):
+        """Build histogram key from partition, job size and time of day of the submission."""
+        hour_bucket = datetime.fromtimestamp(timestamp).hour * HOUR_BUCKETS // 24
+        return f"{partition}|{size_class(nodes, cores)}|{hour_bucket}"
+
+    @staticmethod
+    def wait_bin(wait):
+        """Get index of the histogram bin for the wait time in seconds."""
+        return next((i for i, edge in enumerate(WAIT_BINS) if wait <= edge), len(WAIT_BINS))
+
+    def estimate(self, partition, nodes, cores, timestamp=None):
+        """Estimate wait time for the job submitted now.
+
+        If there is not enough statistics for the current time of day, statistics for the whole day is used.
+
+        Parameters
+        ----------
+        partition : str
+            Name of the partition.
+        nodes : int
+            Number of requested nodes.
+        cores : int
+            Number of requested cores.
+        timestamp : float, optional
+            Submission time, by default current time.
+
+        Returns
+        -------
+        tuple or None
+            Median and 90th percentile of the wait time in seconds and number of jobs in the statistics. ``None``
+            if there is not enough statistics.
+        """
+        key = self.key(partition, nodes, cores, timestamp or time.time())
+        prefix = key.rsplit("|", 1)[0] + "|"
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None or sum(hist) < MIN_SAMPLES:
+                hist = array("d", [0.0]) * (len(WAIT_BINS) + 1)
+                for hist_key, values in self.histograms.items():
+                    if hist_key.startswith(prefix):
+                        hist = array("d", map(sum, zip(hist, values)))
+
+        total = sum(hist)
+        if total < MIN_SAMPLES:
+            return None
+
+        return self.quantile(hist, 0.5), self.quantile(hist, 0.9), round(total)
+
+    @staticmethod
+    def quantile(hist, fraction):
+        """Get upper edge of the bin where cumulative count reaches the fraction of all jobs."""
+        threshold = sum(hist) * fraction
+        cumulative = 0
+        for i, count in enumerate(hist):
+            cumulative += count
+            if cumulative >= threshold:
+                return WAIT_BINS[min(i, len(WAIT_BINS) - 1)]
+
+        return WAIT_BINS[-1]
@@ -0,0 +1,852 @@
+"""
+Command line interface of AEDT Launcher.
+
+Submits, lists and controls (cancel, hold, release, requeue) jobs and warm allocations without starting the UI, eg
+from ssh session, cron or CI.
+Uses the same cluster_configuration.json as the UI and settings saved in the UI as default (~/.aedt/default.json).
+Does not import wx.
+"""
+import argparse
+import getpass
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from core.batch import submit_batch
+from core.config import DEFAULT_SCRATCH_DIR
+from core.config import ConfigurationError
+from core.config import ensure_app_folder
+from core.config import load_cluster_config
+from core.config import read_custom_builds
+from core.config import read_product
+from core.config import read_settings
+from core.exclusions import ExcludedNodes
+from core.hpc import apply_profile
+from core.jobdb import JobDatabase
+from core.licenses import LicenseProbe
+from core.limits import HeldQueue
+from core.limits import LimitCache
+from core.limits import LimitGate
+from core.limits import SubmissionHeld
+from core.nodes import NodeInventory
+from core.nodes import check_nodelist
+from core.nodes import is_available
+from core.pool import SessionPool
+from core.pool import pool_settings
+from core.reservations import ReservationCache
+from core.reservations import free_cores
+from core.runner import format_metrics
+from core.runner import get_runner
+from core.sizing import SizingAdvisor
+from core.staging import project_include
+from core.staging import staging_prefix
+from core.submit import ALLOCATIONS
+from core.submit import JOB_ACTIONS
+from core.submit import SubmissionError
+from core.submit import build_env
+from core.submit import check_ssh
+from core.submit import control_jobs
+from core.submit import display_value
+from core.submit import interactive_command
+from core.submit import list_jobs
+from core.submit import send_statistics
+from core.submit import session_command
+from core.submit import update_registry
+from core.sweep import default_tasks
+from core.sweep import read_setups
+from core.sweep import submit_sweep
+from core.sweep import variations
+
+# seconds after which cached node inventory is refreshed before node list validation
+INVENTORY_MAX_AGE = 600
+
+
+def parse_args(argv, settings, cluster_config):
+    """Parse command line arguments. Default values are taken from the settings saved in the UI.
+
+    Parameters
+    ----------
+    argv : list
+        Command line arguments.
+    settings : dict
+        Default settings of the user.
+    cluster_config : dict
+        Cluster configuration.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Submit, list and control AEDT jobs without UI")
+    parser.add_argument("--debug", help="Debug mode, do not send usage statistics", action="store_true")
+    parser.add_argument("--metrics", help="Print duration and exit codes of scheduler calls", action="store_true")
+    subparsers = parser.add_subparsers(dest="action")
+    subparsers.required = True
+
+    default_queue = settings.get("queue", cluster_config["default_queue"])
+    if default_queue not in cluster_config["queue_config_dict"]:
+        default_queue = cluster_config["default_queue"]
+
+    # resources and environment shared by interactive and batch jobs
+    job_parser = argparse.ArgumentParser(add_help=False)
+    job_parser.add_argument("--queue", default=default_queue, choices=list(cluster_config["queue_config_dict"]))
+    job_parser.add_argument(
+        "--allocation",
+        choices=["cores", "nodes"],
+        default="cores" if settings.get("allocation") == ALLOCATIONS[0] else "nodes",
+        help="Request cores on a single node or multiple whole nodes",
+    )
+    job_parser.add_argument("--num", type=int, default=int(settings.get("num_cores") or 1), help="Cores or nodes")
+    job_parser.add_argument("--version", default=settings.get("aedt_version", cluster_config["default_version"]))
+    job_parser.add_argument("--env", default=settings.get("env_var", ""), help="VAR1=VALUE1,VAR2=VALUE2")
+    job_parser.add_argument(
+        "--nodelist",
+        default=settings.get("node_list", "") if settings.get("use_node_list") else "",
+        help="Nodes to run the job on",
+    )
+    job_parser.add_argument(
+        "--reservation",
+        default=settings.get("reservation_id", "") if settings.get("use_reservation") else "",
+        help="Reservation ID",
+    )
+    job_parser.add_argument(
+        "--project-path",
+        default=settings.get("project_path", os.path.join(cluster_config["user_project_path_root"], getpass.getuser())),
+    )
+    job_parser.add_argument(
+        "--stage",
+        action="store_true",
+        default=settings.get("stage_project", False),
+        help="Copy projects to node-local scratch for the time of the job",
+    )
+    job_parser.add_argument(
+        "--stage-project",
+        action="append",
+        default=[],
+        help="Project in the project path to stage for interactive session, by default the whole project path",
+    )
+    job_parser.add_argument(
+        "--no-exclude",
+        dest="exclude",
+        action="store_false",
+        help="Do not avoid down, drained or recently failing nodes",
+    )
+
+    submit_parser = subparsers.add_parser("submit", parents=[job_parser], help="Submit interactive session")
+    submit_parser.add_argument("--display", default=os.getenv("DISPLAY", ""), help="Display to send session to")
+    submit_parser.add_argument(
+        "--no-pool", dest="pool", action="store_false", help="Do not start session in idle warm allocation"
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch", parents=[job_parser], help="Solve projects in non-graphical mode, one job per project"
+    )
+    batch_parser.add_argument("projects", nargs="+", metavar="PROJECT", help="Path to .aedt project")
+
+    sweep_parser = subparsers.add_parser(
+        "sweep", parents=[job_parser], help="Solve parametric setup of a project in tasks of a job array"
+    )
+    sweep_parser.add_argument("project", metavar="PROJECT", help="Path to .aedt project")
+    sweep_parser.add_argument("--setup", help="Parametric setup, required if the project has several")
+    sweep_parser.add_argument("--tasks", type=int, help="Number of tasks, by default as many as could start now")
+    sweep_parser.add_argument("--max-parallel", type=int, default=0, help="Maximum number of running tasks")
+    sweep_parser.add_argument("--list", action="store_true", help="Print variations of the setup and exit")
+
+    list_parser = subparsers.add_parser("list", help="List jobs of the user")
+    list_parser.add_argument("--json", action="store_true", help="Print jobs as JSON")
+
+    reservations_parser = subparsers.add_parser("reservations", help="List reservations available to the user")
+    reservations_parser.add_argument("--json", action="store_true", help="Print reservations as JSON")
+
+    pool_parser = subparsers.add_parser("pool", help="Show, fill or release warm allocations for sessions")
+    pool_parser.add_argument("--queue", default=default_queue, help="Queue with session pool")
+    pool_parser.add_argument("--fill", type=int, metavar="SIZE", help="Keep SIZE allocations waiting for session")
+    pool_parser.add_argument("--release", action="store_true", help="Cancel waiting allocations of the queue")
+    pool_parser.add_argument("--json", action="store_true", help="Print allocations as JSON")
+
+    held_parser = subparsers.add_parser("held", help="Show submissions held by the launcher due to QOS limits")
+    held_parser.add_argument("--release", action="store_true", help="Submit held jobs that fit into limits now")
+    held_parser.add_argument("--drop", nargs="+", default=[], metavar="ID", help="Remove held submissions")
+    held_parser.add_argument("--json", action="store_true", help="Print held submissions as JSON")
+
+    history_parser = subparsers.add_parser("history", help="List jobs submitted by the launcher, newest first")
+    history_parser.add_argument("--version", help="Only jobs of this AEDT version")
+    history_parser.add_argument("--limit", type=int, default=20, help="Number of jobs to print")
+    history_parser.add_argument("--offset", type=int, default=0, help="Number of newer jobs to skip")
+    history_parser.add_argument("--json", action="store_true", help="Print jobs as JSON")
+
+    for action in JOB_ACTIONS:
+        action_parser = subparsers.add_parser(action, help=f"{action.capitalize()} jobs with a single scheduler call")
+        action_parser.add_argument("job_ids", nargs="+", metavar="JOB_ID")
+
+    return parser.parse_args(argv)
+
+
+def validate_nodelist(args, app_dir):
+    """Validate and compress node list of the job against cached node inventory.
+
+    Inventory is refreshed from ``sinfo`` if it is older than :data:`INVENTORY_MAX_AGE`.
+
+    Returns
+    -------
+    bool
+        ``True`` if node list is empty or valid.
+    """
+    if not args.nodelist:
+        return True
+
+    inventory = NodeInventory(os.path.join(app_dir, "node_inventory.json"))
+    if time.time() - inventory.updated > INVENTORY_MAX_AGE:
+        try:
+            inventory.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get node inventory from sinfo, cached inventory is used", file=sys.stderr)
+
+    try:
+        args.nodelist = check_nodelist(
+            args.nodelist, args.queue, inventory, max_nodes=1 if args.allocation == "cores" else args.num
+        )
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return False
+
+    return True
+
+
+def excluded_nodes(app_dir, queue, nodelist=""):
+    """Get nodes of the queue to avoid with ``--exclude`` and report them.
+
+    Nodes are refreshed from ``sinfo`` and ``sacct`` if the cache is outdated, cached nodes are used if it fails.
+    Requested nodes are never excluded.
+
+    Returns
+    -------
+    str
+        Hostlist expression, empty if nothing is avoided.
+    """
+    excluded = ExcludedNodes(os.path.join(app_dir, "excluded_nodes.json"))
+    if excluded.is_outdated():
+        try:
+            excluded.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get unavailable nodes from sinfo and sacct, cached nodes are used", file=sys.stderr)
+
+    for node, reason in excluded.pinned(nodelist).items():
+        print(f"Warning: requested node {node} is avoided by other submissions ({reason})", file=sys.stderr)
+
+    inventory = NodeInventory(os.path.join(app_dir, "node_inventory.json"))
+    exclude_str = excluded.exclude(queue, inventory, nodelist)
+    if exclude_str:
+        print(f"Avoiding down, drained or failing nodes: {exclude_str}", file=sys.stderr)
+    return exclude_str
+
+
+def license_probe(cluster_config, app_dir):
+    """Get cached availability of licenses, ``None`` if licenses are not configured."""
+    if not cluster_config.get("licenses"):
+        return None
+    return LicenseProbe(cluster_config["licenses"], os.path.join(app_dir, "licenses.json"))
+
+
+def warn_licenses(cluster_config, app_dir, cores, jobs=1):
+    """Print warning if license server does not have enough free licenses and licenses are configured to warn."""
+    probe = license_probe(cluster_config, app_dir)
+    if probe is not None and probe.action == "warn":
+        shortage = probe.shortage(cores, jobs)
+        if shortage:
+            print(f"Warning: license server reports {shortage}, AEDT may fail to start", file=sys.stderr)
+
+
+def limit_gate(app_dir, cluster_config):
+    """Get gate that holds submissions exceeding QOS and association limits of the user.
+
+    Limits are refreshed from ``sacctmgr`` if they are outdated, cached limits are used if it fails. Submissions are
+    also held without free licenses if licenses are configured to hold.
+    """
+    limits = LimitCache(os.path.join(app_dir, "limits.json"))
+    if limits.is_outdated():
+        try:
+            limits.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get limits from sacctmgr, cached limits are used", file=sys.stderr)
+
+    try:
+        jobs = list_jobs()
+    except (subprocess.CalledProcessError, OSError):
+        jobs = []
+
+    probe = license_probe(cluster_config, app_dir)
+    checks = [probe.check] if probe is not None and probe.action == "hold" else []
+    return LimitGate(limits.limits, jobs, HeldQueue(os.path.join(app_dir, "held_jobs.json")), checks)
+
+
+def prepare_launch(args, cluster_config, install_dir, job_type):
+    """Common steps before any submission: SSH, registry and statistics.
+
+    Returns
+    -------
+    str or None
+        Path to EDT, ``None`` if submission should be aborted.
+    """
+    if args.version not in install_dir:
+        print(f"Version {args.version} is not installed. Available: {', '.join(install_dir)}", file=sys.stderr)
+        return None
+
+    aedt_path = install_dir[args.version]
+    try:
+        product = read_product(aedt_path)
+    except FileNotFoundError:
+        print(f"Installation is corrupted {aedt_path}", file=sys.stderr)
+        return None
+
+    check_ssh(cluster_config["path_to_ssh"])
+    try:
+        update_registry(aedt_path, product, args.project_path)
+    except FileNotFoundError:
+        print("Verify project directory. Probably user name was changed", file=sys.stderr)
+        return None
+    except subprocess.CalledProcessError as exc:
+        print(f"Cannot set registry of Electronics Desktop: {exc}", file=sys.stderr)
+        return None
+
+    if not args.debug:
+        try:
+            send_statistics(getpass.getuser(), socket.gethostname(), args.version, job_type)
+        except Exception:
+            # not worry a lot
+            print("Error sending statistics", file=sys.stderr)
+
+    return aedt_path
+
+
+def submit(args, cluster_config, install_dir, app_dir):
+    """Submit interactive session. Returns exit code."""
+    try:
+        display_node = display_value(args.display, socket.gethostname())
+    except EnvironmentError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    if not validate_nodelist(args, app_dir):
+        return 1
+
+    user_root = os.path.join(cluster_config["user_project_path_root"], getpass.getuser())
+    if args.stage and not args.stage_project and os.path.normpath(args.project_path) == os.path.normpath(user_root):
+        print(
+            f"--stage would copy whole {user_root}, select projects with --stage-project or a project folder with "
+            "--project-path",
+            file=sys.stderr,
+        )
+        return 1
+
+    aedt_path = prepare_launch(args, cluster_config, install_dir, "interactive")
+    if aedt_path is None:
+        return 1
+
+    env, batch_options_file = apply_profile(
+        cluster_config,
+        args.queue,
+        build_env(args.env, cluster_config.get("environment_vars")),
+        os.path.join(app_dir, "hpc_options"),
+    )
+    wrapper = []
+    if args.stage:
+        scratch_dir = cluster_config.get("scratch_dir", DEFAULT_SCRATCH_DIR)
+        wrapper = staging_prefix(
+            args.project_path,
+            scratch_dir,
+            project_include(args.stage_project),
+            aedt_path=aedt_path,
+            product=read_product(aedt_path),
+        )
+
+    try:
+        command = interactive_command(
+            aedt_path,
+            env,
+            args.queue,
+            0 if args.allocation == "cores" else 1,
+            args.num,
+            cluster_config["queue_config_dict"],
+            display_node,
+            args.nodelist,
+            args.reservation,
+            batch_options_file,
+            wrapper,
+            os.path.expanduser("~"),
+            exclude_str=excluded_nodes(app_dir, args.queue, args.nodelist) if args.exclude else "",
+        )
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    if args.pool and args.allocation == "cores" and not args.nodelist and not args.reservation:
+        session = session_command(
+            aedt_path, args.queue, 0, args.num, cluster_config["queue_config_dict"], batch_options_file, wrapper
+        )
+        claimed = claim_pool_session(args, session, f"{env},DISPLAY={display_node}".lstrip(","), app_dir)
+        if claimed:
+            print(claimed)
+            return 0
+
+    warn_licenses(cluster_config, app_dir, total_cores(args, cluster_config))
+    gate = limit_gate(app_dir, cluster_config)
+    sizing = sizing_advice(args, cluster_config, app_dir, gate.jobs)
+    record_submit = job_database(app_dir).recorder(gate.submit, job_nodes(args), args.version, args.project_path)
+    try:
+        pid = record_submit(command, args.queue, total_cores(args, cluster_config), "Interactive session")
+    except SubmissionHeld as exc:
+        print(exc, file=sys.stderr)
+        print(exc.entry_id)
+        return 0
+    except (SubmissionError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    sizing.register(pid, args.version, args.project_path)
+    print(pid)
+    return 0
+
+
+def sizing_advice(args, cluster_config, app_dir, jobs):
+    """Collect usage of ended jobs and print a hint if recent jobs in the project used less than requested.
+
+    Returns
+    -------
+    core.sizing.SizingAdvisor
+        Advisor to register the new job.
+    """
+    queue_config = cluster_config["queue_config_dict"]
+    sizing = SizingAdvisor(os.path.join(app_dir, "sizing.json"))
+    try:
+        sizing.ingest([job["pid"] for job in jobs], queue_config)
+    except (subprocess.CalledProcessError, OSError):
+        print("Cannot get usage of ended jobs from sacct", file=sys.stderr)
+
+    advice = sizing.advise(args.version, args.project_path, args.queue, queue_config)
+    if advice and (advice["cores"] < total_cores(args, cluster_config) or advice["queue"] != args.queue):
+        print(
+            f"Hint: your last {advice['jobs']} {args.version} jobs in this project used {advice['used']:.0f} cores "
+            f"on average and up to {advice['max_rss']:.0f}GB RAM, {advice['cores']} cores of {advice['queue']} "
+            "are enough",
+            file=sys.stderr,
+        )
+    return sizing
+
+
+def job_database(app_dir):
+    """Open history of the jobs submitted by the launcher."""
+    return JobDatabase(os.path.join(app_dir, "jobs.db"))
+
+
+def job_nodes(args):
+    """Get number of nodes requested by the arguments."""
+    return 1 if args.allocation == "cores" else args.num
+
+
+def total_cores(args, cluster_config):
+    """Get total number of cores requested by the arguments."""
+    if args.allocation == "cores":
+        return args.num
+    return args.num * cluster_config["queue_config_dict"][args.queue]["cores"]
+
+
+def claim_pool_session(args, session, env, app_dir):
+    """Start session in idle warm allocation of the queue.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Arguments of ``submit`` command.
+    session : str
+        Shell command of the session, see :func:`core.submit.session_command`.
+    env : str
+        Environment variables of the session including ``DISPLAY``.
+    app_dir : str
+        Application folder.
+
+    Returns
+    -------
+    str or None
+        Job ID of the allocation, ``None`` if there is no idle allocation.
+    """
+    pool = SessionPool(os.path.join(app_dir, "pool"))
+    if not pool.allocations():
+        return None
+
+    try:
+        jobs = list_jobs()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+    claimed = pool.claim(args.queue, args.num, session, env, os.path.expanduser("~"), jobs)
+    if claimed is None:
+        return None
+
+    pid, node = claimed
+    job_database(app_dir).record(
+        pid, "Warm session", session, args.queue, args.num, version=args.version, project=args.project_path
+    )
+    print(f"Session started in warm allocation on {node}", file=sys.stderr)
+    return pid
+
+
+def batch(args, cluster_config, install_dir, app_dir):
+    """Submit batch solve of each project. Returns exit code."""
+    if not validate_nodelist(args, app_dir):
+        return 1
+
+    aedt_path = prepare_launch(args, cluster_config, install_dir, "batch")
+    if aedt_path is None:
+        return 1
+
+    env, batch_options_file = apply_profile(
+        cluster_config,
+        args.queue,
+        build_env(args.env, cluster_config.get("environment_vars")),
+        os.path.join(app_dir, "hpc_options"),
+    )
+    warn_licenses(cluster_config, app_dir, total_cores(args, cluster_config), len(args.projects))
+    try:
+        results = submit_batch(
+            args.projects,
+            os.path.join(app_dir, "batch"),
+            aedt_path=aedt_path,
+            queue=args.queue,
+            allocation_rule=0 if args.allocation == "cores" else 1,
+            num=args.num,
+            queue_config=cluster_config["queue_config_dict"],
+            env=env,
+            nodes_list_str=args.nodelist,
+            reservation_id=args.reservation,
+            exclude_str=excluded_nodes(app_dir, args.queue, args.nodelist) if args.exclude else "",
+            batch_options_file=batch_options_file,
+            scratch_dir=cluster_config.get("scratch_dir", DEFAULT_SCRATCH_DIR) if args.stage else "",
+            submit=job_database(app_dir).recorder(
+                limit_gate(app_dir, cluster_config).submit, job_nodes(args), args.version
+            ),
+        )
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    sizing = SizingAdvisor(os.path.join(app_dir, "sizing.json"))
+    exit_code = 0
+    for project, pid, msg in results:
+        if pid:
+            sizing.register(pid, args.version, os.path.abspath(project))
+            print(f"{pid} {project}")
+        else:
+            print(msg, file=sys.stderr)
+            exit_code = 1
+    return exit_code
+
+
+def free_queue_cores(queue, app_dir):
+    """Get number of idle cores of available nodes of the queue from node inventory refreshed if outdated."""
+    inventory = NodeInventory(os.path.join(app_dir, "node_inventory.json"))
+    if time.time() - inventory.updated > INVENTORY_MAX_AGE:
+        try:
+            inventory.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get node inventory from sinfo, cached inventory is used", file=sys.stderr)
+    return sum(node["idle_cores"] for node in inventory.partition_nodes(queue) if is_available(node))
+
+
+def sweep(args, cluster_config, install_dir, app_dir):
+    """Submit parametric setup of the project as a job array with a merge job. Returns exit code."""
+    try:
+        setups = read_setups(args.project)
+    except OSError as exc:
+        print(f"Cannot read {args.project}: {exc}", file=sys.stderr)
+        return 1
+
+    names = [setup["name"] for setup in setups]
+    if args.setup:
+        setup = next((setup for setup in setups if setup["name"] == args.setup), None)
+    else:
+        setup = setups[0] if len(setups) == 1 else None
+    if setup is None:
+        print(f"Select one of parametric setups with --setup: {', '.join(names) or 'none found'}", file=sys.stderr)
+        return 1
+
+    try:
+        table = variations(setup)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    if args.list:
+        variables = list(table[0]) if table else []
+        print("\t".join(variables))
+        for variation in table:
+            print("\t".join(variation[variable] for variable in variables))
+        return 0
+
+    if args.stage:
+        print("--stage is not supported for sweeps, tasks solve the projects in place", file=sys.stderr)
+        return 1
+
+    if not validate_nodelist(args, app_dir):
+        return 1
+
+    aedt_path = prepare_launch(args, cluster_config, install_dir, "batch")
+    if aedt_path is None:
+        return 1
+
+    env, batch_options_file = apply_profile(
+        cluster_config,
+        args.queue,
+        build_env(args.env, cluster_config.get("environment_vars")),
+        os.path.join(app_dir, "hpc_options"),
+    )
+    cores = total_cores(args, cluster_config)
+    tasks = args.tasks or default_tasks(setup, free_queue_cores(args.queue, app_dir), cores)
+    print(f"{len(table)} variations of {setup['name']} are split into up to {tasks} tasks", file=sys.stderr)
+    warn_licenses(cluster_config, app_dir, cores, tasks)
+    try:
+        results = submit_sweep(
+            args.project,
+            setup["name"],
+            tasks,
+            submit=job_database(app_dir).recorder(
+                limit_gate(app_dir, cluster_config).submit, job_nodes(args), args.version, os.path.abspath(args.project)
+            ),
+            max_parallel=args.max_parallel,
+            aedt_path=aedt_path,
+            queue=args.queue,
+            allocation_rule=0 if args.allocation == "cores" else 1,
+            num=args.num,
+            queue_config=cluster_config["queue_config_dict"],
+            env=env,
+            nodes_list_str=args.nodelist,
+            reservation_id=args.reservation,
+            exclude_str=excluded_nodes(app_dir, args.queue, args.nodelist) if args.exclude else "",
+            batch_options_file=batch_options_file,
+        )
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    exit_code = 0
+    for description, pid, msg in results:
+        if pid:
+            print(f"{pid} {description}")
+        else:
+            print(msg, file=sys.stderr)
+            exit_code = 1
+    return exit_code
+
+
+def print_jobs(args, cluster_config):
+    """Print jobs of the user. Returns exit code."""
+    try:
+        jobs = list_jobs(exclude=cluster_config["vnc_nodes"] + cluster_config["dcv_nodes"])
+    except (subprocess.CalledProcessError, OSError) as exc:
+        print(f"Cannot get jobs from squeue: {exc}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(jobs, indent=4))
+        return 0
+
+    print(f"{'PID':>10} {'State':>5} {'Name':>8} {'CPU':>5} {'Started':>20}  Nodes")
+    for job in jobs:
+        print(
+            f"{job['pid']:>10} {job['state']:>5} {job['name']:>8} {job['proc']:>5} {job['started']:>20}  "
+            f"{job['queue_data']}"
+        )
+    return 0
+
+
+def print_history(args, app_dir):
+    """Print jobs submitted by the launcher, final states of ended jobs are updated first. Returns exit code."""
+    job_db = job_database(app_dir)
+    if not job_db.available:
+        return 1
+
+    try:
+        job_db.refresh([job["pid"] for job in list_jobs()])
+    except (subprocess.CalledProcessError, OSError):
+        print("Cannot update states of jobs from squeue and sacct", file=sys.stderr)
+
+    jobs = job_db.recent(args.limit, args.offset, args.version)
+    if args.json:
+        print(json.dumps(jobs, indent=4))
+        return 0
+
+    print(f"{'PID':>10} {'Submitted':>16} {'Version':>8} {'Queue':>10} {'Cores':>6} {'State':>10}  Description")
+    for job in jobs:
+        submitted = datetime.fromtimestamp(job["submitted"]).strftime("%Y-%m-%d %H:%M")
+        print(
+            f"{job['job_id']:>10} {submitted:>16} {job['version']:>8} {job['queue']:>10} {job['cores']:>6} "
+            f"{job['state'] or 'In queue':>10}  {job['description']}"
+        )
+    return 0
+
+
+def print_reservations(args, app_dir):
+    """Print reservations available to the user. Returns exit code."""
+    cache = ReservationCache(os.path.join(app_dir, "reservations.json"))
+    try:
+        cache.refresh()
+    except (subprocess.CalledProcessError, OSError):
+        print("Cannot get reservations from scontrol, cached reservations are used", file=sys.stderr)
+
+    reservations = cache.usable(getpass.getuser())
+    if args.json:
+        print(json.dumps(reservations, indent=4))
+        return 0
+
+    inventory = NodeInventory(os.path.join(app_dir, "node_inventory.json"))
+    print(f"{'Name':>20} {'Partition':>10} {'Free':>6} {'Cores':>6} {'Start':>16} {'End':>16}  Nodes")
+    for reservation in reservations:
+        cores = free_cores(reservation, inventory)
+        start, end = [datetime.fromtimestamp(reservation[key]).strftime("%Y-%m-%d %H:%M") for key in ("start", "end")]
+        print(
+            f"{reservation['name']:>20} {reservation['partition']:>10} {'-' if cores is None else cores:>6} "
+            f"{reservation['core_count']:>6} {start:>16} {end:>16}  {reservation['nodes']}"
+        )
+    return 0
+
+
+def manage_held(args, cluster_config, app_dir):
+    """Print, release or drop submissions held by the launcher. Returns exit code."""
+    held = HeldQueue(os.path.join(app_dir, "held_jobs.json"))
+    if args.drop:
+        dropped = held.drop(args.drop)
+        unknown = set(args.drop) - set(dropped)
+        if unknown:
+            print(f"Unknown held submissions: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 1
+
+    exit_code = 0
+    if args.release:
+        gate = limit_gate(app_dir, cluster_config)
+        job_db = job_database(app_dir)
+        for entry, pid, msg in held.release(gate.limits, gate.jobs, gate.checks):
+            if pid:
+                job_db.record(pid, entry["description"], entry["command"], entry["partition"], entry["cores"])
+                print(f"{pid} {entry['id']}")
+            else:
+                print(msg, file=sys.stderr)
+                exit_code = 1
+
+    entries = held.entries()
+    if args.json:
+        print(json.dumps(entries, indent=4))
+        return exit_code
+
+    print(f"{'ID':>6} {'Queue':>10} {'Cores':>6} {'Held since':>17}  Description: reason")
+    for entry in entries:
+        since = datetime.fromtimestamp(entry["held"]).strftime("%Y-%m-%d %H:%M")
+        print(
+            f"{entry['id']:>6} {entry['partition']:>10} {entry['cores']:>6} {since:>17}  "
+            f"{entry['description']}: {entry['reason']}"
+        )
+    return exit_code
+
+
+def manage_pool(args, cluster_config, app_dir):
+    """Print, fill or release warm allocations. Returns exit code."""
+    if pool_settings(cluster_config, args.queue) is None:
+        print(f"Session pool is not configured for {args.queue}", file=sys.stderr)
+        return 1
+
+    pool = SessionPool(os.path.join(app_dir, "pool"))
+    try:
+        if args.release:
+            pool.release(args.queue)
+        jobs = list_jobs()
+        if args.fill is not None:
+            pool.fill(args.queue, args.fill, cluster_config, jobs, excluded_nodes(app_dir, args.queue))
+            jobs = list_jobs()
+    except (subprocess.CalledProcessError, OSError) as exc:
+        print(f"Cannot get jobs from squeue: {exc}", file=sys.stderr)
+        return 1
+    except SubmissionError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    allocations = [allocation for allocation in pool.status(jobs) if allocation["queue"] == args.queue]
+    if args.json:
+        print(json.dumps(allocations, indent=4))
+        return 0
+
+    print(f"{'PID':>10} {'Queue':>10} {'Cores':>6} {'State':>9}  Node")
+    for allocation in allocations:
+        print(
+            f"{allocation['pid']:>10} {allocation['queue']:>10} {allocation['cores']:>6} {allocation['state']:>9}  "
+            f"{allocation['node']}"
+        )
+    return 0
+
+
+def main(argv=None):
+    """Main function of the command line interface.
+
+    Parameters
+    ----------
+    argv : list, optional
+        Command line arguments, by default ``sys.argv``.
+
+    Returns
+    -------
+    int
+        Exit code.
+    """
+    try:
+        cluster_config = load_cluster_config()
+    except ConfigurationError as config_e:
+        print(config_e, file=sys.stderr)
+        return 1
+
+    app_dir = ensure_app_folder()
+    settings = read_settings(os.path.join(app_dir, "default.json"))
+    args = parse_args(argv, settings, cluster_config)
+
+    install_dir = dict(cluster_config["install_dir"])
+    try:
+        install_dir.update(read_custom_builds(os.path.join(app_dir, "user_build.json")))
+    except json.decoder.JSONDecodeError:
+        print("JSON file with user builds is corrupted", file=sys.stderr)
+
+    exit_code = run_action(args, cluster_config, install_dir, app_dir)
+    if args.metrics:
+        print(format_metrics(get_runner().metrics()), file=sys.stderr)
+    return exit_code
+
+
+def run_action(args, cluster_config, install_dir, app_dir):
+    """Run command of the command line interface, see :func:`main`."""
+    if args.action == "submit":
+        return submit(args, cluster_config, install_dir, app_dir)
+    elif args.action == "batch":
+        return batch(args, cluster_config, install_dir, app_dir)
+    elif args.action == "sweep":
+        return sweep(args, cluster_config, install_dir, app_dir)
+    elif args.action == "list":
+        return print_jobs(args, cluster_config)
+    elif args.action == "reservations":
+        return print_reservations(args, app_dir)
+    elif args.action == "pool":
+        return manage_pool(args, cluster_config, app_dir)
+    elif args.action == "held":
+        return manage_held(args, cluster_config, app_dir)
+    elif args.action == "history":
+        return print_history(args, app_dir)
+    else:
+        try:
+            control_jobs(args.action, args.job_ids)
+        except SubmissionError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,82 +5,121 @@ modify cluster_configuration.json according to cluster configuration
 and builds available
 """
 import argparse
-import errno
 import getpass
 import json
 import os
-import re
-import shutil
 import signal
 import socket
 import subprocess
 import sys
 import threading
 import time
-from collections import OrderedDict
+from collections import deque
 from datetime import datetime
 
 import requests
 import wx
 import wx._core
 import wx.dataview
-from influxdb import InfluxDBClient
-from wx.lib.wordwrap import wordwrap
-
+import wx.grid
+
+from core.batch import batch_log_file
+from core.batch import submit_batch
+from core.config import DEFAULT_SCRATCH_DIR
+from core.config import ConfigurationError
+from core.config import ensure_app_folder
+from core.config import load_cluster_config
+from core.config import read_custom_builds
+from core.config import read_product
+from core.config import read_settings
+from core.config import write_settings
+from core.efficiency import collect_efficiency
+from core.exclusions import ExcludedNodes
+from core.history import LoadHistory
+from core.hostlist import compress
+from core.hostlist import expand
+from core.hpc import apply_profile
+from core.jobdb import JobDatabase
+from core.licenses import LicenseProbe
+from core.limits import HELD_PREFIX
+from core.limits import HELD_STATE
+from core.limits import HeldQueue
+from core.limits import LimitCache
+from core.limits import LimitGate
+from core.limits import SubmissionHeld
+from core.messages import new_log
+from core.messages import read_log
+from core.messages import wrap_message
+from core.messages import write_log
+from core.nodes import NodeInventory
+from core.nodes import check_nodelist
+from core.nodes import is_available
+from core.pool import SessionPool
+from core.pool import pool_settings
+from core.reservations import ReservationCache
+from core.reservations import free_cores
+from core.runner import get_runner
+from core.sizing import SizingAdvisor
+from core.snapshot import Snapshot
+from core.staging import project_include
+from core.staging import staging_prefix
+from core.submit import ALLOCATIONS
+from core.submit import JOB_ACTIONS
+from core.submit import SubmissionError
+from core.submit import build_env
+from core.submit import check_ssh
+from core.submit import control_jobs
+from core.submit import display_value
+from core.submit import interactive_command
+from core.submit import job_age
+from core.submit import list_jobs
+from core.submit import send_statistics
+from core.submit import session_command
+from core.submit import shared_memory
+from core.submit import start_desktop
+from core.submit import update_registry
+from core.sweep import default_tasks
+from core.sweep import max_tasks
+from core.sweep import read_setups
+from core.sweep import submit_sweep
+from core.sweep import variations
+from core.tail import FileTailer
+from core.waittime import WaitTimePredictor
+from core.waittime import format_wait
 from gui.src_gui import GUIFrame
 
 __authors__ = "Maksim Beliaev, Leon Voss"
 __version__ = "v3.2.3"
 
-STATISTICS_SERVER = "OTTBLD02"
-STATISTICS_PORT = 8086
-
 FIREFOX = "/bin/firefox"  # path to installation of firefox for Overwatch
 
 # read cluster configuration from a file
-cluster_configuration_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "cluster_configuration.json")
 try:
-    with open(cluster_configuration_file) as config_file:
-        cluster_config = json.load(config_file, object_pairs_hook=OrderedDict)
-except FileNotFoundError:
-    print("\nConfiguration file does not exist!\nCheck existence of " + cluster_configuration_file)
-    sys.exit()
-except json.decoder.JSONDecodeError:
-    print(
-        "\nConfiguration file is wrong!\nCheck format of {} \nOnly double quotes are allowed!".format(
-            cluster_configuration_file
-        )
-    )
+    cluster_config = load_cluster_config()
+except ConfigurationError as config_e:
+    print(config_e)
     sys.exit()
 
+path_to_ssh = cluster_config["path_to_ssh"]
+overwatch_url = cluster_config["overwatch_url"]
+overwatch_api_url = cluster_config["overwatch_api_url"]
 
-try:
-    path_to_ssh = cluster_config["path_to_ssh"]
-    overwatch_url = cluster_config["overwatch_url"]
-    overwatch_api_url = cluster_config["overwatch_api_url"]
-
-    # dictionary for the versions
-    default_version = cluster_config["default_version"]
-    install_dir = cluster_config["install_dir"]
-
-    # define queue dependent number of cores and RAM per node (interactive mode)
-    queue_config_dict = cluster_config["queue_config_dict"]
-
-    # dictionary in which we will pop up dynamically information about the load from the OverWatch
-    # this dictionary also serves to define parallel environments for each queue
-    default_queue = cluster_config["default_queue"]
-
-    project_path = cluster_config["user_project_path_root"]
-
-    admin_env_vars = cluster_config.pop("environment_vars", None)
-except KeyError as key_e:
-    print(
-        (
-            "\nConfiguration file is wrong!\nCheck format of {} \nOnly double quotes are allowed."
-            + "\nFollowing key does not exist: {}"
-        ).format(cluster_configuration_file, key_e.args[0])
-    )
-    sys.exit()
+# dictionary for the versions
+default_version = cluster_config["default_version"]
+install_dir = cluster_config["install_dir"]
+
+# define queue dependent number of cores and RAM per node (interactive mode)
+queue_config_dict = cluster_config["queue_config_dict"]
+
+# dictionary in which we will pop up dynamically information about the load from the OverWatch
+# this dictionary also serves to define parallel environments for each queue
+default_queue = cluster_config["default_queue"]
+
+project_path = cluster_config["user_project_path_root"]
+
+admin_env_vars = cluster_config.pop("environment_vars", None)
+
+scratch_dir = cluster_config.get("scratch_dir", DEFAULT_SCRATCH_DIR)
 
 
 parser = argparse.ArgumentParser()
@@ -99,7 +138,27 @@ for queue_val in queue_dict.values():
 
 # list to keep information about running jobs
 qstat_list = []
+# list to keep resource usage of running jobs
+efficiency_list = []
 log_dict = {"pid": "0", "msg": "None", "scheduler": False}
+# new output of the jobs as tuples of PID and text, consumed by UI
+output_messages = deque()
+# number of messages kept in the message panel and log file
+MAX_LOG_MESSAGES = 1000
+HISTORY_PAGE_SIZE = 50
+ALL_VERSIONS = "All versions"
+
+# filters of the job list: states shown and minimum time since submission in seconds
+JOB_STATE_FILTERS = {
+    "All states": (),
+    "Running": ("R",),
+    "Pending": ("PD",),
+    "Completing": ("CG",),
+    "Suspended": ("S",),
+    "Held by launcher": (HELD_STATE,),
+}
+JOB_AGE_FILTERS = {"Any age": 0, "Older than 1 hour": 3600, "Older than 1 day": 86400, "Older than 1 week": 604800}
+JOB_ACTION_PAST = {"cancel": "cancelled", "hold": "held", "release": "released", "requeue": "requeued"}
 
 
 class ClearMsgPopupMenu(wx.Menu):
@@ -114,7 +173,7 @@ class ClearMsgPopupMenu(wx.Menu):
 
     def on_clear(self, *args):
         self.parent.scheduler_msg_viewlist.DeleteAllItems()
-        self.parent.log_data = {"Message List": [], "PID List": [], "GUI Data": []}
+        self.parent.log_data = new_log()
 
         if os.path.isfile(self.parent.logfile):
             os.remove(self.parent.logfile)
@@ -137,6 +196,26 @@ SIGNAL_EVT_LOG = wx.PyEventBinder(NEW_SIGNAL_EVT_LOG, 1)
 NEW_SIGNAL_EVT_BAR = wx.NewEventType()
 SIGNAL_EVT_BAR = wx.PyEventBinder(NEW_SIGNAL_EVT_BAR, 1)
 
+# signal - node inventory
+NEW_SIGNAL_EVT_NODES = wx.NewEventType()
+SIGNAL_EVT_NODES = wx.PyEventBinder(NEW_SIGNAL_EVT_NODES, 1)
+
+# signal - resource usage of running jobs
+NEW_SIGNAL_EVT_EFFICIENCY = wx.NewEventType()
+SIGNAL_EVT_EFFICIENCY = wx.PyEventBinder(NEW_SIGNAL_EVT_EFFICIENCY, 1)
+
+# signal - queue wait time statistics
+NEW_SIGNAL_EVT_WAIT = wx.NewEventType()
+SIGNAL_EVT_WAIT = wx.PyEventBinder(NEW_SIGNAL_EVT_WAIT, 1)
+
+# signal - job output
+NEW_SIGNAL_EVT_OUTPUT = wx.NewEventType()
+SIGNAL_EVT_OUTPUT = wx.PyEventBinder(NEW_SIGNAL_EVT_OUTPUT, 1)
+
+# signal - reservations
+NEW_SIGNAL_EVT_RESERVATIONS = wx.NewEventType()
+SIGNAL_EVT_RESERVATIONS = wx.PyEventBinder(NEW_SIGNAL_EVT_RESERVATIONS, 1)
+
 
 class SignalEvent(wx.PyCommandEvent):
     """Event to signal that we are ready to update the plot"""
@@ -153,6 +232,8 @@ class ClusterLoadUpdateThread(threading.Thread):
         """
         threading.Thread.__init__(self)
         self._parent = parent
+        self.tailer = FileTailer()
+        self.failed_cores = {}
 
     def run(self):
         """Overrides Thread.run.
@@ -174,77 +255,197 @@ class ClusterLoadUpdateThread(threading.Thread):
                 except KeyError:
                     print("Cannot parse OverWatch data. Probably Service is down.")
 
+                if self._parent.wait_predictor.is_outdated():
+                    self.parse_wait_times()
+
+                if self._parent.limits.is_outdated():
+                    self.parse_limits()
+
+                self.parse_excluded_nodes()
+
                 counter = 0
 
             if counter % 10 == 0:
                 self.parse_user_jobs()
+                self.release_held_jobs()
+
+            if counter % 60 == 0:
+                self.parse_node_inventory()
+                self.parse_job_efficiency()
+                self.parse_reservations()
+                self.fill_session_pool()
+                self.parse_job_sizes()
+                self.parse_job_history()
 
             time.sleep(0.5)
             counter += 1
 
     def parse_user_jobs(self):
+        try:
+            jobs = list_jobs(exclude=cluster_config["vnc_nodes"] + cluster_config["dcv_nodes"])
+        except (subprocess.CalledProcessError, OSError) as exc:
+            print(f"Cannot get jobs from squeue: {exc}")
+            return
+
         qstat_list.clear()
-        slurm_stat_output = subprocess.check_output(self._parent.squeue, shell=True)
-        slurm_stat_output = slurm_stat_output.decode("ascii", errors="ignore")
-        exclude = cluster_config["vnc_nodes"] + cluster_config["dcv_nodes"]
-        for i, line in enumerate(slurm_stat_output.split("\n")[1:]):
-            pid = line[0:18].strip()
-            # partition = line[19:28].strip()
-            job_name = line[29:38].strip()
-            user = line[38:47].strip()
-            state = line[48:49].strip()
-            num_cpu = line[50:54].strip()
-            started = line[54:75].strip()
-            node_list = line[76:].strip()
-
-            for node in exclude:
-                if node in node_list:
-                    break
-            else:
-                # it is neither VNC nor DCV job
-                qstat_list.append(
-                    {
-                        "pid": pid,
-                        "state": state,
-                        "name": job_name,
-                        "user": user,
-                        "queue_data": node_list,
-                        "proc": num_cpu,
-                        "started": started,
-                    }
-                )
+        qstat_list.extend(jobs)
+
+        self._parent.snapshot.update("jobs", qstat_list)
         evt = SignalEvent(NEW_SIGNAL_EVT_QSTAT, -1)
         wx.PostEvent(self._parent, evt)
-        # get message texts
-        for pid in self._parent.log_data["PID List"]:
-            o_file = os.path.join(self._parent.user_dir, "ansysedt.o" + pid)
-            if os.path.exists(o_file):
-                output_text = ""
-                with open(o_file, "r") as file:
-                    for msgline in file:
-                        output_text += msgline
-                    if output_text != "":
-                        log_dict["pid"] = pid
-                        log_dict["msg"] = "Submit Message: " + output_text
-                        log_dict["scheduler"] = True
-                        evt = SignalEvent(NEW_SIGNAL_EVT_LOG, -1)
-                        wx.PostEvent(self._parent, evt)
-                os.remove(o_file)
-
-            e_file = os.path.join(self._parent.user_dir, "ansysedt.e" + pid)
-            if os.path.exists(e_file):
-                error_text = ""
-                with open(e_file, "r") as file:
-                    for msgline in file:
-                        error_text += msgline
-                    if error_text != "":
-                        log_dict["pid"] = pid
-                        log_dict["msg"] = "Submit Error: " + error_text
-                        log_dict["scheduler"] = True
-                        evt = SignalEvent(NEW_SIGNAL_EVT_LOG, -1)
-                        wx.PostEvent(self._parent, evt)
-
-                os.remove(e_file)
+        self.parse_job_output()
+
+    def parse_job_output(self):
+        """Send new lines of job output files to the message panel.
+
+        Output of finished jobs is read till the end, only its last lines are shown, see :meth:`FileTailer.flush`.
+        ``ansysedt.o/e<pid>`` files are removed afterwards unless they were truncated in the message panel.
+        """
+        running = {job["pid"] for job in qstat_list}
+        for pid, files in self._parent.job_output_files():
+            finished = pid not in running
+            for path, title, temporary in files:
+                if not os.path.exists(path):
+                    continue
+
+                lines = self.tailer.flush(path) if finished else self.tailer.read(path)
+                if lines:
+                    output_messages.append((pid, f"{title}: " + "\n".join(lines)))
+
+                if finished:
+                    wx.CallAfter(self._parent.forget_job_output, pid)
+                    if temporary and not self.tailer.dropped:
+                        os.remove(path)
+
+        if output_messages:
+            evt = SignalEvent(NEW_SIGNAL_EVT_OUTPUT, -1)
+            wx.PostEvent(self._parent, evt)
+
+    def parse_node_inventory(self):
+        """Refresh cached node inventory and notify UI if any node changed."""
+        try:
+            changed = self._parent.node_inventory.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get node inventory from sinfo")
+            return
+
+        if changed:
+            evt = SignalEvent(NEW_SIGNAL_EVT_NODES, -1)
+            wx.PostEvent(self._parent, evt)
+
+    def parse_reservations(self):
+        """Refresh cached reservations and notify UI if they changed."""
+        try:
+            changed = self._parent.reservations.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get reservations from scontrol")
+            return
+
+        if changed:
+            evt = SignalEvent(NEW_SIGNAL_EVT_RESERVATIONS, -1)
+            wx.PostEvent(self._parent, evt)
+
+    def parse_job_efficiency(self):
+        """Get resource usage of all running jobs of the user in one batch."""
+        job_ids = [job["pid"] for job in qstat_list if job["state"] == "R"]
+        if not job_ids and not efficiency_list:
+            return
+
+        try:
+            usage = collect_efficiency(job_ids, queue_config_dict)
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get resource usage from sacct/sstat")
+            return
+
+        efficiency_list.clear()
+        efficiency_list.extend(usage)
+        evt = SignalEvent(NEW_SIGNAL_EVT_EFFICIENCY, -1)
+        wx.PostEvent(self._parent, evt)
+
+    def fill_session_pool(self):
+        """Submit pool jobs to keep warm allocations of the selected queue, forget finished pool jobs."""
+        queue = self._parent.pool_queue
+        jobs = list(qstat_list)
+        try:
+            if queue:
+                self._parent.pool.fill(
+                    queue,
+                    pool_settings(cluster_config, queue)["max_per_user"],
+                    cluster_config,
+                    jobs,
+                    self._parent.exclude_str(queue),
+                )
+            else:
+                self._parent.pool.sync(jobs)
+        except SubmissionError as exc:
+            print(f"Cannot submit pool job: {exc}")
+        except OSError as exc:
+            print(f"Cannot update session pool: {exc}")
+
+    def parse_job_sizes(self):
+        """Collect usage of ended jobs of the launcher for right-sizing advice."""
+        try:
+            added = self._parent.sizing.ingest([job["pid"] for job in qstat_list], queue_config_dict)
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get usage of ended jobs from sacct")
+            return
+
+        if added:
+            wx.CallAfter(self._parent.update_sizing_advice)
+
+    def parse_job_history(self):
+        """Fill final states of the jobs in the job history that left the queue."""
+        try:
+            updated = self._parent.job_db.refresh([job["pid"] for job in qstat_list])
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get final states of jobs from sacct")
+            return
+
+        if updated:
+            wx.CallAfter(self._parent.update_history_view)
+
+    def parse_excluded_nodes(self):
+        """Refresh nodes avoided by submissions when outdated or when OverWatch reports new failed cores."""
+        failed_cores = {name: queue_val["failed_cores"] for name, queue_val in queue_dict.items()}
+        if not self._parent.excluded_nodes.is_outdated() and failed_cores == self.failed_cores:
+            return
+
+        self.failed_cores = failed_cores
+        try:
+            changed = self._parent.excluded_nodes.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get unavailable nodes from sinfo and sacct")
+            return
+
+        if changed:
+            wx.CallAfter(self._parent.evt_num_cores_nodes_change)
+
+    def parse_limits(self):
+        """Refresh cached QOS and association limits of the user."""
+        try:
+            self._parent.limits.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get limits from sacctmgr")
+
+    def release_held_jobs(self):
+        """Submit jobs held by the launcher that fit into the limits now and report them to UI."""
+        if not self._parent.held.entries():
+            return
+
+        results = self._parent.held.release(self._parent.limits.limits, list(qstat_list), self._parent.license_checks())
+        if results:
+            wx.CallAfter(self._parent.held_jobs_released, results)
+
+    def parse_wait_times(self):
+        """Add recently started jobs from accounting database to the wait time statistics."""
+        try:
+            self._parent.wait_predictor.refresh()
+        except (subprocess.CalledProcessError, OSError):
+            print("Cannot get accounting data from sacct")
+            return
+
+        evt = SignalEvent(NEW_SIGNAL_EVT_WAIT, -1)
+        wx.PostEvent(self._parent, evt)
 
     def parse_cluster_load(self):
         """Parse data from Overwatch and generates dictionary with cluster load for each queue."""
@@ -261,6 +462,14 @@ class ClusterLoadUpdateThread(threading.Thread):
                 queue_dict[queue_name]["failed_cores"] = queue_elem["totalUnavailableSlots"]
                 queue_dict[queue_name]["reserved_cores"] = queue_elem["totalReservedSlots"]
                 queue_dict[queue_name]["avail_cores"] = queue_elem["totalAvailableSlots"]
+
+        self._parent.snapshot.update("load", queue_dict)
+        self._parent.load_history.add(queue_dict)
+        try:
+            self._parent.load_history.save()
+        except OSError:
+            print("Cannot save cluster load history")
+
         evt = SignalEvent(my_SIGNAL_EVT, -1)
         wx.PostEvent(self._parent, evt)
 
@@ -299,6 +508,131 @@ class FlashStatusBarThread(threading.Thread):
             time.sleep(0.5)
 
 
+class SparklineRenderer(wx.grid.GridCellRenderer):
+    """Grid cell renderer that draws load trend of the queue given in the row label."""
+
+    def __init__(self, history):
+        wx.grid.GridCellRenderer.__init__(self)
+        self.history = history
+
+    def Draw(self, grid, attr, dc, rect, row, col, is_selected):
+        dc.SetBrush(wx.Brush(attr.GetBackgroundColour(), wx.BRUSHSTYLE_SOLID))
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.DrawRectangle(rect)
+
+        width = rect.width - 4
+        height = rect.height - 4
+        trend = self.history.trend(grid.GetRowLabelValue(row), width)
+
+        # split line on gaps in the history
+        segments = [[]]
+        for i, value in enumerate(trend):
+            if value is None:
+                segments.append([])
+            else:
+                segments[-1].append(wx.Point(rect.x + 2 + i, rect.y + 2 + height - round(value * height)))
+
+        dc.SetPen(wx.Pen(wx.BLUE, 1))
+        for segment in segments:
+            if len(segment) > 1:
+                dc.DrawLines(segment)
+            elif segment:
+                dc.DrawPoint(segment[0])
+
+    def GetBestSize(self, grid, attr, dc, row, col):
+        return wx.Size(150, 20)
+
+    def Clone(self):
+        return SparklineRenderer(self.history)
+
+
+class NodeGridTable(wx.grid.GridTableBase):
+    """Virtual table for the node view. Grid requests only values of the visible cells."""
+
+    columns = ["Node", "State", "Free Cores", "Total Cores", "Free RAM, GB", "Total RAM, GB"]
+
+    def __init__(self):
+        wx.grid.GridTableBase.__init__(self)
+        self.nodes = []
+
+        # heatmap: color by fraction of free cores, from fully loaded to idle node
+        self.heat_attrs = []
+        for color in ["#f4a6a6", "#f7c6a0", "#f8e6a0", "#d9efa5", "#a8e0a8"]:
+            attr = wx.grid.GridCellAttr()
+            attr.SetBackgroundColour(color)
+            self.heat_attrs.append(attr)
+
+        self.unavailable_attr = wx.grid.GridCellAttr()
+        self.unavailable_attr.SetBackgroundColour("light grey")
+        self.unavailable_attr.SetTextColour("dark grey")
+
+    def GetNumberRows(self):
+        return len(self.nodes)
+
+    def GetNumberCols(self):
+        return len(self.columns)
+
+    def GetColLabelValue(self, col):
+        return self.columns[col]
+
+    def GetRowLabelValue(self, row):
+        return ""
+
+    def IsEmptyCell(self, row, col):
+        return False
+
+    def GetValue(self, row, col):
+        node = self.nodes[row]
+        values = [
+            node["name"],
+            node["state"],
+            node["idle_cores"],
+            node["total_cores"],
+            node["free_memory"],
+            node["memory"],
+        ]
+        return str(values[col])
+
+    def SetValue(self, row, col, value):
+        pass
+
+    def GetAttr(self, row, col, kind):
+        node = self.nodes[row]
+        if not is_available(node):
+            attr = self.unavailable_attr
+        else:
+            free_fraction = node["idle_cores"] / node["total_cores"] if node["total_cores"] else 0
+            attr = self.heat_attrs[min(int(free_fraction * len(self.heat_attrs)), len(self.heat_attrs) - 1)]
+
+        attr.IncRef()  # grid releases the attribute after drawing
+        return attr
+
+    def set_nodes(self, grid, nodes):
+        """Replace content of the table and notify grid about change in number of rows.
+
+        Parameters
+        ----------
+        grid : wx.grid.Grid
+            Grid that renders the table.
+        nodes : list
+            Node records to show.
+        """
+        old_rows = len(self.nodes)
+        self.nodes = nodes
+
+        grid.BeginBatch()
+        if len(nodes) < old_rows:
+            msg = wx.grid.GridTableMessage(
+                self, wx.grid.GRIDTABLE_NOTIFY_ROWS_DELETED, len(nodes), old_rows - len(nodes)
+            )
+            grid.ProcessTableMessage(msg)
+        elif len(nodes) > old_rows:
+            msg = wx.grid.GridTableMessage(self, wx.grid.GRIDTABLE_NOTIFY_ROWS_APPENDED, len(nodes) - old_rows)
+            grid.ProcessTableMessage(msg)
+        grid.EndBatch()
+        grid.ForceRefresh()
+
+
 class LauncherWindow(GUIFrame):
     def __init__(self, parent):
         global default_queue
@@ -312,7 +646,6 @@ class LauncherWindow(GUIFrame):
         self.username = getpass.getuser()
         self.hostname = socket.gethostname()
         self.display_node = os.getenv("DISPLAY")
-        self.squeue = 'squeue --me --format "%.18i %.9P %.8j %.8u %.2t %.4C %.20V %R"'
 
         # get paths
         self.user_build_json = os.path.join(self.app_dir, "user_build.json")
@@ -325,8 +658,7 @@ class LauncherWindow(GUIFrame):
         self.products = {}
         for key in list(install_dir.keys()):
             try:
-                with open(os.path.join(install_dir[key], "config", "ProductList.txt")) as file:
-                    self.products[key] = next(file).rstrip()  # get first line
+                self.products[key] = read_product(install_dir[key])
             except FileNotFoundError:
                 print(f"Installation is corrupted {install_dir[key]}")
                 install_dir.pop(key)
@@ -376,23 +708,79 @@ class LauncherWindow(GUIFrame):
         self.logfile = os.path.join(self.app_dir, "user_log_" + viz_type + ".json")
 
         # read in previous log file
-        self.log_data = {"Message List": [], "PID List": [], "GUI Data": []}
-        if os.path.exists(self.logfile):
-            try:
-                with open(self.logfile, "r") as file:
-                    self.log_data = json.load(file)
-                    self.update_msg_list()
-            except json.decoder.JSONDecodeError:
-                print("Error reading log file")
-                os.remove(self.logfile)
+        self.log_data = read_log(self.logfile)
+        self.update_msg_list()
 
         # initialize the table with User Defined Builds
         self.user_build_viewlist.AppendTextColumn("Build Name", width=150)
         self.user_build_viewlist.AppendTextColumn("Build Path", width=640)
 
         self.set_user_jobs_viewlist()
+        self.load_history = LoadHistory(os.path.join(self.app_dir, "load_history.bin"), queue_dict)
         self.set_cluster_load_table()
 
+        self.wait_predictor = WaitTimePredictor(os.path.join(self.app_dir, "wait_stats.json"), queue_config_dict)
+        self.m_wait_caption = wx.StaticText(self.m_panel2, wx.ID_ANY, "")
+        insert_after(self.m_summary_caption, self.m_wait_caption)
+
+        # right-sizing advice from usage of ended jobs of the same version and project
+        self.sizing = SizingAdvisor(os.path.join(self.app_dir, "sizing.json"))
+        self.m_sizing_caption = wx.StaticText(self.m_panel2, wx.ID_ANY, "")
+        insert_after(self.m_wait_caption, self.m_sizing_caption)
+        self.m_select_version1.Bind(wx.EVT_COMBOBOX, self.update_sizing_advice)
+
+        self.m_batch_button = wx.Button(self.m_panel2, wx.ID_ANY, "Batch Solve...")
+        self.m_batch_button.SetToolTip(
+            "Select projects and solve each of them as a separate non-graphical job with the queue settings"
+        )
+        insert_after(self.m_button1, self.m_batch_button)
+        self.m_batch_button.Bind(wx.EVT_BUTTON, self.click_batch_solve)
+
+        self.m_sweep_button = wx.Button(self.m_panel2, wx.ID_ANY, "Sweep...")
+        self.m_sweep_button.SetToolTip(
+            "Select project and solve variations of its parametric setup in parallel tasks with the queue settings"
+        )
+        insert_after(self.m_batch_button, self.m_sweep_button)
+        self.m_sweep_button.Bind(wx.EVT_BUTTON, self.click_sweep_solve)
+
+        self.m_stage_checkbox = wx.CheckBox(self.m_panel2, wx.ID_ANY, "Stage to node scratch")
+        self.m_stage_checkbox.SetToolTip(
+            f"Copy projects to {scratch_dir} of the node for the time of the job and copy results back when it ends. "
+            "Interactive session asks for the projects to copy"
+        )
+        insert_after(self.path_textbox, self.m_stage_checkbox)
+
+        # warm allocations are kept by subthread for the queue in pool_queue, None if pool is disabled
+        self.pool = SessionPool(os.path.join(self.app_dir, "pool"))
+        self.pool_queue = None
+        self.m_pool_checkbox = wx.CheckBox(self.m_panel2, wx.ID_ANY, "Keep warm session")
+        insert_after(self.m_stage_checkbox, self.m_pool_checkbox)
+        self.m_pool_checkbox.Bind(wx.EVT_CHECKBOX, self.evt_pool_check)
+
+        # cached node inventory is rendered immediately and refreshed later from subthread
+        self.node_inventory = NodeInventory(os.path.join(self.app_dir, "node_inventory.json"))
+        self.excluded_nodes = ExcludedNodes(os.path.join(self.app_dir, "excluded_nodes.json"))
+        self.set_node_view()
+        self.set_efficiency_view()
+
+        # job history is read from the database only when its page is shown
+        self.job_db = JobDatabase(os.path.join(self.app_dir, "jobs.db"))
+        self.history_offset = 0
+        self.set_history_view()
+
+        self.reservations = ReservationCache(os.path.join(self.app_dir, "reservations.json"))
+
+        # submissions that exceed QOS or association limits are held locally and released by subthread
+        self.limits = LimitCache(os.path.join(self.app_dir, "limits.json"))
+        self.held = HeldQueue(os.path.join(self.app_dir, "held_jobs.json"))
+        self.licenses = None
+        if cluster_config.get("licenses"):
+            self.licenses = LicenseProbe(cluster_config["licenses"], os.path.join(self.app_dir, "licenses.json"))
+        self.m_reservation_button = wx.Button(self.m_panel2, wx.ID_ANY, "Select...", style=wx.BU_EXACTFIT)
+        insert_after(self.reservation_id_text, self.m_reservation_button)
+        self.m_reservation_button.Bind(wx.EVT_BUTTON, self.evt_select_reservation)
+        self.update_reservations()
+
         # Disable Pre-Post/Interactive radio button in case of DCV
         if viz_type == "DCV":
             self.submit_mode_radiobox.EnableItem(3, False)
@@ -426,6 +814,15 @@ class LauncherWindow(GUIFrame):
         self.Bind(SIGNAL_EVT_QSTAT, self.update_job_status)
         self.Bind(SIGNAL_EVT_LOG, self.add_log_entry)
         self.Bind(SIGNAL_EVT_BAR, self.set_status_bar)
+        self.Bind(SIGNAL_EVT_NODES, self.update_node_view)
+        self.Bind(SIGNAL_EVT_WAIT, self.update_wait_estimate)
+        self.Bind(SIGNAL_EVT_EFFICIENCY, self.update_efficiency_view)
+        self.Bind(SIGNAL_EVT_RESERVATIONS, self.update_reservations)
+        self.Bind(SIGNAL_EVT_OUTPUT, self.add_output_entries)
+
+        # render last known jobs and cluster load until the first update comes from subthread
+        self.snapshot = Snapshot(os.path.join(self.app_dir, "snapshot.json"))
+        self.render_snapshot()
 
         # start a thread to update cluster load
         worker = ClusterLoadUpdateThread(self)
@@ -437,7 +834,39 @@ class LauncherWindow(GUIFrame):
         wx.CallAfter(self.select_mode)
 
     def set_user_jobs_viewlist(self):
-        """Setup Process ViewList"""
+        """Setup Process ViewList with multiple selection, filters and job control buttons"""
+        generated_viewlist = self.qstat_viewlist
+        self.qstat_viewlist = wx.dataview.DataViewListCtrl(self.m_panel2, wx.ID_ANY, style=wx.dataview.DV_MULTIPLE)
+        self.qstat_viewlist.SetFont(generated_viewlist.GetFont())
+        self.qstat_viewlist.SetMinSize(generated_viewlist.GetMinSize())
+        jobs_sizer = generated_viewlist.GetContainingSizer()
+        jobs_sizer.Replace(generated_viewlist, self.qstat_viewlist)
+        generated_viewlist.Destroy()
+        self.qstat_viewlist.Bind(wx.dataview.EVT_DATAVIEW_ITEM_ACTIVATED, self.leftclick_processtable)
+
+        controls_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.m_job_state_filter = wx.Choice(self.m_panel2, wx.ID_ANY, choices=list(JOB_STATE_FILTERS))
+        self.m_job_name_filter = wx.TextCtrl(self.m_panel2, wx.ID_ANY, size=(120, -1))
+        self.m_job_name_filter.SetHint("Job name")
+        self.m_job_age_filter = wx.Choice(self.m_panel2, wx.ID_ANY, choices=list(JOB_AGE_FILTERS))
+        for choice in (self.m_job_state_filter, self.m_job_age_filter):
+            choice.SetSelection(0)
+            choice.Bind(wx.EVT_CHOICE, lambda _evt: self.update_job_status())
+            controls_sizer.Add(choice, 0, wx.ALL, 5)
+        self.m_job_name_filter.Bind(wx.EVT_TEXT, lambda _evt: self.update_job_status())
+        controls_sizer.Insert(1, self.m_job_name_filter, 0, wx.ALL, 5)
+        controls_sizer.AddStretchSpacer()
+
+        self.m_job_buttons = []
+        for action in JOB_ACTIONS:
+            button = wx.Button(self.m_panel2, wx.ID_ANY, action.capitalize(), style=wx.BU_EXACTFIT)
+            button.SetToolTip(f"{action.capitalize()} selected jobs")
+            button.Bind(wx.EVT_BUTTON, lambda _evt, job_action=action: self.evt_job_action(job_action))
+            controls_sizer.Add(button, 0, wx.ALL, 5)
+            self.m_job_buttons.append(button)
+
+        jobs_sizer.Insert(0, controls_sizer, 0, wx.EXPAND)
+
         self.qstat_viewlist.AppendTextColumn("PID", width=70)
         self.qstat_viewlist.AppendTextColumn("State", width=50)
         self.qstat_viewlist.AppendTextColumn("Name", width=80)
@@ -458,6 +887,14 @@ class LauncherWindow(GUIFrame):
         self.load_grid.SetColSize(3, 80)
         self.load_grid.SetColLabelValue(4, "Total")
         self.load_grid.SetColSize(4, 80)
+
+        # load trend for the last 24 hours
+        self.load_grid.AppendCols(1)
+        self.load_grid.SetColLabelValue(5, "Load, 24h")
+        self.load_grid.SetColSize(5, 150)
+        trend_attr = wx.grid.GridCellAttr()
+        trend_attr.SetRenderer(SparklineRenderer(self.load_history))
+        self.load_grid.SetColAttr(5, trend_attr)
         for i, queue_key in enumerate(queue_dict):
             self.load_grid.AppendRows(1)
             self.load_grid.SetRowLabelValue(i, queue_key)
@@ -467,6 +904,296 @@ class LauncherWindow(GUIFrame):
             self.load_grid.SetCellBackgroundColour(i, 1, "red")
             self.load_grid.SetCellBackgroundColour(i, 2, "light grey")
 
+    def render_snapshot(self):
+        """Show jobs and cluster load from the snapshot saved on the previous run, marked as outdated."""
+        self.stale_jobs = self.stale_load = False
+        snapshot_times = []
+
+        jobs, jobs_time = self.snapshot.get("jobs")
+        if jobs is not None:
+            qstat_list.extend(jobs)
+            self.update_job_status()
+            self.qstat_viewlist.Enable(False)  # do not allow to cancel jobs that might not exist anymore
+            for button in self.m_job_buttons:
+                button.Enable(False)
+            self.stale_jobs = True
+            snapshot_times.append(jobs_time)
+
+        load, load_time = self.snapshot.get("load")
+        if load is not None:
+            for queue_name, queue_load in load.items():
+                if queue_name in queue_dict:
+                    queue_dict[queue_name].update(queue_load)
+            self.on_signal()
+            for i in range(self.load_grid.GetNumberRows()):
+                for j in range(self.load_grid.GetNumberCols()):
+                    self.load_grid.SetCellTextColour(i, j, wx.Colour("grey"))
+            self.stale_load = True
+            snapshot_times.append(load_time)
+
+        if snapshot_times and self.m_status_bar.GetStatusText(1) == "No Status Message":
+            snapshot_date = datetime.fromtimestamp(min(snapshot_times)).strftime("%Y-%m-%d %H:%M")
+            self.m_status_bar.SetStatusText(f"Showing cached data from {snapshot_date}, updating...", 1)
+
+    def clear_stale_status(self):
+        """Remove status message about cached data once both jobs and cluster load are updated."""
+        if not self.stale_jobs and not self.stale_load and "cached data" in self.m_status_bar.GetStatusText(1):
+            self.m_status_bar.SetStatusText("No Status Message", 1)
+
+    def set_node_view(self):
+        """Setup page with per-node load of the selected queue."""
+        self.m_nodes_panel = wx.Panel(self.m_notebook2, wx.ID_ANY)
+        nodes_sizer = wx.BoxSizer(wx.VERTICAL)
+
+        self.m_nodes_caption = wx.StaticText(self.m_nodes_panel, wx.ID_ANY, "")
+        nodes_sizer.Add(self.m_nodes_caption, 0, wx.ALL, 5)
+
+        self.node_table = NodeGridTable()
+        self.node_grid = wx.grid.Grid(self.m_nodes_panel, wx.ID_ANY)
+        self.node_grid.SetTable(self.node_table, takeOwnership=True)
+        self.node_grid.EnableEditing(False)
+        self.node_grid.SetRowLabelSize(0)
+        self.node_grid.SetDefaultColSize(100)
+        self.node_grid.SetColSize(0, 150)
+        self.node_grid.SetSelectionMode(wx.grid.Grid.GridSelectRows)
+        self.node_grid.SetDefaultCellAlignment(wx.ALIGN_CENTER, wx.ALIGN_CENTER)
+        nodes_sizer.Add(self.node_grid, 1, wx.ALL | wx.EXPAND, 5)
+
+        buttons_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        buttons_sizer.Add(
+            wx.StaticText(self.m_nodes_panel, wx.ID_ANY, "Double click on a node to add/remove it from the node list"),
+            0,
+            wx.ALIGN_CENTER | wx.ALL,
+            5,
+        )
+        buttons_sizer.Add((0, 0), 1, wx.EXPAND, 5)
+        self.use_nodes_button = wx.Button(self.m_nodes_panel, wx.ID_ANY, "Use Selected Nodes")
+        buttons_sizer.Add(self.use_nodes_button, 0, wx.ALL, 5)
+        nodes_sizer.Add(buttons_sizer, 0, wx.EXPAND, 5)
+
+        self.m_nodes_panel.SetSizer(nodes_sizer)
+        self.m_notebook2.AddPage(self.m_nodes_panel, "Nodes", False)
+
+        self.node_grid.Bind(wx.grid.EVT_GRID_CELL_LEFT_DCLICK, self.evt_node_dclick)
+        self.use_nodes_button.Bind(wx.EVT_BUTTON, self.evt_use_selected_nodes)
+
+        self.update_node_view()
+
+    def update_node_view(self, *args):
+        """Render nodes of the selected queue. Called on queue change and when inventory is refreshed."""
+        queue = self.queue_dropmenu.GetValue()
+        nodes = self.node_inventory.partition_nodes(queue)
+        self.node_table.set_nodes(self.node_grid, nodes)
+
+        free_cores = sum(node["idle_cores"] for node in nodes if is_available(node))
+        if self.node_inventory.updated:
+            updated = datetime.fromtimestamp(self.node_inventory.updated).strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            updated = "never"
+        self.m_nodes_caption.LabelText = (
+            f"Queue {queue}: {len(nodes)} nodes, {free_cores} free cores. Inventory updated: {updated}"
+        )
+
+    def evt_node_dclick(self, event):
+        """Add node to the node list or remove it if it is already there."""
+        node_name = self.node_table.nodes[event.GetRow()]["name"]
+        nodes = self.get_node_list()
+        if node_name in nodes:
+            nodes.remove(node_name)
+        else:
+            nodes.append(node_name)
+
+        self.set_node_list(nodes)
+
+    def evt_use_selected_nodes(self, *args):
+        """Replace node list with the nodes selected in the node view."""
+        rows = self.node_grid.GetSelectedRows()
+        if not rows:
+            self.add_status_msg("Select nodes in the table first", level="!")
+            return
+
+        self.set_node_list([self.node_table.nodes[row]["name"] for row in sorted(rows)])
+
+    def get_node_list(self):
+        """Get list of node names from the node list field."""
+        try:
+            return expand(self.m_nodes_list.Value)
+        except ValueError:
+            return []
+
+    def check_node_list(self):
+        """Validate node list against node inventory of the selected queue and replace it with compressed form.
+
+        Returns
+        -------
+        bool
+            ``True`` if node list is valid.
+        """
+        try:
+            nodes, _cores = self.requested_size()
+            self.m_nodes_list.Value = check_nodelist(
+                self.m_nodes_list.Value, self.queue_dropmenu.Value, self.node_inventory, max_nodes=nodes
+            )
+        except ValueError as exc:
+            add_message(str(exc), "Wrong node list", "!")
+            return False
+
+        return True
+
+    def set_node_list(self, nodes):
+        """Fill node list field and enable node list option.
+
+        Parameters
+        ----------
+        nodes : list
+            Node names.
+        """
+        self.m_nodes_list.Value = compress(nodes)
+        self.m_nodes_list_checkbox.Value = bool(nodes)
+        self.evt_node_list_check()
+        self.m_panel2.Layout()
+
+    def set_efficiency_view(self):
+        """Setup page with resource usage of running jobs."""
+        self.m_efficiency_panel = wx.Panel(self.m_notebook2, wx.ID_ANY)
+        efficiency_sizer = wx.BoxSizer(wx.VERTICAL)
+
+        self.efficiency_viewlist = wx.dataview.DataViewListCtrl(self.m_efficiency_panel, wx.ID_ANY)
+        self.efficiency_viewlist.SetFont(
+            wx.Font(9, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL, False, "Arial")
+        )
+        self.efficiency_viewlist.AppendTextColumn("PID", width=70)
+        self.efficiency_viewlist.AppendTextColumn("Queue", width=80)
+        self.efficiency_viewlist.AppendTextColumn("Nodes", width=50)
+        self.efficiency_viewlist.AppendTextColumn("Cores", width=50)
+        self.efficiency_viewlist.AppendTextColumn("Elapsed", width=80)
+        self.efficiency_viewlist.AppendTextColumn("CPU usage", width=80)
+        self.efficiency_viewlist.AppendTextColumn("Max RSS, GB", width=90)
+        self.efficiency_viewlist.AppendTextColumn("RAM usage", width=80)
+        self.efficiency_viewlist.AppendTextColumn("Note")
+        efficiency_sizer.Add(self.efficiency_viewlist, 1, wx.ALL | wx.EXPAND, 5)
+
+        self.m_efficiency_panel.SetSizer(efficiency_sizer)
+        self.m_notebook2.AddPage(self.m_efficiency_panel, "Job Efficiency", False)
+
+    def update_efficiency_view(self, *args):
+        """Event is called to update resource usage of running jobs from main thread (thread safety)."""
+        self.efficiency_viewlist.DeleteAllItems()
+        for job in efficiency_list:
+            note = ""
+            if job["elapsed"] > 600 and job["cpu_efficiency"] < 0.1:
+                if job["nodes"] > 1:
+                    note = "Low CPU usage, consider requesting fewer nodes"
+                else:
+                    note = "Low CPU usage, consider requesting fewer cores"
+
+            hours, seconds = divmod(job["elapsed"], 3600)
+            self.efficiency_viewlist.AppendItem(
+                [
+                    job["pid"],
+                    job["partition"],
+                    str(job["nodes"]),
+                    str(job["cores"]),
+                    f"{hours}:{seconds // 60:02d}:{seconds % 60:02d}",
+                    f"{job['cpu_efficiency']:.0%}",
+                    f"{job['max_rss']:.1f}",
+                    f"{job['ram_fraction']:.0%}",
+                    note,
+                ]
+            )
+
+    def set_history_view(self):
+        """Setup page with submitted jobs from the job history, paged by :data:`HISTORY_PAGE_SIZE` jobs."""
+        self.m_history_panel = wx.Panel(self.m_notebook2, wx.ID_ANY)
+        history_sizer = wx.BoxSizer(wx.VERTICAL)
+
+        self.history_viewlist = wx.dataview.DataViewListCtrl(self.m_history_panel, wx.ID_ANY)
+        self.history_viewlist.SetFont(
+            wx.Font(9, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL, False, "Arial")
+        )
+        self.history_viewlist.AppendTextColumn("PID", width=70)
+        self.history_viewlist.AppendTextColumn("Submitted", width=120)
+        self.history_viewlist.AppendTextColumn("Version", width=70)
+        self.history_viewlist.AppendTextColumn("Queue", width=80)
+        self.history_viewlist.AppendTextColumn("Cores", width=50)
+        self.history_viewlist.AppendTextColumn("State", width=90)
+        self.history_viewlist.AppendTextColumn("Elapsed", width=80)
+        self.history_viewlist.AppendTextColumn("Exit", width=50)
+        self.history_viewlist.AppendTextColumn("Description")
+        history_sizer.Add(self.history_viewlist, 1, wx.ALL | wx.EXPAND, 5)
+
+        buttons_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.m_history_version = wx.ComboBox(self.m_history_panel, wx.ID_ANY, ALL_VERSIONS, style=wx.CB_READONLY)
+        buttons_sizer.Add(self.m_history_version, 0, wx.ALL, 5)
+        self.m_history_caption = wx.StaticText(self.m_history_panel, wx.ID_ANY, "")
+        buttons_sizer.Add(self.m_history_caption, 0, wx.ALIGN_CENTER | wx.ALL, 5)
+        buttons_sizer.Add((0, 0), 1, wx.EXPAND, 5)
+        self.m_history_newer = wx.Button(self.m_history_panel, wx.ID_ANY, "< Newer")
+        buttons_sizer.Add(self.m_history_newer, 0, wx.ALL, 5)
+        self.m_history_older = wx.Button(self.m_history_panel, wx.ID_ANY, "Older >")
+        buttons_sizer.Add(self.m_history_older, 0, wx.ALL, 5)
+        history_sizer.Add(buttons_sizer, 0, wx.EXPAND, 5)
+
+        self.m_history_panel.SetSizer(history_sizer)
+        self.m_notebook2.AddPage(self.m_history_panel, "History", False)
+
+        self.m_history_version.Bind(wx.EVT_COMBOBOX, lambda _evt: self.evt_history_page(0))
+        self.m_history_newer.Bind(wx.EVT_BUTTON, lambda _evt: self.evt_history_page(-HISTORY_PAGE_SIZE))
+        self.m_history_older.Bind(wx.EVT_BUTTON, lambda _evt: self.evt_history_page(HISTORY_PAGE_SIZE))
+        self.m_notebook2.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self.evt_notebook_page_changed)
+
+    def evt_notebook_page_changed(self, event):
+        """Load current page of the job history when its tab is opened."""
+        event.Skip()
+        if self.m_notebook2.GetPage(event.GetSelection()) is self.m_history_panel:
+            init_combobox(
+                [ALL_VERSIONS] + sorted(self.job_db.versions()),
+                self.m_history_version,
+                self.m_history_version.Value or ALL_VERSIONS,
+            )
+            self.update_history_view()
+
+    def evt_history_page(self, step):
+        """Move to newer (negative step) or older jobs, zero step resets to the newest jobs."""
+        self.history_offset = max(0, self.history_offset + step) if step else 0
+        self.update_history_view()
+
+    def update_history_view(self, *args):
+        """Render current page of the job history. Skipped if the page is not shown."""
+        if self.m_notebook2.GetCurrentPage() is not self.m_history_panel:
+            return
+
+        version = self.m_history_version.Value
+        version = "" if version == ALL_VERSIONS else version
+        total = self.job_db.count(version)
+        self.history_offset = min(self.history_offset, max(0, total - 1) // HISTORY_PAGE_SIZE * HISTORY_PAGE_SIZE)
+        jobs = self.job_db.recent(HISTORY_PAGE_SIZE, self.history_offset, version)
+
+        self.history_viewlist.DeleteAllItems()
+        for job in jobs:
+            elapsed = ""
+            if job["started"] and job["ended"]:
+                hours, seconds = divmod(int(job["ended"] - job["started"]), 3600)
+                elapsed = f"{hours}:{seconds // 60:02d}:{seconds % 60:02d}"
+            self.history_viewlist.AppendItem(
+                [
+                    job["job_id"],
+                    datetime.fromtimestamp(job["submitted"]).strftime("%Y-%m-%d %H:%M"),
+                    job["version"],
+                    job["queue"],
+                    str(job["cores"]),
+                    job["state"] or "In queue",
+                    elapsed,
+                    job["exit_code"] or "",
+                    job["description"],
+                ]
+            )
+
+        first = self.history_offset + 1 if jobs else 0
+        self.m_history_caption.LabelText = f"Jobs {first}-{self.history_offset + len(jobs)} of {total}"
+        self.m_history_newer.Enable(self.history_offset > 0)
+        self.m_history_older.Enable(self.history_offset + len(jobs) < total)
+
     def set_status_bar(self, _unused_event=None):
         self.m_status_bar.SetStatusText(self.bar_text, 1)
         self.m_status_bar.SetBackgroundColour(self.bar_color)
@@ -497,19 +1224,17 @@ class LauncherWindow(GUIFrame):
             Path to application directory.
         """
 
-        user_dir = os.path.expanduser("~")
-        app_dir = os.path.join(user_dir, ".aedt")
-        if not os.path.exists(app_dir):
-            try:
-                os.makedirs(app_dir)
-            except OSError as exc:  # Guard against race condition
-                if exc.errno != errno.EEXIST:
-                    raise
-
-        return app_dir
+        return ensure_app_folder()
 
     def on_signal(self, *args):
         """Update UI when signal comes from subthread. Should be updated always from main thread."""
+        if self.stale_load and args:
+            # live data replaces the snapshot
+            self.stale_load = False
+            for i in range(self.load_grid.GetNumberRows()):
+                for j in range(self.load_grid.GetNumberCols()):
+                    self.load_grid.SetCellTextColour(i, j, self.load_grid.GetDefaultCellTextColour())
+            self.clear_stale_status()
 
         # run in list to keep order
         for i, queue_name in enumerate(queue_dict):
@@ -519,12 +1244,13 @@ class LauncherWindow(GUIFrame):
             self.load_grid.SetCellValue(i, 3, str(queue_dict[queue_name]["failed_cores"]))
             self.load_grid.SetCellValue(i, 4, str(queue_dict[queue_name]["total_cores"]))
 
+        self.load_grid.ForceRefresh()  # redraw trends
+
     def read_custom_builds(self):
         """Reads all specified in JSON file custom builds."""
         if os.path.isfile(self.user_build_json):
             try:
-                with open(self.user_build_json) as file:
-                    self.builds_data = json.load(file)
+                self.builds_data = read_custom_builds(self.user_build_json)
             except json.decoder.JSONDecodeError:
                 print("JSON file with user builds is corrupted")
                 os.remove(self.user_build_json)
@@ -538,8 +1264,7 @@ class LauncherWindow(GUIFrame):
 
                 self.user_build_viewlist.AppendItem([bld_version, bld_path])
                 install_dir[bld_version] = bld_path
-                with open(prod_list_path) as file:
-                    self.products[bld_version] = next(file).rstrip()  # get first line
+                self.products[bld_version] = read_product(bld_path)
 
             # update values in version selector on 1st page
             init_combobox(install_dir.keys(), self.m_select_version1, default_version)
@@ -573,16 +1298,16 @@ class LauncherWindow(GUIFrame):
             "project_path": self.path_textbox.Value,
             "use_reservation": self.m_reserved_checkbox.Value,
             "reservation_id": self.reservation_id_text.Value,
+            "stage_project": self.m_stage_checkbox.Value,
+            "use_pool": self.m_pool_checkbox.Value,
         }
 
-        with open(self.default_settings_json, "w") as file:
-            json.dump(self.default_settings, file, indent=4)
+        write_settings(self.default_settings_json, self.default_settings)
 
     def settings_load(self):
         """Read settings file and populate UI with values."""
 
-        with open(self.default_settings_json, "r") as file:
-            self.default_settings = json.load(file)
+        self.default_settings = read_settings(self.default_settings_json)
 
         try:
             if self.default_settings["queue"] not in queue_config_dict:
@@ -590,6 +1315,8 @@ class LauncherWindow(GUIFrame):
                 self.default_settings["queue"] = default_queue
 
             self.queue_dropmenu.Value = self.default_settings["queue"]
+            if self.default_settings.get("allocation") in ALLOCATIONS:
+                self.m_alloc_dropmenu.SetSelection(ALLOCATIONS.index(self.default_settings["allocation"]))
             self.m_numcore.Value = self.default_settings["num_cores"]
             self.m_select_version1.Value = self.default_settings["aedt_version"]
             self.env_var_text.Value = self.default_settings["env_var"]
@@ -601,6 +1328,8 @@ class LauncherWindow(GUIFrame):
 
             self.m_reserved_checkbox.Value = self.default_settings["use_reservation"]
             self.reservation_id_text.Value = self.default_settings["reservation_id"]
+            self.m_stage_checkbox.Value = self.default_settings.get("stage_project", False)
+            self.m_pool_checkbox.Value = self.default_settings.get("use_pool", False)
 
             queue_value = self.queue_dropmenu.GetValue()
             self.m_node_label.LabelText = self.construct_node_specs_str(queue_value)
@@ -651,19 +1380,118 @@ class LauncherWindow(GUIFrame):
             self.m_numcore.Value = str(1)
             return
 
-        cores_per_node = queue_config_dict[self.queue_dropmenu.Value]["cores"]
-        ram_per_node = queue_config_dict[self.queue_dropmenu.Value]["ram"]
+        queue_settings = queue_config_dict[self.queue_dropmenu.Value]
+        cores_per_node = queue_settings["cores"]
+        ram_per_node = queue_settings["ram"]
         if self.m_alloc_dropmenu.GetCurrentSelection() == 0:
             if num_cores > cores_per_node:
                 self.m_numcore.Value = str(cores_per_node)
-                # todo add status message
-            summary_msg = f"You request {self.m_numcore.Value} Cores and {ram_per_node}GB of shared RAM"
+                self.add_status_msg(f"Node of {self.queue_dropmenu.Value} has only {cores_per_node} cores", level="!")
+                return  # summary is updated by the event of the new value
+
+            memory = shared_memory(queue_settings, num_cores) if num_cores else 0
+            summary_msg = f"You request {num_cores} Cores and {memory}GB RAM on a shared node"
         else:
             total_cores = cores_per_node * num_nodes
             total_ram = ram_per_node * num_nodes
-            summary_msg = f"You request {total_cores} Cores and {total_ram}GB RAM"
+            summary_msg = f"You request {total_cores} Cores and {total_ram}GB RAM on {num_nodes} exclusive node(s)"
+
+        excluded = self.excluded_nodes.nodes(self.queue_dropmenu.Value, self.node_inventory)
+        if excluded:
+            # node names and reasons could be long, they are in the tooltip
+            summary_msg += f", avoiding {len(excluded)} down, drained or failing node(s)"
+        self.m_summary_caption.SetToolTip("\n".join(f"{node}: {reason}" for node, reason in sorted(excluded.items())))
 
         self.m_summary_caption.LabelText = summary_msg
+        self.update_wait_estimate()
+        self.update_sizing_advice()
+
+    def exclude_str(self, queue, nodelist=""):
+        """Get nodes of the queue that are down, drained or failing for ``--exclude``, except requested nodes."""
+        return self.excluded_nodes.exclude(queue, self.node_inventory, nodelist)
+
+    def warn_pinned_nodes(self, nodelist):
+        """Warn if requested nodes are down, drained or failing, see :mod:`core.exclusions`."""
+        for node, reason in self.excluded_nodes.pinned(nodelist).items():
+            self.add_status_msg(f"Requested node {node} is avoided by other submissions ({reason})", level="!")
+
+    def requested_size(self):
+        """Get number of nodes and cores requested in the UI.
+
+        Returns
+        -------
+        tuple
+            Number of nodes and total number of cores.
+        """
+        num = int(self.m_numcore.Value or 0)
+        if self.m_alloc_dropmenu.GetCurrentSelection() == 0:
+            return 1, num
+
+        return num, num * queue_config_dict[self.queue_dropmenu.Value]["cores"]
+
+    def update_wait_estimate(self, *args):
+        """Show expected wait time for the requested resources next to the summary.
+
+        Also suggest other queue with enough RAM per node if the wait there is noticeably shorter.
+        """
+        queue = self.queue_dropmenu.Value
+        try:
+            nodes, cores = self.requested_size()
+        except (ValueError, KeyError):
+            return
+
+        if nodes < 1 or cores < 1:
+            self.m_wait_caption.LabelText = ""
+            return
+
+        estimate = self.wait_predictor.estimate(queue, nodes, cores)
+        if estimate is None:
+            self.m_wait_caption.LabelText = f"Not enough history to estimate wait time on {queue}"
+            return
+
+        median, percentile_90, num_jobs = estimate
+        wait_msg = (
+            f"Typical wait on {queue}: {format_wait(median)} "
+            f"(90% of {num_jobs} similar jobs within {format_wait(percentile_90)})"
+        )
+
+        ram = queue_config_dict[queue]["ram"]
+        alternatives = []
+        for other_queue, other_config in queue_config_dict.items():
+            if other_queue == queue or other_config["ram"] < ram or other_config["cores"] < cores / nodes:
+                continue
+            other_estimate = self.wait_predictor.estimate(other_queue, nodes, cores)
+            if other_estimate and other_estimate[0] < median / 2:
+                alternatives.append((other_estimate[0], other_queue))
+
+        if alternatives:
+            best_wait, best_queue = min(alternatives)
+            wait_msg += f". Faster: {best_queue}, {format_wait(best_wait)}"
+
+        self.m_wait_caption.LabelText = wait_msg
+
+    def update_sizing_advice(self, *args):
+        """Suggest smaller request if recent jobs of the version in the project used much less than requested."""
+        queue = self.queue_dropmenu.Value
+        try:
+            nodes, cores = self.requested_size()
+        except (ValueError, KeyError):
+            return
+
+        advice = self.sizing.advise(self.m_select_version1.Value, self.path_textbox.Value, queue, queue_config_dict)
+        if advice is None or cores < 1 or (advice["cores"] >= cores and advice["queue"] == queue):
+            self.m_sizing_caption.LabelText = ""
+            return
+
+        if advice["nodes"] > 1:
+            size = f"{advice['nodes']} nodes"
+        else:
+            size = f"{advice['cores']} cores on a shared node"
+        self.m_sizing_caption.LabelText = (
+            f"Your last {advice['jobs']} {self.m_select_version1.Value} jobs in this project used "
+            f"{advice['used']:.0f} cores on average and up to {advice['max_rss']:.0f}GB RAM. "
+            f"Suggested: {size} of {advice['queue']}"
+        )
 
     def evt_select_allocation(self, *args):
         """Callback when user changes allocation strategy."""
@@ -672,6 +1500,9 @@ class LauncherWindow(GUIFrame):
         else:
             self.m_num_cores_caption.LabelText = "# Nodes"
 
+        if args:
+            self.evt_num_cores_nodes_change()
+
     def select_mode(self, *args):
         """Callback invoked on change of the mode Pre/Post or Interactive.
 
@@ -687,9 +1518,16 @@ class LauncherWindow(GUIFrame):
             self.m_nodes_list_checkbox.Value = False
             self.m_reserved_checkbox.Value = False
             self.reservation_id_text.Show(enable)
+            self.m_reservation_button.Show(enable)
             self.m_nodes_list.Show(enable)
 
         self.m_summary_caption.Show(enable)
+        self.m_wait_caption.Show(enable)
+        self.m_sizing_caption.Show(enable)
+        self.m_batch_button.Show(enable)
+        self.m_sweep_button.Show(enable)
+        self.m_stage_checkbox.Show(enable)
+        self.m_pool_checkbox.Show(enable)
         self.queue_dropmenu.Show(enable)
         self.m_numcore.Show(enable)
         self.m_node_label.Show(enable)
@@ -704,14 +1542,35 @@ class LauncherWindow(GUIFrame):
         self.m_reserved_checkbox.Show(enable)
         self.m_reservation_caption.Show(enable)
 
-        # self.m_alloc_dropmenu.Enable(enable)  # todo enable if Slurm will support non-exclusive
+        self.m_alloc_dropmenu.Enable(enable)
         self.evt_select_allocation()
         self.evt_num_cores_nodes_change()
 
     def update_job_status(self, *args):
         """Event is called to update a viewlist with current running jobs from main thread (thread safety)."""
+        if self.stale_jobs and args:
+            # live data replaces the snapshot
+            self.stale_jobs = False
+            self.qstat_viewlist.Enable(True)
+            for button in self.m_job_buttons:
+                button.Enable(True)
+            self.clear_stale_status()
+
+        selected = set(self.selected_job_ids())
+        states = JOB_STATE_FILTERS[self.m_job_state_filter.GetStringSelection()]
+        name_filter = self.m_job_name_filter.Value.strip().lower()
+        min_age = JOB_AGE_FILTERS[self.m_job_age_filter.GetStringSelection()]
+        timestamp = time.time()
+
         self.qstat_viewlist.DeleteAllItems()
-        for q_dict in qstat_list:
+        for q_dict in qstat_list + self.held.as_jobs():
+            if states and q_dict["state"] not in states:
+                continue
+            if name_filter and name_filter not in q_dict["name"].lower():
+                continue
+            if min_age and (job_age(q_dict, timestamp) or 0) < min_age:
+                continue
+
             self.qstat_viewlist.AppendItem(
                 [
                     q_dict["pid"],
@@ -723,6 +1582,8 @@ class LauncherWindow(GUIFrame):
                     q_dict["started"],
                 ]
             )
+            if q_dict["pid"] in selected:
+                self.qstat_viewlist.SelectRow(self.qstat_viewlist.GetItemCount() - 1)
 
     def update_msg_list(self):
         """Update messages on checkbox and init from file"""
@@ -737,15 +1598,56 @@ class LauncherWindow(GUIFrame):
         """Add new entry to the Scheduler Messages Window."""
         scheduler = log_dict.get("scheduler", True)
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        message = wordwrap(log_dict["msg"], 600, wx.ClientDC(self))
+        message = wrap_message(log_dict["msg"], 600, wx.ClientDC(self).GetPartialTextExtents)
         data = [timestamp, log_dict.get("pid", "0"), message, scheduler]
 
         if scheduler or self.m_checkBox_allmsg.Value:
             tab_data = data[0:3]
             self.scheduler_msg_viewlist.PrependItem(tab_data)
         self.log_data["Message List"].append(data)
-        with open(self.logfile, "w") as fa:
-            json.dump(self.log_data, fa, indent=4)
+        if len(self.log_data["Message List"]) > MAX_LOG_MESSAGES:
+            del self.log_data["Message List"][:-MAX_LOG_MESSAGES]
+            while self.scheduler_msg_viewlist.GetItemCount() > MAX_LOG_MESSAGES:
+                self.scheduler_msg_viewlist.DeleteItem(self.scheduler_msg_viewlist.GetItemCount() - 1)
+
+        write_log(self.logfile, self.log_data)
+
+    def add_output_entries(self, *args):
+        """Add new output of the jobs to the Scheduler Messages Window."""
+        while output_messages:
+            log_dict["pid"], log_dict["msg"] = output_messages.popleft()
+            log_dict["scheduler"] = True
+            self.add_log_entry()
+
+    def job_output_files(self):
+        """Get output files of submitted jobs.
+
+        Returns
+        -------
+        list
+            Tuples of PID and list of files. Each file is a tuple of path, message title and flag if the file should
+            be removed when job is finished.
+        """
+        log_files = self.log_data.get("Log Files", {})
+        job_files = []
+        for pid in list(self.log_data["PID List"]):
+            files = [
+                (os.path.join(self.user_dir, "ansysedt.o" + pid), "Submit Message", True),
+                (os.path.join(self.user_dir, "ansysedt.e" + pid), "Submit Error", True),
+            ]
+            if pid in log_files:
+                files.append((log_files[pid], "Batch Log", False))
+            job_files.append((pid, files))
+        return job_files
+
+    def forget_job_output(self, pid):
+        """Stop following output of the finished job.
+
+        Its output is already flushed to the message panel, truncated ``ansysedt.o/e<pid>`` files are kept on disk.
+        """
+        self.log_data.get("Log Files", {}).pop(pid, None)
+        if pid in self.log_data["PID List"]:
+            self.log_data["PID List"].remove(pid)
 
     def rmb_on_scheduler_msg_list(self, *args):
         """When clicking RMB on the scheduler message list it will
@@ -755,32 +1657,75 @@ class LauncherWindow(GUIFrame):
         self.PopupMenu(ClearMsgPopupMenu(self), position.GetPosition())
 
     def leftclick_processtable(self, *args):
-        """On double click on process row will propose to abort running job"""
-        self.cancel_job()
+        """On double click on process row will propose to abort selected jobs"""
+        self.evt_job_action("cancel")
+
+    def selected_job_ids(self):
+        """Get IDs of the jobs selected in the job list."""
+        rows = [self.qstat_viewlist.ItemToRow(item) for item in self.qstat_viewlist.GetSelections()]
+        return [self.qstat_viewlist.GetTextValue(row, 0) for row in sorted(rows) if row != wx.NOT_FOUND]
+
+    def evt_job_action(self, action):
+        """Apply action to all selected jobs with a single scheduler call in background.
 
-    def cancel_job(self):
+        Parameters
+        ----------
+        action : str
+            One of :data:`core.submit.JOB_ACTIONS`.
         """
-        Send Slurm scancel command
-        :return:
+        job_ids = self.selected_job_ids()
+        if not job_ids:
+            self.add_status_msg("Select jobs in the list first", level="!")
+            return
+
+        if action in ("cancel", "requeue"):
+            result = add_message(
+                f"{action.capitalize()} {len(job_ids)} job(s)?\n{', '.join(job_ids)}", f"Confirm {action}", "?"
+            )
+            if result != wx.ID_OK:
+                return
+
+        threading.Thread(target=self.run_job_action, args=(action, job_ids), daemon=True).start()
+
+    def run_job_action(self, action, job_ids):
+        """Call scheduler from the thread and report result to UI.
+
+        Submissions held by the launcher are only cancelled, they are not known to the scheduler.
         """
-        row = self.qstat_viewlist.GetSelectedRow()
-        pid = self.qstat_viewlist.GetTextValue(row, 0)
-        result = add_message("Abort Queue Process {}?\n".format(pid), "Confirm Abort", "?")
-        if result == wx.ID_OK:
-            command = f"scancel {pid}"
-            subprocess.call(command, shell=True)
-            print(f"Job cancelled via: {command}")
-
-            msg = "Job {} cancelled from GUI".format(pid)
+        held_ids = [job_id for job_id in job_ids if job_id.startswith(HELD_PREFIX)]
+        if action == "cancel":
+            self.held.drop(held_ids)
+
+        error = ""
+        scheduler_ids = [job_id for job_id in job_ids if job_id not in held_ids]
+        if scheduler_ids:
             try:
-                self.log_data["PID List"].remove(pid)
-            except ValueError:
-                pass
+                control_jobs(action, scheduler_ids)
+            except (SubmissionError, OSError) as exc:
+                error = str(exc)
 
-            log_dict["pid"] = pid
-            log_dict["msg"] = msg
-            log_dict["scheduler"] = False
-            self.add_log_entry()
+        wx.CallAfter(self.job_action_done, action, job_ids, error)
+
+    def job_action_done(self, action, job_ids, error):
+        """Log result of the job action.
+
+        Parameters
+        ----------
+        action : str
+            Applied action.
+        job_ids : list
+            IDs of the jobs.
+        error : str
+            Scheduler output if action failed, empty otherwise.
+        """
+        if action == "cancel" and not error:
+            cancelled = set(job_ids)
+            self.log_data["PID List"] = [pid for pid in self.log_data["PID List"] if pid not in cancelled]
+
+        log_dict["pid"] = ",".join(job_ids)
+        log_dict["msg"] = error or f"{len(job_ids)} job(s) {JOB_ACTION_PAST[action]} from GUI"
+        log_dict["scheduler"] = bool(error)
+        self.add_log_entry()
 
     def select_queue(self, *args):
         """Called when user selects a value in Queue drop down menu.
@@ -792,6 +1737,42 @@ class LauncherWindow(GUIFrame):
 
         self.m_node_label.LabelText = self.construct_node_specs_str(queue_value)
         self.evt_num_cores_nodes_change()
+        self.update_node_view()
+        self.evt_pool_check()
+
+    def evt_pool_check(self, *args):
+        """Callback when user switches warm sessions or changes the queue.
+
+        Warm allocations are kept only for the selected queue, allocations of other queues are released after their
+        idle timeout. Unchecking releases waiting allocations immediately.
+        """
+        queue = self.queue_dropmenu.GetValue()
+        settings = pool_settings(cluster_config, queue)
+        self.m_pool_checkbox.Enable(settings is not None)
+        if settings is None:
+            self.m_pool_checkbox.SetToolTip(f"Warm sessions are not configured for {queue}")
+            self.pool_queue = None
+            return
+
+        self.m_pool_checkbox.SetToolTip(
+            f"Keep up to {settings['max_per_user']} allocation(s) of {settings['cores']} cores on {queue} waiting, "
+            f"so that session with up to {settings['cores']} cores on a single node starts without queue wait. "
+            f"Unused allocation is released after {settings['idle_timeout'] // 60} minutes"
+        )
+        self.pool_queue = queue if self.m_pool_checkbox.Value else None
+        if args and args[0].GetEventObject() is self.m_pool_checkbox and not self.m_pool_checkbox.Value:
+            threading.Thread(target=self.release_pool, daemon=True).start()
+
+    def release_pool(self):
+        """Cancel waiting allocations of the session pool."""
+        try:
+            pids = self.pool.release()
+        except SubmissionError as exc:
+            wx.CallAfter(self.add_status_msg, f"Cannot release warm sessions: {exc}", "!")
+            return
+
+        if pids:
+            wx.CallAfter(self.add_status_msg, f"Released {len(pids)} warm session(s)", "i")
 
     def evt_node_list_check(self, *args):
         """Callback called when clicked "Specify node list" options.
@@ -810,8 +1791,62 @@ class LauncherWindow(GUIFrame):
         """
         if self.m_reserved_checkbox.Value:
             self.reservation_id_text.Show()
+            self.m_reservation_button.Show()
         else:
             self.reservation_id_text.Hide()
+            self.m_reservation_button.Hide()
+        self.m_panel2.Layout()
+
+    def reservation_label(self, reservation):
+        """Get description of the reservation for the selection menu.
+
+        Parameters
+        ----------
+        reservation : dict
+            Reservation record, see :func:`core.reservations.parse_reservations`.
+
+        Returns
+        -------
+        str
+            Name, partition, free cores and time window of the reservation.
+        """
+        cores = free_cores(reservation, self.node_inventory)
+        cores_str = f"{cores} of {reservation['core_count']}" if cores is not None else str(reservation["core_count"])
+        start = datetime.fromtimestamp(reservation["start"]).strftime("%b %d %H:%M")
+        end = datetime.fromtimestamp(reservation["end"]).strftime("%b %d %H:%M")
+        partition = f" on {reservation['partition']}" if reservation["partition"] else ""
+        return f"{reservation['name']}{partition}: {cores_str} cores free, {start} - {end}"
+
+    def update_reservations(self, *args):
+        """Update reservation selector from the cached reservations."""
+        usable = self.reservations.usable(self.username)
+        self.m_reservation_button.Enable(bool(usable))
+        if usable:
+            self.m_reservation_button.SetToolTip(f"Select one of {len(usable)} reservations available to you")
+        else:
+            self.m_reservation_button.SetToolTip("No reservations are available to you")
+
+    def evt_select_reservation(self, *args):
+        """Show menu with reservations available to the user and set reservation ID on click."""
+        menu = wx.Menu()
+        for reservation in self.reservations.usable(self.username):
+            item = menu.Append(wx.ID_ANY, self.reservation_label(reservation))
+            self.Bind(wx.EVT_MENU, lambda _evt, name=reservation["name"]: self.set_reservation(name), item)
+
+        self.PopupMenu(menu)
+        menu.Destroy()
+
+    def set_reservation(self, name):
+        """Fill reservation ID and enable reservation option.
+
+        Parameters
+        ----------
+        name : str
+            Name of the reservation.
+        """
+        self.reservation_id_text.Value = name
+        self.m_reserved_checkbox.Value = True
+        self.on_reserve_check()
 
     def submit_overwatch_thread(self, *args):
         """Opens OverWatch on button click"""
@@ -830,66 +1865,70 @@ class LauncherWindow(GUIFrame):
             Proper display value
         """
 
-        display_var = os.getenv("DISPLAY", "")
-        if not display_var:
-            msg = "DISPLAY environment variable is not specified. Contact cluster admin"
-            add_message(msg, "Environment error", icon="!")
-            raise EnvironmentError(msg)
+        try:
+            return display_value(os.getenv("DISPLAY", ""), self.hostname)
+        except EnvironmentError as exc:
+            add_message(str(exc), "Environment error", icon="!")
+            raise
 
-        if ":" not in display_var:
-            msg = "DISPLAY hasn't session number specified. Contact cluster admin"
-            add_message(msg, "Environment error", icon="!")
-            raise EnvironmentError(msg)
+    def prepare_launch(self, job_type):
+        """Common steps before any launch: node list, SSH, environment, reservation, registry and statistics.
 
-        if not display_var.split(":")[0]:
-            return f"{self.hostname}:{display_var.split(':')[1]}"
+        Parameters
+        ----------
+        job_type : str
+            Job type for usage statistics.
 
-        return display_var
+        Returns
+        -------
+        tuple or None
+            Path to EDT, environment variables string, reservation flag and reservation ID. ``None`` if launch
+            should be aborted.
+        """
+        if self.m_nodes_list_checkbox.Value and not self.check_node_list():
+            return None
 
-    def click_launch(self, *args):
-        """Depending on the choice of the user invokes AEDT on visual node or simply for pre/post"""
-        check_ssh()
+        check_ssh(path_to_ssh)
 
         aedt_version = self.m_select_version1.Value
         aedt_path = install_dir[aedt_version]
 
-        env = ""
-        if self.env_var_text.Value:
-            env += "" + self.env_var_text.Value
-
-        if admin_env_vars:
-            env_list = [f"{env_var}={env_val}" for env_var, env_val in admin_env_vars.items()]
-            env += "," + ",".join(env_list)
-
-        # verify that no double commas, spaces, etc
-        if env:
-            env = re.sub(" ", "", env)
-            env = re.sub(",+", ",", env)
-            env = env.rstrip(",").lstrip(",")
+        env = build_env(self.env_var_text.Value, admin_env_vars)
 
         reservation, reservation_id = self.check_reservation()
         if reservation and not reservation_id:
-            return
+            return None
 
         try:
-            self.update_registry(aedt_path)
+            update_registry(aedt_path, self.products[aedt_version], self.path_textbox.Value)
         except FileNotFoundError:
             add_message("Verify project directory. Probably user name was changed", "Wrong project path", "!")
-            return
-
-        op_mode = self.submit_mode_radiobox.GetSelection()
+            return None
+        except subprocess.CalledProcessError as exc:
+            add_message(f"Cannot set registry of Electronics Desktop: {exc}", "Registry", "!")
+            return None
 
-        job_type = {0: "pre-post", 1: "monitor", 2: "submit", 3: "interactive"}
         try:
-            self.send_statistics(aedt_version, job_type[op_mode])
+            self.send_statistics(aedt_version, job_type)
         except Exception:
             # not worry a lot
             print("Error sending statistics")
 
+        return aedt_path, env, reservation, reservation_id
+
+    def click_launch(self, *args):
+        """Depending on the choice of the user invokes AEDT on visual node or simply for pre/post"""
+        op_mode = self.submit_mode_radiobox.GetSelection()
+
+        job_type = {0: "pre-post", 1: "monitor", 2: "submit", 3: "interactive"}
+        launch_data = self.prepare_launch(job_type[op_mode])
+        if launch_data is None:
+            return
+
+        aedt_path, env, reservation, reservation_id = launch_data
         if op_mode == 3:
             self.submit_interactive_job(aedt_path, env, reservation, reservation_id)
         else:
-            env = env[4:]  # remove ALL, from env vars
             command_key = ""
             if op_mode == 1:
                 command_key = "-showsubmitjob"
@@ -897,7 +1936,7 @@ class LauncherWindow(GUIFrame):
                 command_key = "-showmonitorjob"
 
             threading.Thread(
-                target=self._submit_batch_thread,
+                target=start_desktop,
                 daemon=True,
                 args=(
                     aedt_path,
@@ -906,6 +1945,177 @@ class LauncherWindow(GUIFrame):
                 ),
             ).start()
 
+    def click_batch_solve(self, *args):
+        """Select projects and submit each of them as independent non-graphical batch solve job.
+
+        Resources of each job are taken from the queue settings of interactive session.
+        """
+        get_files_dialogue = wx.FileDialog(
+            None,
+            "Choose projects to solve:",
+            defaultDir=self.path_textbox.Value,
+            wildcard="AEDT projects (*.aedt)|*.aedt",
+            style=wx.FD_OPEN | wx.FD_MULTIPLE | wx.FD_FILE_MUST_EXIST,
+        )
+        if get_files_dialogue.ShowModal() == wx.ID_OK:
+            projects = get_files_dialogue.GetPaths()
+            get_files_dialogue.Destroy()
+        else:
+            get_files_dialogue.Destroy()
+            return
+
+        launch_data = self.prepare_launch("batch")
+        if launch_data is None:
+            return
+
+        aedt_path, env, reservation, reservation_id = launch_data
+        queue = self.queue_dropmenu.Value
+        env, batch_options_file = apply_profile(cluster_config, queue, env, os.path.join(self.app_dir, "hpc_options"))
+        if not self.confirm_licenses(self.requested_size()[1], len(projects)):
+            return
+
+        nodes_list_str = self.m_nodes_list.Value if self.m_nodes_list_checkbox.Value else ""
+        self.warn_pinned_nodes(nodes_list_str)
+
+        try:
+            results = submit_batch(
+                projects,
+                os.path.join(self.app_dir, "batch"),
+                aedt_path=aedt_path,
+                queue=queue,
+                allocation_rule=self.m_alloc_dropmenu.GetCurrentSelection(),
+                num=int(self.m_numcore.Value or 0),
+                queue_config=queue_config_dict,
+                env=env,
+                nodes_list_str=nodes_list_str,
+                reservation_id=reservation_id if reservation else "",
+                exclude_str=self.exclude_str(queue, nodes_list_str),
+                batch_options_file=batch_options_file,
+                scratch_dir=scratch_dir if self.m_stage_checkbox.Value else "",
+                submit=self.recorded_submit(),
+            )
+        except ValueError as exc:
+            self.add_status_msg(str(exc), level="!")
+            return
+
+        for project, pid, msg in results:
+            log_dict["scheduler"] = pid is None
+            log_dict["pid"] = pid or "0"
+            log_dict["msg"] = msg
+            if pid:
+                self.log_data["PID List"].append(pid)
+                self.log_data.setdefault("Log Files", {})[pid] = batch_log_file(project, pid)
+                self.sizing.register(pid, self.m_select_version1.Value, project)
+            self.add_log_entry()
+
+        submitted = len([pid for _project, pid, _msg in results if pid])
+        self.add_status_msg(f"{submitted} of {len(results)} batch jobs submitted to {queue}", level="i")
+
+    def click_sweep_solve(self, *args):
+        """Select project and parametric setup and solve its variations in tasks of a job array.
+
+        Each task gets resources of interactive session, by default there are as many tasks as could start on the free
+        cores of the queue.
+        """
+        if self.m_stage_checkbox.Value:
+            self.add_status_msg("Staging is not supported for sweeps, tasks solve the projects in place", level="!")
+            return
+
+        get_file_dialogue = wx.FileDialog(
+            None,
+            "Choose project to sweep:",
+            defaultDir=self.path_textbox.Value,
+            wildcard="AEDT projects (*.aedt)|*.aedt",
+            style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST,
+        )
+        if get_file_dialogue.ShowModal() == wx.ID_OK:
+            project = get_file_dialogue.GetPath()
+            get_file_dialogue.Destroy()
+        else:
+            get_file_dialogue.Destroy()
+            return
+
+        try:
+            setups = read_setups(project)
+            counts = [len(variations(setup)) for setup in setups]
+        except (OSError, ValueError) as exc:
+            self.add_status_msg(f"Cannot read parametric setups of {project}: {exc}", level="!")
+            return
+
+        if not setups:
+            self.add_status_msg(f"{project} does not have parametric setups", level="!")
+            return
+
+        setup_dialogue = wx.SingleChoiceDialog(
+            self,
+            "Choose parametric setup:",
+            "Sweep",
+            [f"{setup['design']}: {setup['name']} ({count} variations)" for setup, count in zip(setups, counts)],
+        )
+        if setup_dialogue.ShowModal() != wx.ID_OK:
+            setup_dialogue.Destroy()
+            return
+        setup = setups[setup_dialogue.GetSelection()]
+        setup_dialogue.Destroy()
+
+        queue = self.queue_dropmenu.Value
+        _nodes, cores = self.requested_size()
+        tasks_dialogue = wx.NumberEntryDialog(
+            self,
+            f"Variations are split between tasks of {cores} cores each",
+            "Tasks:",
+            "Sweep",
+            default_tasks(setup, queue_dict[queue]["avail_cores"], cores),
+            1,
+            max_tasks(setup),
+        )
+        if tasks_dialogue.ShowModal() != wx.ID_OK:
+            tasks_dialogue.Destroy()
+            return
+        tasks = tasks_dialogue.GetValue()
+        tasks_dialogue.Destroy()
+
+        launch_data = self.prepare_launch("batch")
+        if launch_data is None:
+            return
+
+        aedt_path, env, reservation, reservation_id = launch_data
+        env, batch_options_file = apply_profile(cluster_config, queue, env, os.path.join(self.app_dir, "hpc_options"))
+        if not self.confirm_licenses(cores, tasks):
+            return
+
+        nodes_list_str = self.m_nodes_list.Value if self.m_nodes_list_checkbox.Value else ""
+        self.warn_pinned_nodes(nodes_list_str)
+
+        try:
+            results = submit_sweep(
+                project,
+                setup["name"],
+                tasks,
+                submit=self.recorded_submit(project),
+                aedt_path=aedt_path,
+                queue=queue,
+                allocation_rule=self.m_alloc_dropmenu.GetCurrentSelection(),
+                num=int(self.m_numcore.Value or 0),
+                queue_config=queue_config_dict,
+                env=env,
+                nodes_list_str=nodes_list_str,
+                reservation_id=reservation_id if reservation else "",
+                exclude_str=self.exclude_str(queue, nodes_list_str),
+                batch_options_file=batch_options_file,
+            )
+        except (OSError, ValueError) as exc:
+            self.add_status_msg(str(exc), level="!")
+            return
+
+        for _description, pid, msg in results:
+            log_dict["scheduler"] = pid is None
+            log_dict["pid"] = pid or "0"
+            log_dict["msg"] = msg
+            if pid:
+                self.log_data["PID List"].append(pid)
+            self.add_log_entry()
+
     def submit_interactive_job(self, aedt_path, env, reservation, reservation_id):
         """
         Submit interactive job
@@ -915,58 +2125,204 @@ class LauncherWindow(GUIFrame):
         :param reservation_id:
         :return: None
         """
-
-        scheduler = "sbatch"
-        allocation_rule = self.m_alloc_dropmenu.GetCurrentSelection()
-        if int(self.m_numcore.Value or 0) < 1:
-            self.add_status_msg("Nodes Value must be a positive integer", level="!")
-            return
-
-        num_nodes = num_cores = int(self.m_numcore.Value)
         queue = self.queue_dropmenu.Value
+        nodes_list_str = self.m_nodes_list.Value if self.m_nodes_list_checkbox.Value else ""
+        env, batch_options_file = apply_profile(cluster_config, queue, env, os.path.join(self.app_dir, "hpc_options"))
+        wrapper = []
+        if self.m_stage_checkbox.Value:
+            projects = self.select_staged_projects()
+            if not projects:
+                return
+            wrapper = staging_prefix(
+                os.path.dirname(projects[0]),
+                scratch_dir,
+                project_include(projects),
+                aedt_path=aedt_path,
+                product=self.products[self.m_select_version1.Value],
+            )
 
-        # interactive submission
-        env += f",DISPLAY={self.display_node}"
-
-        command = [scheduler, "--job-name", "aedt", "--partition", queue, "--export", env]
-        if allocation_rule == 0:
-            # 1 node and cores
-            command += ["--nodes", "1-1", "--ntasks", str(num_cores)]
-            total_cores = num_cores
-        else:
-            cores_per_node = queue_config_dict[queue]["cores"]
-            total_cores = cores_per_node * num_nodes
-            command += ["--nodes", f"{num_nodes}-{num_nodes}", "--ntasks", str(total_cores)]
-
-        nodes_list_str = self.m_nodes_list.Value
-        nodes_list_str = nodes_list_str.replace(" ", "")
-
-        if self.m_nodes_list_checkbox.Value and nodes_list_str:
-            command += ["--nodelist", nodes_list_str]
+        try:
+            command = interactive_command(
+                aedt_path,
+                env,
+                queue,
+                self.m_alloc_dropmenu.GetCurrentSelection(),
+                int(self.m_numcore.Value or 0),
+                queue_config_dict,
+                self.display_node,
+                nodes_list_str,
+                reservation_id if reservation else "",
+                batch_options_file,
+                wrapper,
+                self.user_dir,
+                exclude_str=self.exclude_str(queue, nodes_list_str),
+            )
+        except ValueError as exc:
+            self.add_status_msg(str(exc), level="!")
+            return
 
-        if reservation:
-            command += ["--reservation", reservation_id]
+        if not self.confirm_licenses(self.requested_size()[1]):
+            return
 
-        aedt_str = " ".join([os.path.join(aedt_path, "ansysedt"), "-machinelist", f"num={total_cores}"])
-        command += ["--wrap", f'"{aedt_str}"']
-        command = " ".join(command)  # convert to string to avoid escaping characters
-        print(f"Execute via: {command}")
+        self.warn_pinned_nodes(nodes_list_str)
+        allocation_rule = self.m_alloc_dropmenu.GetCurrentSelection()
+        if self.m_pool_checkbox.Value and allocation_rule == 0 and not nodes_list_str and not reservation:
+            # pool is opt-in, idle allocations left from the time it was enabled are not claimed
+            session = session_command(
+                aedt_path, queue, 0, int(self.m_numcore.Value), queue_config_dict, batch_options_file, wrapper
+            )
+            if self.start_pool_session(queue, session, f"{env},DISPLAY={self.display_node}".lstrip(",")):
+                return
 
         try:
-            output = subprocess.check_output(command, stderr=subprocess.STDOUT, shell=True, universal_newlines=True)
-        except subprocess.CalledProcessError as exc:
-            msg = exc.output
+            pid = self.recorded_submit(self.path_textbox.Value)(
+                command, queue, self.requested_size()[1], "Interactive session"
+            )
+        except ValueError as exc:
+            self.add_status_msg(str(exc), level="!")
+            return
+        except SubmissionHeld as exc:
+            msg = str(exc)
+            log_dict["scheduler"] = False
+            log_dict["pid"] = exc.entry_id
+        except SubmissionError as exc:
+            msg = str(exc)
             log_dict["scheduler"] = True
         else:
-            msg = f"Job submitted to {queue}\nSubmit Command:{command}"
-            pid = output.strip().split()[-1]
+            msg = f"Job submitted to {queue}\nSubmit Command:{' '.join(command)}"
             log_dict["scheduler"] = False
             log_dict["pid"] = pid
             self.log_data["PID List"].append(pid)
+            self.sizing.register(pid, self.m_select_version1.Value, self.path_textbox.Value)
 
         log_dict["msg"] = msg
         self.add_log_entry()
 
+    def select_staged_projects(self):
+        """Ask user for projects to copy to node scratch for interactive session.
+
+        Returns
+        -------
+        list
+            Paths to the projects of one folder, empty if user cancelled.
+        """
+        get_file_dialogue = wx.FileDialog(
+            None,
+            "Choose projects to stage:",
+            defaultDir=self.path_textbox.Value,
+            wildcard="AEDT projects (*.aedt)|*.aedt",
+            style=wx.FD_OPEN | wx.FD_MULTIPLE | wx.FD_FILE_MUST_EXIST,
+        )
+        projects = get_file_dialogue.GetPaths() if get_file_dialogue.ShowModal() == wx.ID_OK else []
+        get_file_dialogue.Destroy()
+        return projects
+
+    def limit_gate(self):
+        """Get gate that holds submissions exceeding QOS and association limits of the user."""
+        return LimitGate(self.limits.limits, qstat_list, self.held, self.license_checks())
+
+    def recorded_submit(self, project=""):
+        """Get function that submits through the limit gate and records submitted jobs in the job history."""
+        nodes, _cores = self.requested_size()
+        return self.job_db.recorder(self.limit_gate().submit, nodes, self.m_select_version1.Value, project)
+
+    def license_checks(self):
+        """Get checks of free licenses for the gate if licenses are configured to hold submissions."""
+        if self.licenses is not None and self.licenses.action == "hold":
+            return [self.licenses.check]
+        return []
+
+    def confirm_licenses(self, cores, jobs=1):
+        """Ask user to confirm submission if license server does not have enough free licenses.
+
+        Parameters
+        ----------
+        cores : int
+            Total number of cores of one job.
+        jobs : int, optional
+            Number of jobs.
+
+        Returns
+        -------
+        bool
+            ``True`` if submission should continue. Always ``True`` unless licenses are configured to warn.
+        """
+        if self.licenses is None or self.licenses.action != "warn":
+            return True
+
+        shortage = self.licenses.shortage(cores, jobs)
+        if not shortage:
+            return True
+
+        answer = add_message(
+            f"License server reports {shortage}.\nAEDT may fail to start. Submit anyway?", "Licenses", "?"
+        )
+        return answer == wx.ID_OK
+
+    def held_jobs_released(self, results):
+        """Log jobs submitted from the queue of held submissions.
+
+        Parameters
+        ----------
+        results : list
+            Results of :meth:`core.limits.HeldQueue.release`.
+        """
+        for entry, pid, msg in results:
+            log_dict["scheduler"] = pid is None
+            log_dict["pid"] = pid or entry["id"]
+            log_dict["msg"] = msg
+            if pid:
+                self.log_data["PID List"].append(pid)
+                self.job_db.record(pid, entry["description"], entry["command"], entry["partition"], entry["cores"])
+                if entry.get("output"):
+                    self.log_data.setdefault("Log Files", {})[pid] = entry["output"].replace("%j", pid)
+            self.add_log_entry()
+
+        self.update_job_status()
+
+    def start_pool_session(self, queue, session, env):
+        """Start session in idle warm allocation of the queue.
+
+        Parameters
+        ----------
+        queue : str
+            Partition name.
+        session : str
+            Shell command of the session, see :func:`core.submit.session_command`.
+        env : str
+            Environment variables of the session including ``DISPLAY``.
+
+        Returns
+        -------
+        bool
+            ``True`` if session was started, ``False`` if there is no idle allocation.
+        """
+        try:
+            claimed = self.pool.claim(queue, int(self.m_numcore.Value), session, env, self.user_dir, list(qstat_list))
+        except OSError as exc:
+            print(f"Cannot use session pool: {exc}")
+            return False
+
+        if claimed is None:
+            return False
+
+        pid, node = claimed
+        log_dict["scheduler"] = False
+        log_dict["pid"] = pid
+        log_dict["msg"] = f"Session started in warm allocation on {node}\nSession Command: {session}"
+        self.log_data["PID List"].append(pid)
+        self.job_db.record(
+            pid,
+            "Warm session",
+            session,
+            queue,
+            int(self.m_numcore.Value),
+            version=self.m_select_version1.Value,
+            project=self.path_textbox.Value,
+        )
+        self.add_log_entry()
+        return True
+
     def check_reservation(self):
         """Validate if user wants to run with predefined reservation.
 
@@ -989,6 +2345,9 @@ class LauncherWindow(GUIFrame):
                 add_message(
                     "Reservation ID is not provided. Please set ID and click launch again", "Reservation ID", "!"
                 )
+            elif self.reservations.updated and ar not in self.reservations.names():
+                add_message(f"Reservation {ar} does not exist. Please select one of available", "Reservation ID", "!")
+                ar = ""
 
         return reservation, ar
 
@@ -1007,85 +2366,7 @@ class LauncherWindow(GUIFrame):
         if DEBUG_MODE:
             return
 
-        client = InfluxDBClient(host=STATISTICS_SERVER, port=STATISTICS_PORT)
-        db_name = "aedt_hpc_launcher"
-        client.switch_database(db_name)
-
-        time_now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-        json_body = [
-            {
-                "measurement": db_name,
-                "tags": {
-                    "username": self.username,
-                    "version": version,
-                    "job_type": job_type,
-                    "cluster": self.hostname[:3],
-                },
-                "time": time_now,
-                "fields": {"count": 1},
-            }
-        ]
-
-        client.write_points(json_body)
-
-    def update_registry(self, aedt_path):
-        """Set registry for each run of EDT.
-
-        This is necessary because each run occurs on a different Linux node.
-
-        Disables:
-        1. Question on product improvement
-        2. Question on Project directory, this is grabbed from UI
-        3. Welcome message
-        4. Question on personal lib
-
-        Sets:
-        1. EDT Installation path
-        2. Slurm scheduler as default
-
-        aedt_path : str
-            Path to the installation directory of EDT.
-        """
-        if not os.path.isdir(self.path_textbox.Value):
-            os.mkdir(self.path_textbox.Value)
-
-        commands = []  # list to aggregate all commands to execute
-        registry_file = os.path.join(aedt_path, "UpdateRegistry")
-
-        # set base for each command: path to registry, product and level
-        command_base = [
-            registry_file,
-            "-Set",
-            "-ProductName",
-            self.products[self.m_select_version1.Value],
-            "-RegistryLevel",
-            "user",
-        ]
-
-        # disable question about participation in product improvement
-        commands.append(
-            ["-RegistryKey", "Desktop/Settings/ProjectOptions/ProductImprovementOptStatus", "-RegistryValue", "1"]
-        )
-
-        # set installation path
-        commands.append(["-RegistryKey", "Desktop/InstallationDirectory", "-RegistryValue", aedt_path])
-
-        # set project folder
-        commands.append(["-RegistryKey", "Desktop/ProjectDirectory", "-RegistryValue", self.path_textbox.Value])
-
-        # disable welcome message
-        commands.append(["-RegistryKey", "Desktop/Settings/ProjectOptions/ShowWelcomeMsg", "-RegistryValue", "0"])
-
-        # set personal lib
-        personal_lib = os.path.join(os.environ["HOME"], "Ansoft", "Personallib")
-        commands.append(["-RegistryKey", "Desktop/PersonalLib", "-RegistryValue", personal_lib])
-
-        # set Slurm scheduler
-        settings_areg = os.path.join(os.path.dirname(os.path.realpath(__file__)), "slurm_settings.areg")
-        commands.append(["-FromFile", settings_areg])
-
-        for command in commands:
-            subprocess.call(command_base + command)
+        send_statistics(self.username, self.hostname, version, job_type)
 
     def m_update_msg_list(self, *args):
         """Fired when user clicks 'Show all messages' for Scheduler messages window"""
@@ -1133,8 +2414,7 @@ class LauncherWindow(GUIFrame):
         self.user_build_viewlist.AppendItem([name, path])
         install_dir[name] = path
 
-        with open(os.path.join(path, "config", "ProductList.txt")) as file:
-            self.products[name] = next(file).rstrip()  # get first line
+        self.products[name] = read_product(path)
 
         self.write_custom_build()
 
@@ -1152,6 +2432,7 @@ class LauncherWindow(GUIFrame):
             return
 
         self.path_textbox.Value = path
+        self.update_sizing_advice()
 
     def shutdown_app(self, *args):
         """Exit from app by clicking X or Close button.
@@ -1165,8 +2446,10 @@ class LauncherWindow(GUIFrame):
         except FileNotFoundError:
             pass
 
+        get_runner().shutdown()  # do not wait for slow scheduler commands of background threads
         while len(threading.enumerate()) > 1:  # possible solution to wait until all threads are dead
             time.sleep(0.25)
+        self.job_db.close()
 
         signal.pthread_kill(threading.get_ident(), signal.SIGINT)
         os.kill(os.getpid(), signal.SIGINT)
@@ -1174,44 +2457,7 @@ class LauncherWindow(GUIFrame):
     def open_overwatch(self):
         """Open Overwatch with java."""
         command = [FIREFOX, f"{overwatch_url}/users/{self.username}"]
-        subprocess.call(command)
-
-    @staticmethod
-    def _submit_batch_thread(aedt_path, env, command_key):
-        """Start EDT in pre/post mode.
-
-        Parameters
-        ----------
-        aedt_path : str
-            Path to the EDT root.
-        env : str
-            String with list of environment variables.
-        command_key :
-            Add key to open Submit or Monitor Job dialog.
-        """
-
-        env_vars = os.environ.copy()
-        if env:
-            for var_value in env.split(","):
-                variable, value = var_value.split("=")
-                env_vars[variable] = value
-
-        command = [os.path.join(aedt_path, "ansysedt"), command_key]
-        print("Electronics Desktop is started via:", subprocess.list2cmdline(command))
-        subprocess.Popen(command, env=env_vars)
-
-
-def check_ssh():
-    """Verify that all passwordless SSH are in place."""
-    ssh_path = os.path.join(os.environ["HOME"], ".ssh")
-    for file in ["authorized_keys", "config"]:
-        if not os.path.isfile(os.path.join(ssh_path, file)):
-            if os.path.isdir(ssh_path):
-                shutil.rmtree(ssh_path)
-
-            proc = subprocess.Popen([path_to_ssh], stdin=subprocess.PIPE, shell=True)
-            proc.communicate(input=b"\n\n\n")
-            break
+        get_runner().spawn(command)
 
 
 def add_message(message, title="", icon="?"):
@@ -1230,7 +2476,7 @@ def add_message(message, title="", icon="?"):
     Returns
     -------
     int
-        Response from the user (for example, wx.OK).
+        Response from the user (for example, wx.ID_OK).
     """
 
     if icon == "?":
@@ -1247,6 +2493,27 @@ def add_message(message, title="", icon="?"):
     return result
 
 
+def insert_after(anchor, window, proportion=0, flag=wx.ALL, border=5):
+    """Add window created in code to the sizer of the window generated by wxFormBuilder.
+
+    Parameters
+    ----------
+    anchor : wx.Window
+        Window after which new window is placed.
+    window : wx.Window
+        New window.
+    proportion : int, optional
+        Proportion of the sizer item.
+    flag : int, optional
+        Flags of the sizer item.
+    border : int, optional
+        Border of the sizer item.
+    """
+    sizer = anchor.GetContainingSizer()
+    index = [item.GetWindow() for item in sizer.GetChildren()].index(anchor)
+    sizer.Insert(index + 1, window, proportion, flag, border)
+
+
 def init_combobox(entry_list, combobox, default_value=""):
     """Fills a wx.Combobox element with the entries in a list.
 
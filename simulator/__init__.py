@@ -0,0 +1 @@
+"""Fake Slurm cluster to run the launcher and measure it without a real cluster, see :mod:`simulator.harness`."""
@@ -0,0 +1,419 @@
+"""Synthetic Slurm cluster shared by the fake scheduler commands and the fake Overwatch server.
+
+State of the cluster is kept in a JSON file: settings of the workload and jobs submitted through the fake
+``sbatch``. Background jobs of the workload are not stored, they are generated from the seed and the current time.
+Each job slot is renewed every :data:`GENERATIONS` periods with staggered phases, so that consecutive snapshots
+differ only by a part of the jobs and a cluster with thousands of jobs costs nothing to keep.
+"""
+import fcntl
+import getpass
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from core.cache import read_json
+from core.cache import write_json
+from core.hostlist import compress
+
+STATE_ENV = "SLURM_SIMULATOR_STATE"
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# background job slot gets a new job every GENERATIONS periods
+GENERATIONS = 10
+
+# seconds after which submitted job on a flaky node fails
+FAILURE_DELAY = 30
+
+BACKGROUND_ID = 10000000
+
+JOB_NAMES = ["aedt", "hfss", "maxwell", "icepak", "q3d", "batch"]
+
+DEFAULT_WORKLOAD = {
+    "jobs": 2000,  # background jobs in the queue
+    "user_jobs": 20,  # background jobs of the current user
+    "users": 100,  # number of other users
+    "nodes": 50,  # nodes per partition
+    "down_nodes": 0.02,  # fraction of nodes that are down or drained
+    "flaky_nodes": 0.0,  # fraction of nodes where submitted jobs fail right after start
+    "reservations": 3,
+    "period": 60,  # seconds between changes of background jobs
+    "start_delay": 10,  # seconds before submitted job starts
+    "latency": 0.0,  # seconds per command
+    "jitter": 0.5,  # random addition to latency as a fraction of it
+    "failure_rate": 0.0,  # probability of a command to fail
+    "seed": 0,
+    # per user limits of QOS normal: max_jobs, max_submit, max_cpus and max_job_cpus
+    "qos_limits": {},
+    # licenses issued by the license server, running jobs use one electronics_desktop and anshpc above 4 cores
+    "licenses": {"electronics_desktop": 2500, "anshpc": 50000},
+    "partitions": {"ottc01": {"cores": 28, "ram": 976}},
+}
+
+
+def create_cluster(state_file, **workload):
+    """Write state file of a new cluster.
+
+    Parameters
+    ----------
+    state_file : str
+        Path to the state file.
+    **workload
+        Settings that override :data:`DEFAULT_WORKLOAD`.
+
+    Returns
+    -------
+    dict
+        State of the cluster.
+    """
+    unknown = set(workload) - set(DEFAULT_WORKLOAD)
+    if unknown:
+        raise ValueError(f"Unknown workload settings: {', '.join(sorted(unknown))}")
+
+    state = {
+        "workload": dict(DEFAULT_WORKLOAD, **workload),
+        "user": getpass.getuser(),
+        "next_id": 1000,  # background jobs have IDs above BACKGROUND_ID
+        "jobs": {},
+        "ended": {},  # submitted jobs cancelled after start, kept for sacct
+        "cancelled": [],
+    }
+    write_json(state_file, state)
+    return state
+
+
+def load_state(state_file=None):
+    """Read state of the cluster, by default from the file in :data:`STATE_ENV` environment variable."""
+    state_file = state_file or os.environ[STATE_ENV]
+    state = read_json(state_file)
+    if state is None:
+        raise FileNotFoundError(f"Cluster state {state_file} does not exist")
+    return state
+
+
+@contextmanager
+def modify_state(state_file=None):
+    """Lock state of the cluster for read-modify-write of concurrent commands and save it on exit."""
+    state_file = state_file or os.environ[STATE_ENV]
+    with open(state_file + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = load_state(state_file)
+            yield state
+            write_json(state_file, state)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def format_time(timestamp):
+    """Format epoch as Slurm time."""
+    return time.strftime(TIME_FORMAT, time.localtime(timestamp))
+
+
+def node_names(partition, count):
+    """Get names of the nodes of the partition, eg ``ottc01n001``."""
+    return [f"{partition}n{num:03d}" for num in range(1, count + 1)]
+
+
+def is_down(workload, node):
+    """Check if node is down, same nodes are down for the whole simulation."""
+    return random.Random(f"{workload['seed']}:down:{node}").random() < workload["down_nodes"]
+
+
+def is_flaky(workload, node):
+    """Check if submitted jobs fail on the node, same nodes are flaky for the whole simulation."""
+    return random.Random(f"{workload['seed']}:flaky:{node}").random() < workload["flaky_nodes"]
+
+
+def failure_time(state, job):
+    """Get time when submitted job fails on a flaky node, ``None`` if all its nodes are fine."""
+    workload = state["workload"]
+    if job["held"] or not any(is_flaky(workload, node) for node in job["node_list"]):
+        return None
+    return job["submit"] + workload["start_delay"] + FAILURE_DELAY
+
+
+def failed_jobs(state, now):
+    """Get submitted jobs that failed on flaky nodes before the given time, with start and end time."""
+    jobs = []
+    for job in state["jobs"].values():
+        end = failure_time(state, job)
+        if end is not None and end <= now:
+            jobs.append(dict(job, state="F", reason="", start=end - FAILURE_DELAY, end=end))
+    return jobs
+
+
+def place(free_cores, nodes, cores, cores_per_node, first):
+    """Allocate cores on nodes for a job.
+
+    Parameters
+    ----------
+    free_cores : dict
+        Number of free cores keyed by node name of the partition, updated in place.
+    nodes : int
+        Number of nodes of the job, multiple node jobs get whole nodes.
+    cores : int
+        Number of cores of the job.
+    cores_per_node : int
+        Cores of the node.
+    first : float
+        Position (0 to 1) in the list of nodes to start the search from, to spread jobs over the partition.
+
+    Returns
+    -------
+    list
+        Names of allocated nodes, empty if the job does not fit.
+    """
+    names = list(free_cores)
+    if not names:
+        return []
+
+    offset = int(first * len(names))
+    names = names[offset:] + names[:offset]
+    if nodes == 1:
+        names = [name for name in names if free_cores[name] >= cores][:1]
+    else:
+        names = [name for name in names if free_cores[name] == cores_per_node][:nodes]
+        if len(names) < nodes:
+            return []
+
+    for name in names:
+        free_cores[name] -= cores // nodes
+    return names
+
+
+def background_jobs(state, now):
+    """Generate jobs of the workload that are in the queue at the given time.
+
+    Parameters
+    ----------
+    state : dict
+        State of the cluster.
+    now : float
+        Current time.
+
+    Returns
+    -------
+    list
+        Job records with ID, name, user, partition, state (``R`` or ``PD``), number of cores and nodes, node names,
+        submission and start time.
+    """
+    workload = state["workload"]
+    period = workload["period"]
+    partitions = list(workload["partitions"])
+    current_period = int(now // period)
+    free_cores = {
+        partition: {
+            node: settings["cores"] for node in node_names(partition, workload["nodes"]) if not is_down(workload, node)
+        }
+        for partition, settings in workload["partitions"].items()
+    }
+
+    jobs = []
+    for slot in range(workload["jobs"]):
+        phase = slot % GENERATIONS
+        generation = (current_period + phase) // GENERATIONS
+        rng = random.Random(f"{workload['seed']}:{slot}:{generation}")
+
+        partition = rng.choice(partitions)
+        cores_per_node = workload["partitions"][partition]["cores"]
+        if rng.random() < 0.8:
+            nodes = 1
+            cores = min(rng.choice([1, 2, 4, 8, 16, cores_per_node]), cores_per_node)
+        else:
+            nodes = rng.choice([2, 4, 8])
+            cores = nodes * cores_per_node
+
+        submit = (generation * GENERATIONS - phase) * period + rng.uniform(0, period)
+        start = submit + rng.expovariate(1 / (GENERATIONS * period * 0.3))
+        first = rng.random()
+        node_list = place(free_cores[partition], nodes, cores, cores_per_node, first) if start <= now else []
+        running = bool(node_list)
+
+        if slot < workload["user_jobs"]:
+            user = state["user"]
+        else:
+            user = f"user{rng.randrange(workload['users']):03d}"
+
+        jobs.append(
+            {
+                "id": str(BACKGROUND_ID + generation * workload["jobs"] + slot),
+                "name": rng.choice(JOB_NAMES),
+                "user": user,
+                "partition": partition,
+                "state": "R" if running else "PD",
+                "reason": "" if running else ("Resources" if start <= now else "Priority"),
+                "cores": cores,
+                "nodes": nodes,
+                "node_list": node_list,
+                "submit": submit,
+                "start": start if running else 0,
+            }
+        )
+
+    cancelled = set(state["cancelled"])
+    return [job for job in jobs if job["id"] not in cancelled]
+
+
+def submitted_jobs(state, now):
+    """Get jobs submitted with fake ``sbatch`` as they are at the given time, see :func:`background_jobs`."""
+    workload = state["workload"]
+    jobs = []
+    for job in state["jobs"].values():
+        end = failure_time(state, job)
+        if end is not None and end <= now:
+            continue  # left the queue, see failed_jobs
+
+        job = dict(job)
+        if job["held"]:
+            job.update(state="PD", reason="JobHeldUser", start=0, node_list=[])
+        elif now < job["submit"] + workload["start_delay"]:
+            job.update(state="PD", reason="Priority", start=0, node_list=[])
+        else:
+            job.update(state="R", reason="", start=job["submit"] + workload["start_delay"])
+        jobs.append(job)
+    return jobs
+
+
+def cluster_jobs(state, now=None):
+    """Get all jobs in the queue, see :func:`background_jobs`."""
+    now = now or time.time()
+    return background_jobs(state, now) + submitted_jobs(state, now)
+
+
+def node_usage(state, jobs):
+    """Get state of each node.
+
+    Parameters
+    ----------
+    state : dict
+        State of the cluster.
+    jobs : list
+        Jobs from :func:`cluster_jobs`.
+
+    Returns
+    -------
+    list
+        Node records with name, partition, state, number of allocated and total cores and memory in MB.
+    """
+    workload = state["workload"]
+    allocated = {}
+    for job in jobs:
+        if job["state"] == "R" and job["node_list"]:
+            per_node = -(-job["cores"] // len(job["node_list"]))
+            for node in job["node_list"]:
+                allocated[node] = allocated.get(node, 0) + per_node
+
+    nodes = []
+    for partition, settings in workload["partitions"].items():
+        for name in node_names(partition, workload["nodes"]):
+            down = is_down(workload, name)
+            alloc = 0 if down else min(allocated.get(name, 0), settings["cores"])
+            if down:
+                node_state = "drained"
+            elif alloc == settings["cores"]:
+                node_state = "allocated"
+            elif alloc:
+                node_state = "mixed"
+            else:
+                node_state = "idle"
+
+            nodes.append(
+                {
+                    "name": name,
+                    "partition": partition,
+                    "state": node_state,
+                    "alloc_cores": alloc,
+                    "total_cores": settings["cores"],
+                    "memory": settings["ram"] * 1024,
+                }
+            )
+    return nodes
+
+
+def reservations(state, now=None):
+    """Get reservations of the cluster.
+
+    Reservations start every day at 8 AM on the first nodes of the partitions and last for a working day. Each
+    second reservation is restricted to the current user.
+
+    Returns
+    -------
+    list
+        Reservation records with name, partition, node names, number of cores, start and end time and users.
+    """
+    now = now or time.time()
+    workload = state["workload"]
+    partitions = list(workload["partitions"])
+    today = time.mktime(time.localtime(now)[:3] + (8, 0, 0, 0, 0, -1))
+
+    result = []
+    for num in range(workload["reservations"]):
+        partition = partitions[num % len(partitions)]
+        offset = 2 * num
+        nodes = node_names(partition, workload["nodes"])[offset:][:2]
+        result.append(
+            {
+                "name": f"res_{partition}_{num}",
+                "partition": partition,
+                "nodes": nodes,
+                "cores": len(nodes) * workload["partitions"][partition]["cores"],
+                "start": today,
+                "end": today + 10 * 3600,
+                "users": [state["user"]] if num % 2 else ["root"],
+            }
+        )
+    return result
+
+
+def finished_jobs(state, since, now=None):
+    """Generate accounting records of jobs that started in the time interval.
+
+    Parameters
+    ----------
+    state : dict
+        State of the cluster.
+    since : float
+        Start of the interval.
+    now : float, optional
+        End of the interval, by default now.
+
+    Returns
+    -------
+    list
+        Records with ID, partition, submission and start time, number of nodes and cores.
+    """
+    now = now or time.time()
+    workload = state["workload"]
+    partitions = list(workload["partitions"])
+    per_hour = max(1, workload["jobs"] // 24)
+
+    records = []
+    for hour in range(int(since // 3600), int(now // 3600) + 1):
+        rng = random.Random(f"{workload['seed']}:sacct:{hour}")
+        for num in range(per_hour):
+            start = hour * 3600 + rng.uniform(0, 3600)
+            wait = rng.expovariate(1 / 600)
+            partition = rng.choice(partitions)
+            nodes = 1 if rng.random() < 0.8 else rng.choice([2, 4, 8])
+            cores = nodes * workload["partitions"][partition]["cores"] if nodes > 1 else rng.choice([1, 4, 8, 16])
+            if since <= start <= now:
+                records.append(
+                    {
+                        "id": str(500000 + hour * per_hour + num),
+                        "partition": partition,
+                        "submit": start - wait,
+                        "start": start,
+                        "nodes": nodes,
+                        "cores": cores,
+                    }
+                )
+    return records
+
+
+def node_list_expression(job):
+    """Get ``NODELIST(REASON)`` value of the job."""
+    if job["state"] == "R":
+        return compress(job["node_list"])
+    return f"({job['reason']})"
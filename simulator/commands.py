@@ -0,0 +1,586 @@
+"""Fake Slurm commands and AEDT tools backed by :mod:`simulator.cluster`.
+
+Commands are installed as small shell wrappers with :func:`install`, so that the launcher calls them by name from
+``PATH`` exactly as the real ones::
+
+    python -m simulator.commands squeue --me --format "%.18i %.9P %.8j"
+
+Each scheduler command sleeps for the latency of the workload and fails with the failure rate of the workload, as a
+busy controller would do.
+"""
+import argparse
+import os
+import random
+import re
+import shlex
+import sys
+import time
+
+from core.config import LAUNCHER_DIR
+from core.hostlist import compress
+from core.hostlist import expand
+from simulator.cluster import STATE_ENV
+from simulator.cluster import cluster_jobs
+from simulator.cluster import failed_jobs
+from simulator.cluster import finished_jobs
+from simulator.cluster import format_time
+from simulator.cluster import is_down
+from simulator.cluster import load_state
+from simulator.cluster import modify_state
+from simulator.cluster import node_list_expression
+from simulator.cluster import node_names
+from simulator.cluster import node_usage
+from simulator.cluster import reservations
+from simulator.cluster import submitted_jobs
+
+SCHEDULER_TOOLS = ["squeue", "sinfo", "sacct", "sstat", "sbatch", "scancel", "scontrol", "sacctmgr"]
+AEDT_TOOLS = ["ansysedt", "UpdateRegistry"]
+LICENSE_TOOLS = ["lmutil"]
+
+SQUEUE_HEADERS = {
+    "i": "JOBID",
+    "P": "PARTITION",
+    "j": "NAME",
+    "u": "USER",
+    "t": "ST",
+    "T": "STATE",
+    "C": "CPUS",
+    "D": "NODES",
+    "V": "SUBMIT_TIME",
+    "S": "START_TIME",
+    "R": "NODELIST(REASON)",
+    "N": "NODELIST",
+}
+
+STATE_NAMES = {"R": "RUNNING", "PD": "PENDING"}
+
+
+class CommandError(Exception):
+    """Raised to print error of the command and exit with non zero code."""
+
+
+def render(format_str, fields):
+    """Render Slurm ``--format`` string, eg ``%.18i %.9P``.
+
+    Parameters
+    ----------
+    format_str : str
+        Format with ``%[.][width]<letter>`` specifiers. Dot justifies the value to the right.
+    fields : dict
+        Values keyed by the letter.
+
+    Returns
+    -------
+    str
+        Line, values are truncated to the width.
+    """
+
+    def replace(match):
+        right, width, letter = match.groups()
+        value = str(fields.get(letter, ""))
+        if not width:
+            return value
+        width = int(width)
+        value = value[:width]
+        return value.rjust(width) if right else value.ljust(width)
+
+    return re.sub(r"%(\.)?(\d+)?([A-Za-z])", replace, format_str)
+
+
+def format_duration(seconds):
+    """Format seconds as Slurm duration ``[D-]HH:MM:SS``."""
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    clock = f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{days}-{clock}" if days else clock
+
+
+def job_usage(job, now):
+    """Get elapsed seconds, CPU seconds and max RSS in KB of a running job, constant for the job."""
+    rng = random.Random(f"usage:{job['id']}")
+    elapsed = max(0, now - job["start"])
+    return elapsed, elapsed * job["cores"] * rng.uniform(0.2, 1.0), rng.randint(1, 64) * 1024**2
+
+
+def squeue(argv, state, now):
+    """Print jobs of the queue."""
+    parser = argparse.ArgumentParser(prog="squeue", add_help=False)
+    parser.add_argument("--me", action="store_true")
+    parser.add_argument("-u", "--user")
+    parser.add_argument("-j", "--jobs")
+    parser.add_argument("-p", "--partition")
+    parser.add_argument("-t", "--states")
+    parser.add_argument("-o", "--format", default="%.18i %.9P %.8j %.8u %.2t %.10M %.6D %R")
+    parser.add_argument("-h", "--noheader", action="store_true")
+    args, _ = parser.parse_known_args(argv)
+
+    jobs = cluster_jobs(state, now)
+    users = [state["user"]] if args.me else (args.user.split(",") if args.user else None)
+    if users:
+        jobs = [job for job in jobs if job["user"] in users]
+    if args.jobs:
+        jobs = [job for job in jobs if job["id"] in args.jobs.split(",")]
+    if args.partition:
+        jobs = [job for job in jobs if job["partition"] in args.partition.split(",")]
+    if args.states:
+        jobs = [job for job in jobs if job["state"] in args.states.upper().split(",")]
+
+    lines = [] if args.noheader else [render(args.format, SQUEUE_HEADERS)]
+    for job in jobs:
+        fields = {
+            "i": job["id"],
+            "P": job["partition"],
+            "j": job["name"],
+            "u": job["user"],
+            "t": job["state"],
+            "T": STATE_NAMES[job["state"]],
+            "C": job["cores"],
+            "D": job["nodes"],
+            "V": format_time(job["submit"]),
+            "S": format_time(job["start"]) if job["start"] else "N/A",
+            "R": node_list_expression(job),
+            "N": compress(job["node_list"]),
+        }
+        lines.append(render(args.format, fields))
+    return lines
+
+
+def sinfo(argv, state, now):
+    """Print state of the nodes, one line per node."""
+    parser = argparse.ArgumentParser(prog="sinfo", add_help=False)
+    parser.add_argument("-N", "--Node", action="store_true")
+    parser.add_argument("-h", "--noheader", action="store_true")
+    parser.add_argument("-p", "--partition")
+    parser.add_argument("-R", "--list-reasons", action="store_true")
+    parser.add_argument("-o", "--format", default="%N|%P|%T|%C|%m|%e")
+    args, _ = parser.parse_known_args(argv)
+
+    lines = []
+    for node in node_usage(state, cluster_jobs(state, now)):
+        if args.partition and node["partition"] not in args.partition.split(","):
+            continue
+        if args.list_reasons and node["state"] != "drained":
+            continue
+
+        total = node["total_cores"]
+        other = total if node["state"] == "drained" else 0
+        fields = {
+            "N": node["name"],
+            "P": node["partition"],
+            "T": node["state"],
+            "C": f"{node['alloc_cores']}/{total - node['alloc_cores'] - other}/{other}/{total}",
+            "m": node["memory"],
+            "e": node["memory"] * (total - node["alloc_cores"]) // total,
+            "E": "Kill task failed" if node["state"] == "drained" else "none",
+        }
+        lines.append(render(args.format, fields))
+    return lines
+
+
+def sacct(argv, state, now):
+    """Print accounting records of the given running or ended jobs or of the jobs started since ``--starttime``."""
+    parser = argparse.ArgumentParser(prog="sacct", add_help=False)
+    parser.add_argument("-j", "--jobs")
+    parser.add_argument("-r", "--partition")
+    parser.add_argument("-S", "--starttime")
+    parser.add_argument("-X", "--allocations", action="store_true")
+    parser.add_argument("-s", "--state")
+    parser.add_argument("-o", "--format", default="JobID,Partition,Submit,Start,NNodes,NCPUS")
+    args, _ = parser.parse_known_args(argv)
+
+    records = []
+    failed = {}
+    for job in failed_jobs(state, now):
+        failed[job["id"]] = {
+            "JobID": job["id"],
+            "Partition": job["partition"],
+            "Submit": format_time(job["submit"]),
+            "Start": format_time(job["start"]),
+            "End": format_time(job["end"]),
+            "NNodes": job["nodes"],
+            "NCPUS": job["cores"],
+            "ElapsedRaw": int(job["end"] - job["start"]),
+            "TotalCPU": "00:00:01",
+            "MaxRSS": "",
+            "NodeList": compress(job["node_list"]),
+            "State": "FAILED",
+            "ExitCode": "1:0",
+            "start": job["start"],
+        }
+
+    if args.state:
+        # only submitted jobs of the user fail, other final states are not simulated
+        since = time.mktime(time.strptime(args.starttime, "%Y-%m-%dT%H:%M:%S")) if args.starttime else now - 86400
+        if "FAILED" in args.state.split(","):
+            records = [record for record in failed.values() if record["start"] >= since]
+    elif args.jobs:
+        job_ids = args.jobs.split(",")
+        for job in cluster_jobs(state, now):
+            if job["id"] in job_ids and job["state"] == "R":
+                elapsed, _, _ = job_usage(job, now)
+                records.append(
+                    {
+                        "JobID": job["id"],
+                        "Partition": job["partition"],
+                        "Submit": format_time(job["submit"]),
+                        "Start": format_time(job["start"]),
+                        "NNodes": job["nodes"],
+                        "NCPUS": job["cores"],
+                        "ElapsedRaw": int(elapsed),
+                        "TotalCPU": "00:00:00",
+                        "MaxRSS": "",
+                        "State": "RUNNING",
+                    }
+                )
+        records += [record for job_id, record in failed.items() if job_id in job_ids]
+        for job_id, job in state.get("ended", {}).items():
+            if job_id in job_ids:
+                elapsed, cpu_time, max_rss = job_usage(job, job["end"])
+                record = {
+                    "JobID": job_id,
+                    "Partition": job["partition"],
+                    "Submit": format_time(job["submit"]),
+                    "Start": format_time(job["start"]),
+                    "NNodes": job["nodes"],
+                    "NCPUS": job["cores"],
+                    "ElapsedRaw": int(elapsed),
+                    "TotalCPU": format_duration(cpu_time),
+                    "MaxRSS": "",
+                    "State": f"CANCELLED by {state['user']}",
+                    "End": format_time(job["end"]),
+                    "ExitCode": "0:15",
+                }
+                records.append(record)
+                if not args.allocations:
+                    # usage of the batch script is reported by its step
+                    records.append(dict(record, JobID=f"{job_id}.batch", MaxRSS=f"{max_rss}K", State="CANCELLED"))
+    else:
+        since = time.mktime(time.strptime(args.starttime, "%Y-%m-%dT%H:%M:%S")) if args.starttime else now - 86400
+        partitions = args.partition.split(",") if args.partition else None
+        for job in finished_jobs(state, since, now):
+            if partitions and job["partition"] not in partitions:
+                continue
+            records.append(
+                {
+                    "JobID": job["id"],
+                    "Partition": job["partition"],
+                    "Submit": format_time(job["submit"]),
+                    "Start": format_time(job["start"]),
+                    "NNodes": job["nodes"],
+                    "NCPUS": job["cores"],
+                }
+            )
+
+    fields = args.format.split(",")
+    return ["|".join(str(record.get(field, "")) for field in fields) for record in records]
+
+
+def sstat(argv, state, now):
+    """Print usage of the running steps, fails if any of the jobs is not running."""
+    parser = argparse.ArgumentParser(prog="sstat", add_help=False)
+    parser.add_argument("-j", "--jobs", required=True)
+    parser.add_argument("-o", "--format", default="JobID,AveCPU,NTasks,MaxRSS")
+    args, _ = parser.parse_known_args(argv)
+
+    job_ids = args.jobs.split(",")
+    running = {job["id"]: job for job in cluster_jobs(state, now) if job["state"] == "R"}
+
+    fields = args.format.split(",")
+    lines = []
+    for job_id in job_ids:
+        if job_id not in running:
+            continue
+        elapsed, cpu_time, max_rss = job_usage(running[job_id], now)
+        record = {
+            "JobID": f"{job_id}.batch",
+            "AveCPU": format_duration(cpu_time / running[job_id]["cores"]),
+            "NTasks": running[job_id]["cores"],
+            "MaxRSS": f"{max_rss}K",
+        }
+        lines.append("|".join(str(record.get(field, "")) for field in fields))
+
+    missing = [job_id for job_id in job_ids if job_id not in running]
+    if missing:
+        print("\n".join(lines))
+        raise CommandError(f"sstat: error: couldn't get steps for job {missing[0]}")
+    return lines
+
+
+def parse_script_options(script_file):
+    """Get ``#SBATCH`` options of the job script as arguments."""
+    options = []
+    with open(script_file) as file:
+        for line in file:
+            if line.startswith("#SBATCH"):
+                options += shlex.split(line)[1:]
+    return options
+
+
+def sbatch(argv, state_file, now):
+    """Submit job with options from command line or ``#SBATCH`` lines of the script."""
+    parser = argparse.ArgumentParser(prog="sbatch", add_help=False)
+    parser.add_argument("-J", "--job-name", default="")
+    parser.add_argument("-p", "--partition")
+    parser.add_argument("-N", "--nodes", default="1")
+    parser.add_argument("-n", "--ntasks", type=int, default=1)
+    parser.add_argument("--exclusive", action="store_true")
+    parser.add_argument("-w", "--nodelist", default="")
+    parser.add_argument("-x", "--exclude", default="")
+    parser.add_argument("--reservation", default="")
+    parser.add_argument("--wrap", default="")
+    # options with values that are accepted, but do not change the simulation
+    for option in ["--export", "--mem", "-o", "--output", "-e", "--error", "-D", "--chdir", "-t", "--time"]:
+        parser.add_argument(option)
+    parser.add_argument("script", nargs="?")
+    args, _ = parser.parse_known_args(argv)
+    if args.script:
+        if not os.path.isfile(args.script):
+            raise CommandError(f"sbatch: error: Unable to open file {args.script}")
+        args, _ = parser.parse_known_args(parse_script_options(args.script) + argv)
+    elif not args.wrap:
+        raise CommandError("sbatch: error: Batch script is empty!")
+
+    with modify_state(state_file) as state:
+        workload = state["workload"]
+        if args.partition not in workload["partitions"]:
+            raise CommandError(f"sbatch: error: invalid partition specified: {args.partition}")
+
+        cores_per_node = workload["partitions"][args.partition]["cores"]
+        nodes = int(args.nodes.split("-")[0])
+        cores = nodes * cores_per_node if args.exclusive else args.ntasks
+        if nodes > workload["nodes"] or cores > nodes * cores_per_node:
+            raise CommandError(
+                "sbatch: error: Batch job submission failed: Requested node configuration is not available"
+            )
+
+        if args.reservation and args.reservation not in [res["name"] for res in reservations(state, now)]:
+            raise CommandError("sbatch: error: Batch job submission failed: Requested reservation is invalid")
+
+        partition_nodes = [
+            node for node in node_names(args.partition, workload["nodes"]) if not is_down(workload, node)
+        ]
+        excluded = set(expand(args.exclude)) if args.exclude else set()
+        if set(expand(args.nodelist) if args.nodelist else []) & excluded:
+            raise CommandError("sbatch: error: Batch job submission failed: Required nodes are also excluded")
+        partition_nodes = [node for node in partition_nodes if node not in excluded]
+        if not partition_nodes:
+            raise CommandError(
+                "sbatch: error: Batch job submission failed: Requested node configuration is not available"
+            )
+        if args.nodelist:
+            requested = expand(args.nodelist)
+            if set(requested) - set(partition_nodes):
+                raise CommandError("sbatch: error: Batch job submission failed: Invalid node name specified")
+            node_list = requested[:nodes]
+        else:
+            first = random.randrange(len(partition_nodes))
+            node_list = [partition_nodes[(first + num) % len(partition_nodes)] for num in range(nodes)]
+
+        job_id = str(state["next_id"])
+        state["next_id"] += 1
+        state["jobs"][job_id] = {
+            "id": job_id,
+            "name": args.job_name or (os.path.basename(args.script) if args.script else "wrap"),
+            "user": state["user"],
+            "partition": args.partition,
+            "reason": "",
+            "cores": cores,
+            "nodes": nodes,
+            "node_list": node_list,
+            "submit": now,
+            "held": False,
+        }
+
+    return [f"Submitted batch job {job_id}"]
+
+
+def sacctmgr(argv, state, now):
+    """Show association of the user and QOS ``normal`` with limits of the workload, ``--parsable2`` format."""
+    limits = state["workload"]["qos_limits"]
+    if "assoc" in argv:
+        # Partition, QOS, DefaultQOS, GrpJobs, GrpSubmitJobs, GrpTRES, MaxJobs, MaxSubmitJobs, MaxTRES
+        return ["|normal|normal||||||"]
+    if "qos" in argv:
+        # Name, MaxJobsPerUser, MaxSubmitJobsPerUser, MaxTRESPerUser, MaxTRES
+        max_cpus = f"cpu={limits['max_cpus']}" if limits.get("max_cpus") else ""
+        max_job_cpus = f"cpu={limits['max_job_cpus']}" if limits.get("max_job_cpus") else ""
+        return [f"normal|{limits.get('max_jobs', '')}|{limits.get('max_submit', '')}|{max_cpus}|{max_job_cpus}"]
+    raise CommandError(f"sacctmgr: error: Invalid command: {' '.join(argv)}")
+
+
+def lmutil(argv, state, now):
+    """Show usage of the licenses of the workload as ``lmutil lmstat -a`` does."""
+    if argv[:1] != ["lmstat"]:
+        raise CommandError(f"lmutil: unknown command {' '.join(argv[:1])}")
+
+    running = [job for job in cluster_jobs(state, now) if job["state"] == "R"]
+    in_use = {
+        "electronics_desktop": len(running),
+        "anshpc": sum(max(0, job["cores"] - 4) for job in running),
+    }
+    lines = [
+        "lmutil - Copyright (c) 1989-2019 Flexera. All Rights Reserved.",
+        f"Flexible License Manager status on {time.strftime('%a %m/%d/%Y %H:%M', time.localtime(now))}",
+        "",
+        "License server status: 1055@licserver",
+        "licserver: license server UP (MASTER) v11.16.4",
+        "",
+        "Vendor daemon status (on licserver):",
+        "",
+        "  ansyslmd: UP v11.16.4",
+        "",
+        "Feature usage info:",
+        "",
+    ]
+    for feature, issued in state["workload"]["licenses"].items():
+        used = min(issued, in_use.get(feature, 0))
+        lines.append(f"Users of {feature}:  (Total of {issued} licenses issued;  Total of {used} licenses in use)")
+        lines.append("")
+    return lines
+
+
+def scancel(argv, state_file, now):
+    """Cancel jobs."""
+    job_ids = [arg for arg in argv if not arg.startswith("-")]
+    with modify_state(state_file) as state:
+        started = {job["id"]: job for job in submitted_jobs(state, now) if job["state"] == "R"}
+        for job_id in job_ids:
+            if job_id in state["jobs"]:
+                del state["jobs"][job_id]
+                if job_id in started:
+                    state.setdefault("ended", {})[job_id] = dict(started[job_id], end=now)
+            elif job_id.isdigit():
+                state["cancelled"].append(job_id)
+            else:
+                raise CommandError(f"scancel: error: Invalid job id {job_id}")
+    return []
+
+
+def scontrol(argv, state_file, now):
+    """Show reservations, hold, release or requeue submitted jobs or update their name."""
+    if argv[:2] == ["show", "reservation"]:
+        state = load_state(state_file)
+        lines = []
+        for res in reservations(state, now):
+            lines.append(
+                " ".join(
+                    [
+                        f"ReservationName={res['name']}",
+                        f"StartTime={format_time(res['start'])}",
+                        f"EndTime={format_time(res['end'])}",
+                        f"Duration={format_duration(res['end'] - res['start'])}",
+                        f"Nodes={compress(res['nodes'])}",
+                        f"NodeCnt={len(res['nodes'])}",
+                        f"CoreCnt={res['cores']}",
+                        "Features=(null)",
+                        f"PartitionName={res['partition']}",
+                        "Flags=",
+                        f"TRES=cpu={res['cores']}",
+                        f"Users={','.join(res['users'])}",
+                        "Groups=(null) Accounts=(null) Licenses=(null)",
+                        f"State={'ACTIVE' if res['start'] <= now < res['end'] else 'INACTIVE'}",
+                        "BurstBuffer=(null) Watts=n/a MaxStartDelay=(null)",
+                    ]
+                )
+            )
+        return lines or ["No reservations in the system"]
+
+    if argv[:1] == ["update"]:
+        fields = dict(arg.split("=", 1) for arg in argv[1:] if "=" in arg)
+        with modify_state(state_file) as state:
+            job = state["jobs"].get(fields.get("JobId", ""))
+            if not job:
+                raise CommandError(f"Invalid job id specified for job {fields.get('JobId', '')}")
+            job["name"] = fields.get("JobName", job["name"])
+        return []
+
+    if len(argv) != 2 or argv[0] not in ("hold", "release", "requeue"):
+        raise CommandError(f"scontrol: error: Invalid command: {' '.join(argv)}")
+
+    action, job_ids = argv[0], argv[1].split(",")
+    with modify_state(state_file) as state:
+        unknown = [job_id for job_id in job_ids if job_id not in state["jobs"]]
+        for job_id in job_ids:
+            job = state["jobs"].get(job_id)
+            if not job:
+                continue
+            if action == "requeue":
+                job["submit"] = now
+            else:
+                job["held"] = action == "hold"
+
+    if unknown:
+        raise CommandError("\n".join(f"Invalid job id specified for job {job_id}" for job_id in unknown))
+    return []
+
+
+def main(argv=None):
+    """Run fake command, first argument is the name of the command."""
+    argv = sys.argv[1:] if argv is None else argv
+    tool, args = argv[0], argv[1:]
+    state_file = os.environ[STATE_ENV]
+
+    if tool in AEDT_TOOLS:
+        if tool == "ansysedt":
+            print("ANSYS Electronics Desktop (simulated)")
+        return 0
+
+    workload = load_state(state_file)["workload"]
+    time.sleep(workload["latency"] * (1 + workload["jitter"] * random.random()))
+    if random.random() < workload["failure_rate"]:
+        print(f"{tool}: error: Socket timed out on send/recv operation", file=sys.stderr)
+        return 1
+
+    now = time.time()
+    try:
+        if tool in ("squeue", "sinfo", "sacct", "sstat", "sacctmgr", "lmutil"):
+            lines = globals()[tool](args, load_state(state_file), now)
+        else:
+            lines = globals()[tool](args, state_file, now)
+    except CommandError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+    if lines:
+        print("\n".join(lines))
+    return 0
+
+
+def _write_wrapper(path, tool, state_file):
+    """Write shell script that runs the fake tool."""
+    with open(path, "w") as file:
+        file.write(
+            "#!/bin/sh\n"
+            f"export {STATE_ENV}={shlex.quote(state_file)}\n"
+            f"export PYTHONPATH={shlex.quote(LAUNCHER_DIR)}\n"
+            f'exec {shlex.quote(sys.executable)} -m simulator.commands {tool} "$@"\n'
+        )
+    os.chmod(path, 0o755)
+
+
+def install(state_file, bin_dir, aedt_dir=None):
+    """Install fake commands.
+
+    Parameters
+    ----------
+    state_file : str
+        Path to the state of the cluster, see :func:`simulator.cluster.create_cluster`.
+    bin_dir : str
+        Directory for scheduler commands and ``lmutil``, to be put in front of ``PATH``.
+    aedt_dir : str, optional
+        Directory for fake AEDT installation with ``ansysedt``, ``UpdateRegistry`` and ``config/ProductList.txt``.
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    for tool in SCHEDULER_TOOLS + LICENSE_TOOLS:
+        _write_wrapper(os.path.join(bin_dir, tool), tool, state_file)
+
+    if aedt_dir:
+        os.makedirs(os.path.join(aedt_dir, "config"), exist_ok=True)
+        for tool in AEDT_TOOLS:
+            _write_wrapper(os.path.join(aedt_dir, tool), tool, state_file)
+        with open(os.path.join(aedt_dir, "config", "ProductList.txt"), "w") as file:
+            file.write("ElectronicsDesktop\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
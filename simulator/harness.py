@@ -0,0 +1,315 @@
+"""Load harness that runs polling and submission paths of the launcher against the simulated cluster.
+
+Each path calls the same functions as the launcher does, the fake scheduler commands are found first in ``PATH``::
+
+    python -m simulator.harness --jobs 5000 --latency 0.2 --failure-rate 0.05 --iterations 20 --concurrency 4
+
+Report has number of calls and failures, latency percentiles and throughput of each path. Latency includes start
+of the fake command (Python interpreter), run with ``--latency 0`` to measure this floor.
+
+With ``--serve`` the harness only prepares the cluster and keeps Overwatch running, to try the GUI against it.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from core.batch import submit_batch
+from core.config import CLUSTER_CONFIGURATION_FILE
+from core.config import LAUNCHER_DIR
+from core.config import load_cluster_config
+from core.efficiency import collect_efficiency
+from core.exclusions import ExcludedNodes
+from core.licenses import LicenseProbe
+from core.limits import LimitCache
+from core.nodes import NodeInventory
+from core.reservations import ReservationCache
+from core.submit import SubmissionError
+from core.submit import control_jobs
+from core.submit import interactive_command
+from core.submit import list_jobs
+from core.submit import submit_job
+from core.submit import update_registry
+from core.waittime import WaitTimePredictor
+from simulator.cluster import create_cluster
+from simulator.commands import install
+from simulator.overwatch import STATUS_PATH
+from simulator.overwatch import start_server
+
+PATHS = [
+    "squeue",
+    "sinfo",
+    "sacct",
+    "efficiency",
+    "reservations",
+    "limits",
+    "licenses",
+    "exclusions",
+    "overwatch",
+    "interactive",
+    "batch",
+    "control",
+    "registry",
+]
+
+# errors that the launcher handles as a failed call
+CALL_ERRORS = (subprocess.CalledProcessError, SubmissionError, OSError, ValueError, KeyError, requests.RequestException)
+
+TEMPLATE_CONFIGURATION_FILE = os.path.join(LAUNCHER_DIR, "templates", "cluster_configuration.json")
+
+
+class Harness:
+    """Simulated cluster with fake commands in ``PATH`` and running Overwatch.
+
+    Parameters
+    ----------
+    work_dir : str
+        Directory for the state of the cluster, fake commands, caches and projects.
+    cluster_config : dict
+        Cluster configuration, partitions of the simulated cluster are taken from ``queue_config_dict``.
+    **workload
+        Settings of the workload, see :data:`simulator.cluster.DEFAULT_WORKLOAD`.
+    """
+
+    def __init__(self, work_dir, cluster_config, **workload):
+        self.work_dir = work_dir
+        self.queue_config = cluster_config["queue_config_dict"]
+        self.queue = cluster_config.get("default_queue", next(iter(self.queue_config)))
+        self.exclude = cluster_config["vnc_nodes"] + cluster_config["dcv_nodes"]
+
+        partitions = {name: {"cores": queue["cores"], "ram": queue["ram"]} for name, queue in self.queue_config.items()}
+        self.state_file = os.path.join(work_dir, "cluster.json")
+        create_cluster(self.state_file, partitions=partitions, **workload)
+
+        self.bin_dir = os.path.join(work_dir, "bin")
+        self.aedt_dir = os.path.join(work_dir, "aedt")
+        install(self.state_file, self.bin_dir, self.aedt_dir)
+        self._path = os.environ["PATH"]
+        os.environ["PATH"] = self.bin_dir + os.pathsep + self._path
+
+        self.server = start_server(self.state_file)
+        self.overwatch_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        self.project_dir = os.path.join(work_dir, "projects")
+        os.makedirs(self.project_dir, exist_ok=True)
+        self.project = os.path.join(self.project_dir, "project.aedt")
+        open(self.project, "w").close()
+
+        self.inventory = NodeInventory(os.path.join(work_dir, "nodes.json"))
+        self.wait_predictor = WaitTimePredictor(os.path.join(work_dir, "wait_times.json"), list(self.queue_config))
+        self.reservations = ReservationCache(os.path.join(work_dir, "reservations.json"))
+        self.limits = LimitCache(os.path.join(work_dir, "limits.json"))
+        # fake lmutil is in PATH instead of the license client of the installation
+        self.licenses = LicenseProbe(
+            dict(cluster_config.get("licenses", {}), lmutil="lmutil"), os.path.join(work_dir, "licenses.json")
+        )
+        self.excluded_nodes = ExcludedNodes(os.path.join(work_dir, "excluded_nodes.json"))
+        self.submitted = []
+        self.running = []
+
+    def close(self):
+        """Cancel submitted jobs, stop Overwatch and restore ``PATH``."""
+        if self.submitted:
+            with contextlib.suppress(*CALL_ERRORS), contextlib.redirect_stdout(io.StringIO()):
+                control_jobs("cancel", self.submitted)
+        self.server.shutdown()
+        os.environ["PATH"] = self._path
+
+    def poll_jobs(self):
+        jobs = list_jobs(self.exclude)
+        self.running = [job["pid"] for job in jobs if job["state"] == "R"]
+
+    def poll_efficiency(self):
+        collect_efficiency(self.running, self.queue_config)
+
+    def poll_overwatch(self):
+        with requests.get(f"{self.overwatch_url}{STATUS_PATH}") as url_req:
+            cluster_data = url_req.json()
+        return {queue["name"]: queue["totalAvailableSlots"] for queue in cluster_data["QueueStatus"]}
+
+    def submit_interactive(self):
+        command = interactive_command(
+            self.aedt_dir,
+            "",
+            self.queue,
+            0,
+            4,
+            self.queue_config,
+            "localhost:1",
+            output_dir=self.work_dir,
+        )
+        self.submitted.append(submit_job(command))
+
+    def submit_batch(self):
+        results = submit_batch(
+            [self.project],
+            os.path.join(self.work_dir, "scripts"),
+            aedt_path=self.aedt_dir,
+            queue=self.queue,
+            allocation_rule=0,
+            num=4,
+            queue_config=self.queue_config,
+            env="",
+        )
+        for _project, pid, message in results:
+            if pid is None:
+                raise SubmissionError(message)
+            self.submitted.append(pid)
+
+    def control_jobs(self, iteration):
+        if self.submitted:
+            control_jobs("hold" if iteration % 2 == 0 else "release", self.submitted)
+
+    def paths(self):
+        """Get callables of the paths keyed by name, each takes the number of the iteration."""
+        return {
+            "squeue": lambda _: self.poll_jobs(),
+            "sinfo": lambda _: self.inventory.refresh(),
+            "sacct": lambda _: self.wait_predictor.refresh(),
+            "efficiency": lambda _: self.poll_efficiency(),
+            "reservations": lambda _: self.reservations.refresh(),
+            "limits": lambda _: self.limits.refresh(),
+            "licenses": lambda _: self.licenses.refresh(),
+            "exclusions": lambda _: self.excluded_nodes.refresh(),
+            "overwatch": lambda _: self.poll_overwatch(),
+            "interactive": lambda _: self.submit_interactive(),
+            "batch": lambda _: self.submit_batch(),
+            "control": self.control_jobs,
+            "registry": lambda _: update_registry(self.aedt_dir, "ElectronicsDesktop", self.project_dir),
+        }
+
+    def measure(self, name, iterations, concurrency=1):
+        """Call the path several times and collect statistics, see :func:`summarize`."""
+        function = self.paths()[name]
+        latencies = []
+        failures = []
+
+        def call(iteration):
+            start = time.perf_counter()
+            try:
+                function(iteration)
+            except CALL_ERRORS as exc:
+                failures.append(str(exc).strip().splitlines()[-1:] or [type(exc).__name__])
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(call, range(iterations)))
+        return summarize(name, latencies, len(failures), time.perf_counter() - start)
+
+
+def summarize(name, latencies, failures, wall_time):
+    """Get statistics of the path.
+
+    Parameters
+    ----------
+    name : str
+        Name of the path.
+    latencies : list
+        Duration of each call in seconds.
+    failures : int
+        Number of failed calls.
+    wall_time : float
+        Total time of all calls in seconds.
+
+    Returns
+    -------
+    dict
+        Number of calls and failures, median, 95th percentile and max latency in milliseconds and calls per second.
+    """
+    latencies = sorted(latencies)
+
+    def percentile(fraction):
+        return latencies[max(0, math.ceil(len(latencies) * fraction) - 1)] * 1000 if latencies else 0.0
+
+    return {
+        "path": name,
+        "calls": len(latencies),
+        "failures": failures,
+        "p50_ms": round(percentile(0.5), 1),
+        "p95_ms": round(percentile(0.95), 1),
+        "max_ms": round(latencies[-1] * 1000 if latencies else 0.0, 1),
+        "calls_per_s": round(len(latencies) / wall_time if wall_time else 0.0, 2),
+    }
+
+
+def format_report(results):
+    """Format statistics of the paths as a table."""
+    columns = ["path", "calls", "failures", "p50_ms", "p95_ms", "max_ms", "calls_per_s"]
+    lines = ["{:<14}{:>8}{:>10}{:>10}{:>10}{:>10}{:>13}".format(*columns)]
+    for result in results:
+        lines.append("{:<14}{:>8}{:>10}{:>10}{:>10}{:>10}{:>13}".format(*[result[col] for col in columns]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Run the harness from command line."""
+    parser = argparse.ArgumentParser(description="Measure launcher against simulated Slurm cluster")
+    parser.add_argument("--config", help="Cluster configuration, by default of the launcher or the template")
+    parser.add_argument("--jobs", type=int, default=2000, help="Background jobs in the queue")
+    parser.add_argument("--user-jobs", type=int, default=20, help="Background jobs of the current user")
+    parser.add_argument("--nodes", type=int, default=50, help="Nodes per partition")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per scheduler call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a scheduler call to fail")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the workload")
+    parser.add_argument("--iterations", type=int, default=10, help="Calls of each path")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel calls of each path")
+    parser.add_argument("--paths", default=",".join(PATHS), help="Comma separated paths to run")
+    parser.add_argument("--work-dir", help="Keep cluster and caches in this directory, by default temporary")
+    parser.add_argument("--serve", action="store_true", help="Only prepare the cluster and serve Overwatch")
+    parser.add_argument("--json", action="store_true", help="Print report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = args.paths.split(",")
+    unknown = set(paths) - set(PATHS)
+    if unknown:
+        parser.error(f"unknown paths: {', '.join(sorted(unknown))}, choose from {', '.join(PATHS)}")
+
+    config_file = args.config
+    if not config_file:
+        config_file = CLUSTER_CONFIGURATION_FILE
+        if not os.path.isfile(config_file):
+            config_file = TEMPLATE_CONFIGURATION_FILE
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="aedt_simulator_")
+    os.makedirs(work_dir, exist_ok=True)
+    harness = Harness(
+        work_dir,
+        load_cluster_config(config_file),
+        jobs=args.jobs,
+        user_jobs=args.user_jobs,
+        nodes=args.nodes,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    try:
+        if args.serve:
+            print(f"export PATH={harness.bin_dir}{os.pathsep}$PATH")
+            print(f"Fake AEDT installation: {harness.aedt_dir}")
+            print(f"Set overwatch_api_url to {harness.overwatch_url}, press Ctrl+C to stop")
+            with contextlib.suppress(KeyboardInterrupt):
+                while True:
+                    time.sleep(1)
+            return
+
+        results = [harness.measure(name, args.iterations, args.concurrency) for name in paths]
+    finally:
+        harness.close()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(results, indent=4) if args.json else format_report(results))
+
+
+if __name__ == "__main__":
+    main()
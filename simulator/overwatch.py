@@ -0,0 +1,140 @@
+"""Fake Overwatch server that reports load of the queues of :mod:`simulator.cluster`.
+
+Only the endpoint used by the launcher is served::
+
+    python -m simulator.overwatch --state /tmp/sim/cluster.json --port 8080
+
+Then set ``overwatch_api_url`` in cluster configuration to ``http://localhost:8080``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from simulator.cluster import cluster_jobs
+from simulator.cluster import load_state
+from simulator.cluster import node_usage
+from simulator.cluster import reservations
+
+STATUS_PATH = "/api/v1/overwatch/minclusterstatus"
+
+
+def cluster_status(state, now=None):
+    """Get load of each partition in the format of Overwatch ``minclusterstatus`` endpoint.
+
+    Parameters
+    ----------
+    state : dict
+        State of the cluster.
+    now : float, optional
+        Current time, by default now.
+
+    Returns
+    -------
+    dict
+        Response with ``QueueStatus`` list.
+    """
+    now = now or time.time()
+    reserved_nodes = {
+        node for res in reservations(state, now) if res["start"] <= now < res["end"] for node in res["nodes"]
+    }
+
+    queues = {}
+    for node in node_usage(state, cluster_jobs(state, now)):
+        queue = queues.setdefault(
+            node["partition"],
+            {
+                "name": node["partition"],
+                "totalSlots": 0,
+                "totalUsedSlots": 0,
+                "totalUnavailableSlots": 0,
+                "totalReservedSlots": 0,
+                "totalAvailableSlots": 0,
+            },
+        )
+        queue["totalSlots"] += node["total_cores"]
+        free = node["total_cores"] - node["alloc_cores"]
+        if node["state"] == "drained":
+            queue["totalUnavailableSlots"] += node["total_cores"]
+        elif node["name"] in reserved_nodes:
+            queue["totalUsedSlots"] += node["alloc_cores"]
+            queue["totalReservedSlots"] += free
+        else:
+            queue["totalUsedSlots"] += node["alloc_cores"]
+            queue["totalAvailableSlots"] += free
+
+    return {"QueueStatus": list(queues.values())}
+
+
+class OverwatchHandler(BaseHTTPRequestHandler):
+    """Serve cluster status with latency and failure rate of the workload."""
+
+    def do_GET(self):
+        state = load_state(self.server.state_file)
+        workload = state["workload"]
+        time.sleep(workload["latency"] * (1 + workload["jitter"] * random.random()))
+
+        if self.path.split("?")[0] != STATUS_PATH:
+            self.send_error(404)
+            return
+        if random.random() < workload["failure_rate"]:
+            self.send_error(503, "Service temporarily unavailable")
+            return
+
+        body = json.dumps(cluster_status(state)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Do not log each request."""
+
+
+def start_server(state_file, host="127.0.0.1", port=0):
+    """Start server in a background thread.
+
+    Parameters
+    ----------
+    state_file : str
+        Path to the state of the cluster.
+    host : str, optional
+        Address to listen on.
+    port : int, optional
+        Port to listen on, by default any free port.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        Running server, base URL is ``http://<host>:<server.server_port>``. Stop with ``shutdown()``.
+    """
+    server = ThreadingHTTPServer((host, port), OverwatchHandler)
+    server.daemon_threads = True
+    server.state_file = state_file
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    """Run server in foreground."""
+    parser = argparse.ArgumentParser(description="Fake Overwatch server of the simulated cluster")
+    parser.add_argument("--state", required=True, help="State file of the simulated cluster")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), OverwatchHandler)
+    server.state_file = args.state
+    print(f"Serving http://{args.host}:{server.server_port}{STATUS_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()